@@ -1,9 +1,20 @@
+import asyncio
+import re
 from math import exp
 from typing import Literal
 
-from fireworks.client import Fireworks
+from fireworks.client import AsyncFireworks
 from pydantic import BaseModel
+from rich.console import Console
 
+from brokeshire_agents.agent_router.local_intent_classifier import (
+    EVM_ADDRESS_PATTERN,
+    MENTION_PATTERN,
+    SOLANA_ADDRESS_PATTERN,
+    LocalIntentClassifier,
+)
+from brokeshire_agents.common.cache import TTLCache
+from brokeshire_agents.common.metrics import register_metrics
 from brokeshire_agents.settings import SETTINGS
 
 INTENT = Literal[
@@ -28,7 +39,34 @@ class ClassifiedIntent(BaseModel):
     linear_probability: float
 
 
-client = Fireworks(api_key=SETTINGS.fireworks_api_key)
+client = AsyncFireworks(api_key=SETTINGS.fireworks_api_key)
+
+CLASSIFY_INTENT_TIMEOUT = 10
+
+# Catch-all intents are never trusted from the local classifier, since it can only
+# recognize utterances that resemble its examples
+LOCAL_FALLBACK_INTENTS: set[INTENT] = {"unclear", "out_of_scope"}
+# Intents that need a higher local confidence: actions move funds, and price
+# queries are easily mistaken for price predictions
+LOCAL_STRICT_INTENTS: set[INTENT] = {
+    "crypto_price_query",
+    "convert_crypto_action",
+    "transfer_crypto_action",
+    "earn_crypto_action",
+}
+
+INTENT_CACHE_MAXSIZE = 10_000
+INTENT_CACHE_TTL = 60 * 60 * 6
+
+intent_cache: TTLCache[str, ClassifiedIntent] = TTLCache(
+    maxsize=INTENT_CACHE_MAXSIZE, ttl=INTENT_CACHE_TTL
+)
+register_metrics("intent_cache", intent_cache.stats)
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s$<>]")
+# Negations in normalized utterances, where "don't" became "don t". The local
+# classifier ignores them, so "do not send eth" would look like a transfer.
+NEGATION_PATTERN = re.compile(r"\b(?:not|never|dont|doesnt|cant|wont)\b|n t\b")
 
 
 descriptions: dict[INTENT, str] = {
@@ -47,6 +85,140 @@ descriptions: dict[INTENT, str] = {
     "out_of_scope": "Does not fit any of the other intents",
 }
 
+# Example utterances for the local pre-classifier. Keep these short and typical;
+# anything ambiguous is better left to the LLM.
+example_utterances: dict[INTENT, list[str]] = {
+    "capabilities_query": [
+        "what can you do",
+        "what are your features",
+        "how do I use you",
+        "who are you",
+        "what is brokeshire",
+        "help",
+        "what commands do you support",
+        "can you trade for me",
+        "do you have a wallet",
+        "how does brokeshire work",
+    ],
+    "crypto_price_query": [
+        "sol price",
+        "btc price",
+        "price of eth",
+        "what is the price of bitcoin",
+        "how much is pepe worth",
+        "how much is bonk",
+        "current price of arb",
+        "brokeagi price",
+        "eth price today",
+        "what's avax trading at",
+    ],
+    "convert_crypto_action": [
+        "swap 10 sol to brokeagi",
+        "swap 0 usdc on base for arb on arbitrum",
+        "buy brokeagi",
+        "buy 0 sol of wif",
+        "buy bonk",
+        "convert usdc to eth",
+        "exchange eth for usdt",
+        "trade sol for usdc",
+        "swap eth to dai",
+        "I want to buy some pepe",
+        "buy address",
+    ],
+    "transfer_crypto_action": [
+        "send 10 usdc to 0x2b9b06e83b5d1b3e6a2c2c1f34c5d8c1f2e3a4b5",
+        "send dai",
+        "send eth to my friend",
+        "transfer 0 sol to address",
+        "pay bob 0 usdc",
+        "send 0 usdt to alice",
+        "transfer tokens to another wallet",
+        "tip someone 0 brokeagi",
+    ],
+    "earn_crypto_action": [
+        "get yield on reth",
+        "earn yield on my usdc",
+        "stake my eth",
+        "deposit usdc into a yield strategy",
+        "where can I earn interest on dai",
+        "put my sol to work",
+        "best apy for eth",
+        "farm yield with my stablecoins",
+    ],
+    "explanation_query": [
+        "what is defi",
+        "explain staking",
+        "what is a rollup",
+        "tell me about solana",
+        "what does impermanent loss mean",
+        "how does a liquidity pool work",
+        "what is an nft",
+        "define market cap",
+    ],
+    "advice_query": [
+        "should I buy bitcoin now",
+        "is it a good time to sell",
+        "how should I diversify my portfolio",
+        "what is a good trading strategy",
+        "design a trading strategy",
+        "should I take profits",
+        "how do I avoid scams",
+        "long or short eth",
+    ],
+    "market_news_query": [
+        "latest crypto news",
+        "what happened in the market today",
+        "crypto market news",
+        "any news on bitcoin",
+        "what's going on in crypto this week",
+        "why is the market down",
+        "top headlines in crypto",
+    ],
+    "token_analysis_query": [
+        "brokeagi token analysis",
+        "random token analysis",
+        "analyze sol",
+        "technical analysis of eth",
+        "find me a hidden gem",
+        "what do you think of pepe",
+        "price prediction for btc",
+        "is wif going to pump",
+        "give me a token to ape into",
+    ],
+    "broke_twitter_query": [
+        "generate a tweet",
+        "write a tweet",
+        "give me a tweet to post",
+        "random tweet",
+        "tweet about a trending token",
+    ],
+    "terminate": [
+        "cancel",
+        "stop",
+        "nevermind",
+        "quit",
+        "exit",
+        "forget it",
+        "abort",
+    ],
+    "unclear": [
+        "asdfgh",
+        "hmm",
+        "the sky is loud",
+        "banana telephone",
+        "???",
+        "qwerty uiop",
+    ],
+    "out_of_scope": [
+        "what's the weather today",
+        "write me a poem about cats",
+        "how do I bake bread",
+        "who won the football game",
+        "recommend a movie",
+        "fix my car",
+    ],
+}
+
 intent_strings = [f"{key} ({value})" for key, value in descriptions.items()]
 possible_intents = "\n".join(intent_strings)
 intent_grammar = f"""
@@ -59,6 +231,20 @@ SYSTEM_PROMPT = f"""You are a natural language understanding expert that classif
 {possible_intents}"""
 
 
+def _description_example(description: str) -> str:
+    return re.sub(r"<example>.*?</example>", "", description, flags=re.DOTALL).strip()
+
+
+local_classifier = LocalIntentClassifier(
+    {
+        intent: [_description_example(descriptions[intent]), *utterances]
+        for intent, utterances in example_utterances.items()
+    }
+)
+
+console = Console()
+
+
 def get_prompt(utterance: str) -> str:
     return f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
 
@@ -69,22 +255,112 @@ Utterance: {utterance}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
 """
 
 
-async def classify_intent(utterance: str) -> ClassifiedIntent:
+def classify_intent_locally(utterance: str) -> ClassifiedIntent:
     """
-    Classify the intent of an utterance
+    Classify the intent of an utterance with the local pre-classifier
+    """
+
+    intent, linear_probability = local_classifier.predict(utterance)
+    return ClassifiedIntent(name=intent, linear_probability=linear_probability)
+
+
+async def classify_intent_with_llm(utterance: str) -> ClassifiedIntent:
+    """
+    Classify the intent of an utterance with the LLM
     """
 
     prompt = get_prompt(utterance)
-    response = client.completion.create(
-        model="accounts/fireworks/models/llama-v3-70b-instruct",
-        response_format={"type": "grammar", "grammar": intent_grammar},
-        prompt=prompt,
-        temperature=0,
-        logprobs=True,
-        top_logprobs=3,
-    )
+    # The timeout cancels the in-flight request, as does cancelling the caller
+    async with asyncio.timeout(CLASSIFY_INTENT_TIMEOUT):
+        response = await client.completion.acreate(
+            model="accounts/fireworks/models/llama-v3-70b-instruct",
+            response_format={"type": "grammar", "grammar": intent_grammar},
+            prompt=prompt,
+            stream=False,
+            request_timeout=CLASSIFY_INTENT_TIMEOUT,
+            temperature=0,
+            logprobs=True,
+            top_logprobs=3,
+        )
     intent = response.choices[0].text
     token_logprob = response.choices[0].logprobs.content[0].top_logprobs[0]
     linear_probability = exp(token_logprob.logprob)
 
     return ClassifiedIntent(name=intent, linear_probability=linear_probability)
+
+
+def normalize_utterance(utterance: str) -> str:
+    """
+    Normalize an utterance into an intent cache key
+
+    Case, punctuation, whitespace and bot mentions are ignored, and addresses are
+    replaced with a placeholder since they never change the intent.
+    """
+
+    utterance = MENTION_PATTERN.sub(" ", utterance)
+    utterance = EVM_ADDRESS_PATTERN.sub("<address>", utterance)
+    utterance = SOLANA_ADDRESS_PATTERN.sub("<address>", utterance)
+    utterance = PUNCTUATION_PATTERN.sub(" ", utterance.lower())
+    return " ".join(utterance.split())
+
+
+def is_local_intent_trusted(utterance: str, intent: ClassifiedIntent) -> bool:
+    """
+    Whether a local classification can be returned without asking the LLM
+    """
+
+    if intent.name in LOCAL_FALLBACK_INTENTS:
+        return False
+    if NEGATION_PATTERN.search(normalize_utterance(utterance)):
+        return False
+    threshold = (
+        SETTINGS.local_strict_intent_confidence_threshold
+        if intent.name in LOCAL_STRICT_INTENTS
+        else SETTINGS.local_intent_confidence_threshold
+    )
+    return intent.linear_probability >= threshold
+
+
+async def classify_intent(utterance: str) -> ClassifiedIntent:
+    """
+    Classify the intent of an utterance
+
+    Results are cached by normalized utterance. Otherwise confident local
+    classifications are returned directly and everything else falls back to the
+    LLM.
+    """
+
+    key = normalize_utterance(utterance)
+    cached_intent = intent_cache.get(key)
+    if cached_intent is not None:
+        return cached_intent
+
+    intent = classify_intent_locally(utterance)
+    if is_local_intent_trusted(utterance, intent):
+        console.print(
+            f"[green]Local intent: {intent.name} "
+            f"({intent.linear_probability:.2f})[/green]"
+        )
+    else:
+        intent = await classify_intent_with_llm(utterance)
+
+    intent_cache.set(key, intent)
+    return intent
+
+
+async def warm_intent_cache(utterances: list[str]) -> None:
+    """
+    Classify utterances ahead of time so they are served from the cache
+    """
+
+    results = await asyncio.gather(
+        *(classify_intent(utterance) for utterance in utterances),
+        return_exceptions=True,
+    )
+    failures = [r for r in results if isinstance(r, BaseException)]
+    console.print(
+        f"Warmed intent cache with {len(results) - len(failures)}/{len(results)} "
+        "utterances"
+    )
+    if failures:
+        console.print(f"[red]Failed to warm intent cache: {failures[0]!s}[/red]")
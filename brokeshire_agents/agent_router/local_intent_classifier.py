@@ -0,0 +1,128 @@
+import re
+from collections.abc import Mapping, Sequence
+from itertools import pairwise
+from zlib import crc32
+
+import numpy as np
+
+N_FEATURES = 2**14
+CHAR_NGRAM_SIZES = (3, 4, 5)
+
+EVM_ADDRESS_PATTERN = re.compile(r"\b0x[a-fA-F0-9]{40}\b")
+SOLANA_ADDRESS_PATTERN = re.compile(r"\b[1-9A-HJ-NP-Za-km-z]{32,44}\b")
+NUMBER_PATTERN = re.compile(r"\b\d+(?:[.,]\d+)*\b")
+MENTION_PATTERN = re.compile(r"@\w+")
+WORD_PATTERN = re.compile(r"[a-z0-9$?]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase and tokenize an utterance, collapsing values that don't carry intent.
+
+    Addresses, numbers and bot mentions are replaced with placeholders so that
+    "send 5 usdc to 0xabc..." and "send 20 dai to 0xdef..." look the same.
+    """
+
+    text = MENTION_PATTERN.sub(" ", text)
+    text = EVM_ADDRESS_PATTERN.sub(" address ", text)
+    text = SOLANA_ADDRESS_PATTERN.sub(" address ", text)
+    text = text.lower()
+    text = NUMBER_PATTERN.sub(" 0 ", text)
+    text = text.replace("?", " ? ")
+    return WORD_PATTERN.findall(text)
+
+
+def extract_features(text: str) -> list[str]:
+    """Word unigrams and bigrams plus character n-grams within word boundaries."""
+
+    words = tokenize(text)
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{a} {b}" for a, b in pairwise(words))
+    for word in words:
+        padded = f" {word} "
+        for size in CHAR_NGRAM_SIZES:
+            features.extend(
+                f"c:{padded[i:i + size]}" for i in range(len(padded) - size + 1)
+            )
+    return features
+
+
+def hash_features(features: Sequence[str]) -> np.ndarray:
+    """Hash features into a fixed width count vector.
+
+    `crc32` is used instead of `hash` so vectors are stable across processes.
+    """
+
+    indices = np.fromiter(
+        (crc32(feature.encode()) % N_FEATURES for feature in features),
+        dtype=np.int64,
+        count=len(features),
+    )
+    return np.bincount(indices, minlength=N_FEATURES).astype(np.float32)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class LocalIntentClassifier:
+    """Nearest centroid classifier over hashed n-gram TF-IDF vectors.
+
+    Every example utterance is vectorized once on construction and averaged into a
+    single centroid per label, so classifying an utterance is one hashing pass and
+    one matrix-vector product. Cosine similarities to the centroids are turned into
+    probabilities with a temperature scaled softmax.
+    """
+
+    def __init__(
+        self, examples: Mapping[str, Sequence[str]], temperature: float = 0.05
+    ):
+        if len(examples) < 2:  # noqa: PLR2004
+            msg = "At least two labels are required to classify utterances."
+            raise ValueError(msg)
+
+        self.labels = list(examples)
+        self.temperature = temperature
+
+        documents = [
+            (label_index, hash_features(extract_features(utterance)))
+            for label_index, label in enumerate(self.labels)
+            for utterance in examples[label]
+        ]
+        if len({label_index for label_index, _ in documents}) != len(self.labels):
+            msg = "Every label needs at least one example utterance."
+            raise ValueError(msg)
+
+        label_indices = np.array([label_index for label_index, _ in documents])
+        counts = np.stack([vector for _, vector in documents])
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self._idf = (
+            np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        ).astype(np.float32)
+
+        vectors = self._weight(counts)
+        centroids = np.zeros((len(self.labels), N_FEATURES), dtype=np.float32)
+        np.add.at(centroids, label_indices, vectors)
+        self._centroids = _normalize_rows(centroids)
+
+    def _weight(self, counts: np.ndarray) -> np.ndarray:
+        # Sublinear term frequency so repeated n-grams don't dominate
+        tf = np.log1p(counts, dtype=np.float32)
+        return _normalize_rows(tf * self._idf)
+
+    def vectorize(self, utterance: str) -> np.ndarray:
+        return self._weight(hash_features(extract_features(utterance)))
+
+    def predict_proba(self, utterance: str) -> dict[str, float]:
+        similarities = self._centroids @ self.vectorize(utterance)
+        logits = (similarities - similarities.max()) / self.temperature
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum()
+        return dict(zip(self.labels, probabilities.tolist(), strict=True))
+
+    def predict(self, utterance: str) -> tuple[str, float]:
+        """Return the most likely label and its probability."""
+
+        probabilities = self.predict_proba(utterance)
+        label = max(probabilities, key=probabilities.__getitem__)
+        return label, probabilities[label]
@@ -1,7 +1,9 @@
+import asyncio
 import json
-from collections.abc import Callable
-from functools import partial
-from typing import Any
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, TypedDict
 
 import rich
 from langgraph.errors import NodeInterrupt
@@ -14,6 +16,12 @@ from brokeshire_agents.agent_router.intent_classifier import (
 )
 from brokeshire_agents.common.agent_team import AgentTeam
 from brokeshire_agents.common.broke_twitter.broke_twitter import BrokeTwitterAgentTeam
+from brokeshire_agents.common.metrics import register_metrics
+from brokeshire_agents.common.session_store import (
+    SessionSnapshot,
+    SessionStore,
+    create_session_store,
+)
 from brokeshire_agents.common.types import MessageType
 from brokeshire_agents.convert_token.convert_token_agent_team import (
     ConvertTokenAgentTeam,
@@ -21,32 +29,214 @@ from brokeshire_agents.convert_token.convert_token_agent_team import (
 from brokeshire_agents.earn.earn_agent_team import EarnAgentTeam
 from brokeshire_agents.education.education import EducationAgentTeam
 from brokeshire_agents.send_token.send import SendTokenAgentTeam
+from brokeshire_agents.settings import SETTINGS
 from brokeshire_agents.token_tech_analysis.token_ta_agent_team import TokenTaAgentTeam
 
+SESSION_REAPER_INTERVAL = 60
+
+
+class AgentTeamSpec(TypedDict):
+    """Arguments an agent team session was created with."""
+
+    route: str | None
+    store_transaction_info: Any
+    user_chat_id: str
+    user_address: str | None
+
 
 class AgentTeamSessionManager:
-    def __init__(self) -> None:
-        self._sessions: dict[str, AgentTeam] = {}
+    """Live agent team sessions, bounded in number and expired when idle.
+
+    Sessions are kept in least recently used order. Creating a session beyond
+    `max_sessions` evicts the least recently used one, and `reap_idle_sessions`
+    removes sessions unused for `idle_ttl` seconds. Removed agent teams are
+    cancelled so their background conversations don't outlive them.
+
+    Sessions are also saved to a `SessionStore` after every response, so a
+    request routed to another worker can resume the conversation from where it
+    left off. Every save bumps the session version, which tells a worker whether
+    its live copy of a session is still the latest one.
+    """
 
-    def create_session(self, session_id: str, agent_team: AgentTeam):
+    def __init__(
+        self,
+        max_sessions: int = SETTINGS.max_agent_team_sessions,
+        idle_ttl: float = SETTINGS.agent_team_session_idle_ttl,
+        store: SessionStore | None = None,
+    ) -> None:
+        self._sessions: OrderedDict[str, AgentTeam] = OrderedDict()
+        self._last_active: dict[str, float] = {}
+        self._specs: dict[str, AgentTeamSpec] = {}
+        self._versions: dict[str, int] = {}
+        self._max_sessions = max_sessions
+        self._idle_ttl = idle_ttl
+        self._store = (
+            store
+            if store is not None
+            else create_session_store(SETTINGS.session_store_url)
+        )
+        self._store_tasks: set[asyncio.Task] = set()
+        self.evictions = 0
+        self.expirations = 0
+        self.resumes = 0
+        register_metrics("agent_team_sessions", self.stats)
+
+    def create_session(
+        self,
+        session_id: str,
+        agent_team: AgentTeam,
+        spec: AgentTeamSpec | None = None,
+        version: int = 0,
+    ):
         rich.print(f"Creating session: {session_id}")
         if session_id in self._sessions:
             rich.print(f"Session already exists: {session_id}")
-            self.remove_session(session_id)
+            self._drop_session(session_id)
         self._sessions[session_id] = agent_team
+        self._last_active[session_id] = time.monotonic()
+        self._versions[session_id] = version
+        if spec is not None:
+            self._specs[session_id] = spec
+        while len(self._sessions) > self._max_sessions:
+            oldest_session_id = next(iter(self._sessions))
+            rich.print(f"Evicting least recently used session: {oldest_session_id}")
+            self._drop_session(oldest_session_id)
+            self.evictions += 1
 
     def get_session(self, session_id: str):
         rich.print(f"Getting session: {session_id}")
         agent_team = self._sessions.get(session_id)
+        if agent_team is not None:
+            self._sessions.move_to_end(session_id)
+            self._last_active[session_id] = time.monotonic()
         return agent_team
 
-    def remove_session(self, session_id: str):
-        rich.print(f"Removing session: {session_id}")
+    async def resolve_session(
+        self,
+        session_id: str,
+        resume_agent_team: Callable[[SessionSnapshot], Awaitable[AgentTeam | None]],
+    ) -> AgentTeam | None:
+        """Gets the latest version of a session, resuming it from the store.
+
+        The live session is used if no other worker has saved a newer version of
+        it. Otherwise `resume_agent_team` recreates the team from the stored
+        snapshot, replacing the outdated live copy.
+        """
+
+        snapshot = await self._store.get(session_id)
+        if (
+            snapshot is None
+            or snapshot.version <= self._versions.get(session_id, -1)
+            or snapshot.updated_at < time.time() - self._idle_ttl
+        ):
+            return self.get_session(session_id)
+
+        rich.print(f"Resuming session {session_id} at version {snapshot.version}")
         if session_id in self._sessions:
-            del self._sessions[session_id]
+            self._drop_session(session_id)
+        agent_team = await resume_agent_team(snapshot)
+        if agent_team is None:
+            return None
+        spec = AgentTeamSpec(
+            route=snapshot.route,
+            store_transaction_info=snapshot.store_transaction_info,
+            user_chat_id=snapshot.user_chat_id,
+            user_address=snapshot.user_address,
+        )
+        self.create_session(session_id, agent_team, spec, snapshot.version)
+        self.resumes += 1
+        return agent_team
+
+    async def save_session(self, session_id: str, agent_team: AgentTeam):
+        """Saves a snapshot of a session so other workers can resume it.
+
+        Sessions that were replaced or removed meanwhile, or whose team can't
+        be snapshotted, are skipped.
+        """
+
+        spec = self._specs.get(session_id)
+        if self._sessions.get(session_id) is not agent_team or spec is None:
+            return
+        agent_team_snapshot = await agent_team.snapshot()
+        if agent_team_snapshot is None:
             return
 
-        rich.print(f"Session ID ({session_id}) does not exist")
+        version = self._versions[session_id] + 1
+        self._versions[session_id] = version
+        await self._store.put(
+            SessionSnapshot(
+                session_id=session_id,
+                version=version,
+                agent_team=agent_team_snapshot,
+                **spec,
+            )
+        )
+
+    def remove_session(self, session_id: str, agent_team: AgentTeam | None = None):
+        """Removes and cancels a session, deleting it from the store too.
+
+        If `agent_team` is given, the session is only removed if it still belongs
+        to that team, so a finished team can't remove its replacement.
+        """
+
+        rich.print(f"Removing session: {session_id}")
+        current_agent_team = self._sessions.get(session_id)
+        if current_agent_team is None:
+            rich.print(f"Session ID ({session_id}) does not exist")
+            return
+        if agent_team is not None and agent_team is not current_agent_team:
+            return
+
+        self._drop_session(session_id)
+        task = asyncio.create_task(self._store.delete(session_id))
+        self._store_tasks.add(task)
+        task.add_done_callback(self._store_tasks.discard)
+
+    def _drop_session(self, session_id: str):
+        """Removes and cancels the live copy of a session, keeping it in the store."""
+
+        agent_team = self._sessions.pop(session_id)
+        del self._last_active[session_id]
+        self._specs.pop(session_id, None)
+        self._versions.pop(session_id, None)
+        agent_team.cancel()
+
+    def reap_idle_sessions(self) -> int:
+        """Removes sessions idle for longer than the idle TTL."""
+
+        expired_before = time.monotonic() - self._idle_ttl
+        idle_session_ids = []
+        # Sessions are in least recently used order, so stop at the first active one
+        for session_id in self._sessions:
+            if self._last_active[session_id] > expired_before:
+                break
+            idle_session_ids.append(session_id)
+
+        for session_id in idle_session_ids:
+            self._drop_session(session_id)
+        self.expirations += len(idle_session_ids)
+        return len(idle_session_ids)
+
+    async def reap_idle_sessions_forever(
+        self, interval: float = SESSION_REAPER_INTERVAL
+    ):
+        while True:
+            await asyncio.sleep(interval)
+            reaped = self.reap_idle_sessions()
+            if reaped > 0:
+                rich.print(f"Reaped {reaped} idle sessions")
+            deleted = await self._store.delete_expired(time.time() - self._idle_ttl)
+            if deleted > 0:
+                rich.print(f"Deleted {deleted} expired session snapshots")
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "live_sessions": len(self._sessions),
+            "max_sessions": self._max_sessions,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "resumes": self.resumes,
+        }
 
     def get_session_id(self, sender_did: str, thread_id: str, client_id: int) -> str:
         rich.print(f"Getting session ID: {sender_did}:{thread_id}:{client_id}")
@@ -85,6 +275,7 @@ class Router:
         _retry_count: int = 0,
         _max_retries: int = 3,
         required_route: INTENT | None = None,
+        response_delta: Callable[[str], None] | None = None,
     ):
 
         # ===================================================
@@ -102,7 +293,7 @@ class Router:
             msg = f"Requested intents {', '.join(self._requested_intents)} mismatches with matched intent {route}"
             raise ValueError(msg)
 
-        agent_team = self._get_agent_team_session(session_id)
+        agent_team = await self._get_agent_team_session(session_id)
         rich.print(f"Agent Team: {agent_team}")
         if route == "terminate" or agent_team is None:
             agent_team = self._create_agent_team_session(
@@ -110,9 +301,12 @@ class Router:
             )
         if activity is not None:
             agent_team.get_activity_updates(activity)
+        if response_delta is not None:
+            agent_team.get_response_deltas(response_delta)
 
         try:
             response = await agent_team.send(message, message_type, context=context)
+            await self._session_manager.save_session(session_id, agent_team)
             return response
         except NodeInterrupt as interrupt_tuple:
             if _retry_count >= _max_retries:
@@ -182,6 +376,7 @@ class Router:
                 user_address=user_address,
                 _retry_count=_retry_count + 1,
                 _max_retries=_max_retries,
+                response_delta=response_delta,
             )
 
     def _create_agent_team_session(
@@ -194,7 +389,30 @@ class Router:
     ) -> AgentTeam:
         if self._intents is not None:
             route = route if route is not None and route in self._intents else None
-        on_complete = partial(self._session_manager.remove_session, session_id)
+
+        agent_team = self._create_agent_team(
+            session_id, route, store_transaction_info, user_chat_id, user_address
+        )
+        spec = AgentTeamSpec(
+            route=route,
+            store_transaction_info=store_transaction_info,
+            user_chat_id=user_chat_id,
+            user_address=user_address,
+        )
+        self._session_manager.create_session(session_id, agent_team, spec)
+        return agent_team
+
+    def _create_agent_team(
+        self,
+        session_id: str,
+        route: str | None,
+        store_transaction_info: Any,
+        user_chat_id: str,
+        user_address: str | None,
+    ) -> AgentTeam:
+        def on_complete():
+            self._session_manager.remove_session(session_id, agent_team)
+
         match route:
             case "transfer_crypto_action":
                 agent_team = SendTokenAgentTeam(
@@ -223,8 +441,22 @@ class Router:
                 | _
             ):
                 agent_team = EducationAgentTeam(on_complete)
-        self._session_manager.create_session(session_id, agent_team)
         return agent_team
 
-    def _get_agent_team_session(self, session_id: str) -> AgentTeam | None:
-        return self._session_manager.get_session(session_id)
+    async def _resume_agent_team(self, snapshot: SessionSnapshot) -> AgentTeam | None:
+        if snapshot.route == "terminate":
+            return None
+        agent_team = self._create_agent_team(
+            snapshot.session_id,
+            snapshot.route,
+            snapshot.store_transaction_info,
+            snapshot.user_chat_id,
+            snapshot.user_address,
+        )
+        await agent_team.resume(snapshot.agent_team)
+        return agent_team
+
+    async def _get_agent_team_session(self, session_id: str) -> AgentTeam | None:
+        return await self._session_manager.resolve_session(
+            session_id, self._resume_agent_team
+        )
@@ -1,11 +1,14 @@
 import asyncio
+import base64
+import uuid
 from abc import ABC, abstractmethod
-from asyncio import Future, InvalidStateError, Queue
-from collections.abc import Callable
-from typing import Any, TypedDict, NotRequired
+from asyncio import Future, InvalidStateError, Queue, Task
+from collections.abc import Callable, Coroutine
+from typing import Any, NotRequired, TypedDict
 
 import rich
 from langchain_core.runnables.config import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.errors import NodeInterrupt
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import Interrupt
@@ -36,6 +39,16 @@ class UserMessage(TypedDict):
     context: Any | None
 
 
+class AgentTeamSnapshot(TypedDict):
+    """Serializable state of an agent team waiting for a user's reply."""
+
+    thread_id: str
+    checkpoint_type: str
+    checkpoint: str
+    intent_suggestions: list[str] | None
+    expression_suggestions: list[ExpressionSuggestion] | None
+
+
 class AgentTeam(ABC):
     # TODO: might update to be a queue in case of an API reconnection
 
@@ -43,8 +56,15 @@ class AgentTeam(ABC):
         self._user_message_queue: Queue[UserMessage] = Queue()
         self._is_initialized: bool = False
         self._on_activity: Callable[[str], None] | None = None
+        self._on_response_delta: Callable[[str], None] | None = None
         self._on_complete = on_complete
         self._agent_team_response: Future[SendResponse] = Future()
+        self._conversation_task: Task | None = None
+        self._is_awaiting_user: bool = False
+        # Graph based teams set these so their conversations can be resumed
+        self._thread_id: str = str(uuid.uuid4())
+        self._app: CompiledStateGraph | None = None
+        self._config: RunnableConfig | None = None
         self.intent_suggestions: list[str] | None = None
         self.expression_suggestions: list[ExpressionSuggestion] | None = None
 
@@ -60,6 +80,8 @@ class AgentTeam(ABC):
         config: RunnableConfig,
         message: str,
         participants: list[str],
+        *,
+        resume: bool = False,
     ):
         async def stream_updates(graph_input: dict[str, Any] | Any):
             async for chunk in app.astream(graph_input, config, stream_mode="updates"):
@@ -99,45 +121,57 @@ class AgentTeam(ABC):
 
             is_pending_interrupt = True
             while is_pending_interrupt:
-                await stream_updates(graph_input)
-
-                snapshot = app.get_state(config)
-
-                """interrupt = None
-                if snapshot.tasks and snapshot.tasks[0].interrupts:
-                    interrupt = snapshot.tasks[0].interrupts[0]
-                if interrupt is not None:
-                    is_pending_interrupt = False
-                    self._send_team_response(interrupt.value)
-                    continue"""
-
-                is_run_complete = snapshot.values.get("is_run_complete")
-                response = snapshot.values["conversation"]["history"][-1]["content"]
-
-                if is_run_complete:
-                    rich.print("=== is_run_complete is True ===")
-                    is_pending_interrupt = False
-                    sign_url = snapshot.values.get("sign_url")
-                    transaction_hash = snapshot.values.get("transaction_hash")
-                    self._send_team_response(
-                        response,
-                        self.intent_suggestions,
-                        self.expression_suggestions,
-                        sign_url,
-                        transaction_hash,
+                if resume:
+                    # A resumed graph is already waiting for the user's reply, which
+                    # may have been queued before this task started
+                    resume = False
+                    user_message_future = asyncio.create_task(
+                        self._get_human_messages(wait_for_new=False)
                     )
-                    continue
-
-                user_message_future = asyncio.create_task(self._get_human_messages())
-
-                if isinstance(response, str):
-                    self._send_team_response(
-                        response,
-                        self.intent_suggestions,
-                        self.expression_suggestions,
+                else:
+                    await stream_updates(graph_input)
+
+                    snapshot = await app.aget_state(config)
+
+                    """interrupt = None
+                    if snapshot.tasks and snapshot.tasks[0].interrupts:
+                        interrupt = snapshot.tasks[0].interrupts[0]
+                    if interrupt is not None:
+                        is_pending_interrupt = False
+                        self._send_team_response(interrupt.value)
+                        continue"""
+
+                    is_run_complete = snapshot.values.get("is_run_complete")
+                    response = snapshot.values["conversation"]["history"][-1]["content"]
+
+                    if is_run_complete:
+                        rich.print("=== is_run_complete is True ===")
+                        is_pending_interrupt = False
+                        sign_url = snapshot.values.get("sign_url")
+                        transaction_hash = snapshot.values.get("transaction_hash")
+                        self._send_team_response(
+                            response,
+                            self.intent_suggestions,
+                            self.expression_suggestions,
+                            sign_url,
+                            transaction_hash,
+                        )
+                        continue
+
+                    user_message_future = asyncio.create_task(
+                        self._get_human_messages()
                     )
 
+                    if isinstance(response, str):
+                        self._send_team_response(
+                            response,
+                            self.intent_suggestions,
+                            self.expression_suggestions,
+                        )
+
+                self._is_awaiting_user = True
                 user_messages = await user_message_future
+                self._is_awaiting_user = False
 
                 node_name = "ask_user"
                 conversation = {
@@ -164,7 +198,7 @@ class AgentTeam(ABC):
                         break
 
                 rich.print("=== update state ===")
-                app.update_state(
+                await app.aupdate_state(
                     config,
                     state_values,
                     as_node=node_name,
@@ -206,13 +240,16 @@ class AgentTeam(ABC):
 
     async def _on_team_response(self) -> SendResponse:
         try:
-            await self._agent_team_response
+            # Shielded so a cancelled request doesn't cancel the team's response
+            await asyncio.shield(self._agent_team_response)
         except Exception as e:
             print(e)
             raise e
         return self._agent_team_response.result()
 
-    async def _get_human_messages(self) -> list[UserMessage]:
+    async def _get_human_messages(
+        self, *, wait_for_new: bool = True
+    ) -> list[UserMessage]:
         messages: list[UserMessage] = []
 
         async def collect_from_queue():
@@ -225,7 +262,8 @@ class AgentTeam(ABC):
             await collect_from_queue()
 
         # Wait for and collect a new message
-        await collect_from_queue()
+        if wait_for_new or not messages:
+            await collect_from_queue()
 
         return messages
 
@@ -250,9 +288,106 @@ class AgentTeam(ABC):
                 if self._on_complete is not None:
                     self._on_complete()
 
-        add_bg_task(asyncio.create_task(task()))
+        self._start_conversation_task(task())
+
+    def _start_conversation_task(self, coroutine: Coroutine[Any, Any, None]):
+        self._conversation_task = asyncio.create_task(coroutine)
+        add_bg_task(self._conversation_task)
         self._is_initialized = True
 
+    async def snapshot(self) -> AgentTeamSnapshot | None:
+        """Returns the team's state if it can be resumed elsewhere, else None.
+
+        Only graph based teams waiting for the user's reply can be resumed.
+        """
+
+        if self._app is None or self._config is None or not self._is_awaiting_user:
+            return None
+
+        checkpointer = self._app.checkpointer
+        if not isinstance(checkpointer, BaseCheckpointSaver):
+            return None
+        checkpoint_tuple = await checkpointer.aget_tuple(self._config)
+        if checkpoint_tuple is None:
+            return None
+
+        checkpoint_type, checkpoint = checkpointer.serde.dumps_typed(
+            {
+                "checkpoint": checkpoint_tuple.checkpoint,
+                "metadata": checkpoint_tuple.metadata,
+                "pending_writes": checkpoint_tuple.pending_writes or [],
+            }
+        )
+        return {
+            "thread_id": self._thread_id,
+            "checkpoint_type": checkpoint_type,
+            "checkpoint": base64.b64encode(checkpoint).decode(),
+            "intent_suggestions": self.intent_suggestions,
+            "expression_suggestions": self.expression_suggestions,
+        }
+
+    async def resume(self, snapshot: AgentTeamSnapshot):
+        """Restores a snapshot and waits for the user's reply, as the team was."""
+
+        if self._app is None or self._config is None:
+            msg = f"{type(self).__name__} conversations can't be resumed."
+            raise ValueError(msg)
+
+        checkpointer = self._app.checkpointer
+        if not isinstance(checkpointer, BaseCheckpointSaver):
+            msg = f"{type(self).__name__} has no checkpointer to resume from."
+            raise ValueError(msg)
+
+        saved = checkpointer.serde.loads_typed(
+            (snapshot["checkpoint_type"], base64.b64decode(snapshot["checkpoint"]))
+        )
+        self._thread_id = snapshot["thread_id"]
+        self._config = {"configurable": {"thread_id": self._thread_id}}
+        checkpoint_config: RunnableConfig = {
+            "configurable": {
+                "thread_id": self._thread_id,
+                "checkpoint_ns": "",
+                "checkpoint_id": saved["checkpoint"]["id"],
+            }
+        }
+        # A persistent checkpointer may still have the checkpoint, e.g. after a restart
+        if await checkpointer.aget_tuple(checkpoint_config) is None:
+            checkpoint_config = await checkpointer.aput(
+                {"configurable": {"thread_id": self._thread_id, "checkpoint_ns": ""}},
+                saved["checkpoint"],
+                saved["metadata"],
+                saved["checkpoint"]["channel_versions"],
+            )
+            writes_by_task: dict[str, list[tuple[str, Any]]] = {}
+            for task_id, channel, value in saved["pending_writes"]:
+                writes_by_task.setdefault(task_id, []).append((channel, value))
+            for task_id, writes in writes_by_task.items():
+                await checkpointer.aput_writes(checkpoint_config, writes, task_id)
+
+        self.intent_suggestions = snapshot["intent_suggestions"]
+        self.expression_suggestions = snapshot["expression_suggestions"]
+
+        app, config = self._app, self._config
+
+        async def task():
+            try:
+                await self._run_graph(app, config, "", [], resume=True)
+            finally:
+                if self._on_complete is not None:
+                    self._on_complete()
+
+        self._start_conversation_task(task())
+
+    def cancel(self):
+        """Stops the team's conversation, e.g. when its session is evicted."""
+
+        task = self._conversation_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+        if not self._agent_team_response.done():
+            msg = "The conversation ended before a response was sent."
+            self._agent_team_response.set_exception(RuntimeError(msg))
+
     def _send_activity_update(self, message: str):
         if self._on_activity is not None:
             self._on_activity(message)
@@ -260,6 +395,15 @@ class AgentTeam(ABC):
     def get_activity_updates(self, on_activity: Callable[[str], None]):
         self._on_activity = on_activity
 
+    def _send_response_delta(self, delta: str):
+        """Streams part of the response before it's sent whole, e.g. LLM tokens."""
+
+        if self._on_response_delta is not None:
+            self._on_response_delta(delta)
+
+    def get_response_deltas(self, on_response_delta: Callable[[str], None]):
+        self._on_response_delta = on_response_delta
+
     async def send(
         self,
         message: str,
@@ -1,11 +1,14 @@
 from pydantic import BaseModel
 from rich import print
 
+from brokeshire_agents.common.ai_inference.early_stop import stop_after_sections
 from brokeshire_agents.common.ai_inference.openai import (
     Temperature,
-    get_openai_response,
+    stream_openai_response,
+)
+from brokeshire_agents.common.ai_inference.parse_response import (
+    extract_tagged_sections,
 )
-from brokeshire_agents.common.ai_inference.parse_response import extract_xml_content
 from brokeshire_agents.common.conversation import ContextMessage
 
 
@@ -137,20 +140,27 @@ async def get_clarifier_response(
         {"role": "user", "content": instructions_prompt},
         *message_history,
     ]
-    response = await get_openai_response(
-        messages,
-        "gpt-4o-2024-05-13",
-        Temperature(value=0),
-        seed=42,
+    # The next node closes the expected output, so generation stops right after it
+    completion = stop_after_sections(
+        stream_openai_response(
+            messages,
+            "gpt-4o-2024-05-13",
+            Temperature(value=0),
+            seed=42,
+        ),
+        ["next_node"],
+        "clarifier",
+        tags=["analysis", "revised_utterance", "questions"],
     )
-
-    questions = extract_xml_content(response.choices[0].message.content, "questions")
-    analysis = extract_xml_content(response.choices[0].message.content, "analysis")
-    print(f"analysis: {analysis}")
-    revised_utterance = extract_xml_content(
-        response.choices[0].message.content, "revised_utterance"
+    sections = extract_tagged_sections(
+        "".join([chunk async for chunk in completion]),
+        ["analysis", "revised_utterance", "questions", "next_node"],
     )
-    next_node = extract_xml_content(response.choices[0].message.content, "next_node")
+    questions = sections.get("questions")
+    analysis = sections.get("analysis")
+    print(f"analysis: {analysis}")
+    revised_utterance = sections.get("revised_utterance")
+    next_node = sections.get("next_node")
 
     if next_node is None:
         msg = "No next agent found in clarifier response"
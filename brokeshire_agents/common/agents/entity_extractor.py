@@ -6,7 +6,10 @@ from pydantic import BaseModel
 from rich.console import Console
 
 from brokeshire_agents.common.ai_inference import openrouter
-from brokeshire_agents.common.ai_inference.parse_response import extract_xml_content
+from brokeshire_agents.common.ai_inference.early_stop import stop_after_sections
+from brokeshire_agents.common.ai_inference.parse_response import (
+    extract_tagged_sections,
+)
 from brokeshire_agents.common.conversation import ContextMessage
 
 console = Console()
@@ -192,26 +195,35 @@ async def extract_entities(
     message_history: list[ContextMessage],
 ) -> tuple[ExtractedEntities, Reasoning]:
     instructions_prompt = get_instructions_prompt(text, categories, additional_context)
-    response = await openrouter.get_openrouter_response(
-        messages=[
-            openrouter.Message(role="system", content=SYSTEM_PROMPT),
-            *[
-                openrouter.Message(role=msg["role"], content=msg["content"])
-                for msg in message_history
-                if msg["role"] in ("system", "user", "assistant")
+    # Only the output is needed, so generation stops as soon as it's complete
+    completion = stop_after_sections(
+        openrouter.stream_openrouter_response(
+            messages=[
+                openrouter.Message(role="system", content=SYSTEM_PROMPT),
+                *[
+                    openrouter.Message(role=msg["role"], content=msg["content"])
+                    for msg in message_history
+                    if msg["role"] in ("system", "user", "assistant")
+                ],
+                openrouter.Message(role="user", content=instructions_prompt),
             ],
-            openrouter.Message(role="user", content=instructions_prompt),
-        ],
-        models=["google/gemini-flash-1.5-8b"],
-        temperature=openrouter.Temperature(value=0),
-        seed=42,
+            models=["google/gemini-flash-1.5-8b"],
+            temperature=openrouter.Temperature(value=0),
+            seed=42,
+        ),
+        ["output"],
+        "entity_extractor",
+        tags=["scratchpad"],
     )
+    message_content = "".join([chunk async for chunk in completion])
+    if not message_content:
+        msg = "No content could be extracted from the OpenRouter response."
+        raise openrouter.NoContentError(msg)
 
-    message_content = openrouter.get_chat_completion_message(response)
+    sections = extract_tagged_sections(message_content, ["scratchpad", "output"])
+    scratchpad_content = sections.get("scratchpad")
 
-    scratchpad_content = extract_xml_content(message_content, "scratchpad")
-
-    output_json = extract_xml_content(message_content, "output")
+    output_json = sections.get("output")
     if output_json is None:
         msg = "No JSON content found in expected XML output"
         raise ValueError(msg)
@@ -0,0 +1,136 @@
+import random
+import time
+from collections.abc import AsyncGenerator, Callable, Collection, Iterable
+
+from rich.console import Console
+
+from brokeshire_agents.common.ai_inference.parse_response import (
+    Section,
+    TaggedStreamParser,
+)
+from brokeshire_agents.common.metrics import register_metrics
+
+# Fraction of calls streamed to the end anyway, to measure what stopping saves
+EARLY_STOP_SAMPLE_RATE = 0.05
+# Weight of the latest sample in the running estimates of what follows the stop
+ESTIMATE_SMOOTHING = 0.2
+# Rough size of a token, to estimate tokens from streamed text
+CHARS_PER_TOKEN = 4
+
+console = Console()
+
+
+class EarlyStopStats:
+    """What stopping generation early saved at a call site.
+
+    Savings can't be observed on stopped calls, so a sample of calls streams to the
+    end and the tokens and time that followed the stop tags are averaged into
+    estimates of what each stopped call saved.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.stopped = 0
+        self.sampled = 0
+        self.trailing_tokens: float | None = None
+        self.trailing_latency: float | None = None
+        self.tokens_saved = 0.0
+        self.latency_saved = 0.0
+
+    def record_sample(self, tokens: float, latency: float):
+        self.sampled += 1
+        if self.trailing_tokens is None or self.trailing_latency is None:
+            self.trailing_tokens, self.trailing_latency = tokens, latency
+            return
+
+        self.trailing_tokens += ESTIMATE_SMOOTHING * (tokens - self.trailing_tokens)
+        self.trailing_latency += ESTIMATE_SMOOTHING * (latency - self.trailing_latency)
+
+    def record_stop(self) -> tuple[float, float]:
+        """Counts a stopped call, returning its estimated tokens and time saved."""
+
+        self.stopped += 1
+        tokens, latency = self.trailing_tokens or 0.0, self.trailing_latency or 0.0
+        self.tokens_saved += tokens
+        self.latency_saved += latency
+        return tokens, latency
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "calls": self.calls,
+            "stopped": self.stopped,
+            "sampled": self.sampled,
+            "estimated_tokens_saved": self.tokens_saved,
+            "estimated_latency_saved": self.latency_saved,
+        }
+
+
+_stats: dict[str, EarlyStopStats] = {}
+
+
+def get_early_stop_stats(call_site: str) -> EarlyStopStats:
+    return _stats.setdefault(call_site, EarlyStopStats())
+
+
+async def stop_after_sections(
+    chunks: AsyncGenerator[str, None],
+    stop_tags: Collection[str],
+    call_site: str,
+    tags: Iterable[str] = (),
+    *,
+    sample_rate: float = EARLY_STOP_SAMPLE_RATE,
+    timer: Callable[[], float] = time.monotonic,
+) -> AsyncGenerator[str, None]:
+    """
+    Passes on streamed chunks until every stop tag's section closed
+
+    The upstream stream is then closed, which cancels the generation of whatever the
+    model would have written after. `tags` are the other sections of the output, so
+    mentions of the stop tags in them are ignored. The tokens and time saved are
+    estimated per call site, from the calls that are sampled to stream to the end.
+    """
+
+    stats = get_early_stop_stats(call_site)
+    stats.calls += 1
+    parser = TaggedStreamParser({*stop_tags, *tags, "think"})
+    remaining_tags = set(stop_tags)
+    # Without an estimate yet, the first calls are measured
+    is_sampled = (
+        stats.trailing_tokens is None or random.random() < sample_rate  # noqa: S311
+    )
+    stopped_at: float | None = None
+    trailing_chars = 0
+    try:
+        async for chunk in chunks:
+            if stopped_at is not None:
+                trailing_chars += len(chunk)
+                yield chunk
+                continue
+
+            for event in parser.feed(chunk):
+                if isinstance(event, Section):
+                    remaining_tags.discard(event.tag)
+            yield chunk
+            if not remaining_tags:
+                if not is_sampled:
+                    tokens, latency = stats.record_stop()
+                    console.print(
+                        f"[dim]{call_site}: stopped generation early, saving"
+                        f" ~{tokens:.0f} tokens and ~{latency:.2f}s[/dim]"
+                    )
+                    return
+                stopped_at = timer()
+    finally:
+        # Closing the stream here rather than when it's garbage collected cancels
+        # the request right away
+        await chunks.aclose()
+
+    if stopped_at is not None:
+        stats.record_sample(trailing_chars / CHARS_PER_TOKEN, timer() - stopped_at)
+
+
+def early_stop_stats() -> dict[str, dict[str, int | float]]:
+    return {call_site: stats.stats() for call_site, stats in _stats.items()}
+
+
+register_metrics("early_stop", early_stop_stats)
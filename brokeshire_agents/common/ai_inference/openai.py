@@ -1,4 +1,5 @@
 import json
+from collections.abc import AsyncIterator
 from math import exp
 from typing import Annotated, Any, Literal, TypedDict
 
@@ -61,6 +62,35 @@ async def get_openai_response(
     return chat_completion
 
 
+async def stream_openai_response(
+    messages: list[ChatCompletionMessageParam],
+    model: Model,
+    temperature: Temperature | None = None,
+    response_format: ResponseFormat | NotGiven = NOT_GIVEN,
+    *,
+    seed: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream the content of a response from the OpenAI API as it's generated.
+    """
+
+    temperature = Temperature(value=0.7) if temperature is None else temperature
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature.value,
+        seed=seed,
+        response_format=response_format,
+        stream=True,
+    )
+    # Closing the stream early, e.g. once the needed output is in, stops generation
+    async with stream:
+        async for chunk in stream:
+            if chunk.choices and (content := chunk.choices[0].delta.content):
+                yield content
+
+
 class ChatCompletionError(Exception):
     """Base exception for chat completion errors."""
 
@@ -1,8 +1,11 @@
+import json
+from collections.abc import AsyncIterator
 from typing import Annotated, Any, Literal
 
 import httpx
 from pydantic import BaseModel, Field
 
+from brokeshire_agents.common.http_client import get_http_client
 from brokeshire_agents.settings import SETTINGS
 
 Role = Literal["system", "user", "assistant"]
@@ -57,6 +60,17 @@ ResponseFormat = Literal["json_object"]
 
 SITE_URL = "https://www.brokeshireai.xyz/"
 APP_NAME = "Brokeshire AI"
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Reasoning models can take a while before and between streamed tokens
+STREAM_TIMEOUT = httpx.Timeout(5.0, read=60.0)
+
+
+def _request_headers() -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {SETTINGS.openrouter_api_key}",
+        "HTTP-Referer": SITE_URL,
+        "X-Title": APP_NAME,
+    }
 
 
 async def get_openrouter_response(
@@ -78,40 +92,83 @@ async def get_openrouter_response(
     """
     temperature = Temperature(value=0.7) if temperature is None else temperature
 
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        response = await client.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {SETTINGS.openrouter_api_key}",
-                "HTTP-Referer": SITE_URL,
-                "X-Title": APP_NAME,
-            },
-            json={
-                "models": models,
-                "messages": [message.model_dump() for message in messages],
-                "temperature": temperature.value,
-                "seed": seed,
-                "response_format": (
-                    None if response_format is None else {"type": response_format}
-                ),
-                "logprobs": True,
-                "top_logprobs": top_logprobs,
-            },
+    response = await get_http_client(OPENROUTER_URL).post(
+        url=OPENROUTER_URL,
+        headers=_request_headers(),
+        json={
+            "models": models,
+            "messages": [message.model_dump() for message in messages],
+            "temperature": temperature.value,
+            "seed": seed,
+            "response_format": (
+                None if response_format is None else {"type": response_format}
+            ),
+            "logprobs": True,
+            "top_logprobs": top_logprobs,
+        },
+        timeout=5.0,
+    )
+
+    # Raise for HTTP status errors
+    response.raise_for_status()
+
+    # Parse the response JSON
+    data = response.json()
+
+    # Check if the response contains an error
+    if "error" in data:
+        raise ValueError(
+            f"OpenRouter API error: {data['error'].get('message', 'Unknown error')}"
         )
 
-        # Raise for HTTP status errors
-        response.raise_for_status()
+    return OpenRouterResponse.model_validate(data)
+
 
-        # Parse the response JSON
-        data = response.json()
+async def stream_openrouter_response(
+    messages: list[Message],
+    models: list[Model],
+    temperature: Temperature | None = None,
+    *,
+    seed: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream the content of a response from the OpenRouter API as it's generated.
 
-        # Check if the response contains an error
-        if "error" in data:
-            raise ValueError(
-                f"OpenRouter API error: {data['error'].get('message', 'Unknown error')}"
-            )
+    Raises:
+        httpx.HTTPError: If the HTTP request fails
+        ValueError: If the API returns an error response
+    """
+    temperature = Temperature(value=0.7) if temperature is None else temperature
 
-    return OpenRouterResponse.model_validate(data)
+    async with get_http_client(OPENROUTER_URL).stream(
+        "POST",
+        OPENROUTER_URL,
+        headers=_request_headers(),
+        json={
+            "models": models,
+            "messages": [message.model_dump() for message in messages],
+            "temperature": temperature.value,
+            "seed": seed,
+            "stream": True,
+        },
+        timeout=STREAM_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            # Other lines are blank separators or keep-alive comments
+            if not line.startswith("data: "):
+                continue
+            data = line.removeprefix("data: ")
+            if data == "[DONE]":
+                break
+
+            chunk = json.loads(data)
+            if "error" in chunk:
+                msg = f"OpenRouter API error: {chunk['error'].get('message', 'Unknown error')}"
+                raise ValueError(msg)
+            for choice in chunk.get("choices", []):
+                if content := choice.get("delta", {}).get("content"):
+                    yield content
 
 
 class NoChoicesError(Exception):
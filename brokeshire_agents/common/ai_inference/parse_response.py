@@ -1,51 +1,262 @@
 import re
+from collections.abc import AsyncIterable, Callable, Iterable
+from typing import NamedTuple
 
-from defusedxml import ElementTree
 from rich.console import Console
 
 console = Console()
 
+TAG_PATTERN = re.compile(r"</?[^>]+>\s*")
+
+
+class SectionDelta(NamedTuple):
+    """Content of a tagged section as it arrives."""
+
+    tag: str
+    text: str
+
+
+class Section(NamedTuple):
+    """A tagged section, or text between sections when the tag is None."""
+
+    tag: str | None
+    content: str
+    # False when the output ended before the closing tag
+    closed: bool = True
+
+
+ParserEvent = SectionDelta | Section
+
+
+class TaggedStreamParser:
+    """Single pass parser of LLM output made of tagged sections, fed in chunks.
+
+    Only the given tags are recognized, anything else is text. Sections don't nest:
+    inside one only its closing tag is recognized, so e.g. a thinking section can
+    mention other tags. Each chunk is scanned once, holding back a possible tag
+    split across chunks until the next one. `feed` returns the content of open
+    sections as deltas and each section once it closes, and `close` ends an
+    unterminated section with what it has.
+    """
+
+    def __init__(self, tags: Iterable[str]):
+        self._opening_tags = {f"<{tag}>": tag for tag in tags}
+        self._max_tag_length = max(
+            (len(opening_tag) + 1 for opening_tag in self._opening_tags), default=0
+        )
+        self._buffer = ""
+        self._tag: str | None = None
+        self._content: list[str] = []
+        self._delta: list[str] = []
+        self._is_closed = False
+        self.segments: list[Section] = []
+        self._sections: dict[str, Section] = {}
+
+    def section(self, tag: str) -> Section | None:
+        """The first section with the tag, once it ended."""
+
+        return self._sections.get(tag)
+
+    def feed(self, chunk: str) -> list[ParserEvent]:
+        if self._is_closed:
+            msg = "Can't feed a closed parser."
+            raise ValueError(msg)
+
+        events: list[ParserEvent] = []
+        buffer = self._buffer + chunk
+        position = 0
+        text_start = 0
+        while (start := buffer.find("<", position)) != -1:
+            candidates = (
+                self._opening_tags if self._tag is None else {f"</{self._tag}>": None}
+            )
+            end = buffer.find(">", start, start + self._max_tag_length)
+            if end == -1:
+                rest = buffer[start:]
+                if len(rest) < self._max_tag_length and any(
+                    candidate.startswith(rest) for candidate in candidates
+                ):
+                    # Possibly a tag split across chunks
+                    self._text(buffer[text_start:start])
+                    self._buffer = rest
+                    self._flush_delta(events)
+                    return events
+                position = start + 1
+                continue
+
+            candidate = buffer[start : end + 1]
+            if candidate not in candidates:
+                position = start + 1
+                continue
+
+            self._text(buffer[text_start:start])
+            position = text_start = end + 1
+            self._end_segment(events)
+            self._tag = candidates[candidate]
+
+        self._text(buffer[text_start:])
+        self._buffer = ""
+        self._flush_delta(events)
+        return events
+
+    def close(self) -> list[ParserEvent]:
+        """Ends the output, with any open section left unterminated."""
+
+        events: list[ParserEvent] = []
+        if self._is_closed:
+            return events
+
+        self._text(self._buffer)
+        self._buffer = ""
+        self._end_segment(events, closed=False)
+        self._is_closed = True
+        return events
+
+    def _text(self, text: str):
+        if text:
+            self._content.append(text)
+            if self._tag is not None:
+                self._delta.append(text)
+
+    def _flush_delta(self, events: list[ParserEvent]):
+        if self._tag is not None and self._delta:
+            events.append(SectionDelta(self._tag, "".join(self._delta)))
+        self._delta = []
+
+    def _end_segment(self, events: list[ParserEvent], *, closed: bool = True):
+        self._flush_delta(events)
+        tag = self._tag
+        if tag is None:
+            if self._content:
+                self.segments.append(Section(None, "".join(self._content)))
+        else:
+            section = Section(tag, "".join(self._content), closed)
+            self.segments.append(section)
+            self._sections.setdefault(tag, section)
+            events.append(section)
+        self._content = []
+
+
+def parse_tagged(text: str, tags: Iterable[str]) -> TaggedStreamParser:
+    """Parses a complete output, returning the closed parser."""
+
+    parser = TaggedStreamParser(tags)
+    parser.feed(text)
+    parser.close()
+    return parser
+
 
 def parse_response(response: str, thinking_tag: str, response_tag: str):
-    # Extract thinking content before removing it
-    thinking_match = re.search(
-        fr"<{thinking_tag}>(.*?)</{thinking_tag}>", response, re.DOTALL
-    )
+    # A <think> mentioning the response tag must not be taken for the response
+    parser = parse_tagged(response, {thinking_tag, response_tag, "think"})
+
+    thinking = parser.section(thinking_tag)
+    response_section = parser.section(response_tag)
+    if response_section is None and thinking is not None and not thinking.closed:
+        # An unterminated thinking section swallowed the rest of the output, which
+        # may still hold the response
+        start = thinking.content.find(f"<{response_tag}>")
+        if start != -1:
+            response_section = parse_tagged(
+                thinking.content[start:], [response_tag]
+            ).section(response_tag)
+            thinking = Section(thinking_tag, thinking.content[:start], closed=False)
+
+    # Extract thinking content before leaving it out
     thinking_content = None
-    if thinking_match:
-        thinking_content = thinking_match.group(1).strip()
+    if thinking is not None:
+        thinking_content = thinking.content.strip()
         console.print(f"[yellow]Thinking content: {thinking_content}[/yellow]")
 
-    # Remove response planning sections and any following whitespace up to the next tag
-    response = re.sub(
-        fr"<{thinking_tag}>.*?</{thinking_tag}>\s*",
-        "",
-        response,
-        flags=re.DOTALL,
-    )
-
     # Then try to extract content from response tags
-    response_match = re.search(
-        f"<{response_tag}>(.*?)</{response_tag}>", response, re.DOTALL
-    )
-    if response_match:
-        sanitized = response_match.group(1).strip()
+    if response_section is not None:
+        sanitized = response_section.content.strip()
         console.print(f"[green]Extracted response: {sanitized}[/green]")
     else:
         # If no tags found, remove any remaining tags and normalize whitespace
-        sanitized = re.sub(r"</?[^>]+>\s*", "", response).strip()
+        text = "".join(
+            segment.content
+            for segment in parser.segments
+            if segment.tag != thinking_tag
+        )
+        sanitized = TAG_PATTERN.sub("", text).strip()
         console.print(f"[green]Sanitized response: {sanitized}[/green]")
 
     return (sanitized, thinking_content) if thinking_content else (sanitized,)
 
 
+def extract_tagged_sections(text: str, tags: Iterable[str]) -> dict[str, str]:
+    """Stripped content of the first section of each tag, for those not empty."""
+
+    tags = set(tags)
+    parser = parse_tagged(text, tags)
+    return {
+        tag: section.content.strip()
+        for tag in tags
+        if (section := parser.section(tag)) is not None and section.content
+    }
+
+
 def extract_xml_content(xml_string: str, tag_name: str) -> str | None:
-    # Wrap the input in a root element
-    wrapped_xml = f"<root>{xml_string}</root>"
-    root = ElementTree.fromstring(wrapped_xml)
-    element = root.find(f".//{tag_name}")
-    return (
-        element.text.strip()
-        if element is not None and element.text is not None
-        else None
-    )
+    return extract_tagged_sections(xml_string, [tag_name]).get(tag_name)
+
+
+class ResponseStreamFilter:
+    """Incrementally extracts the content of a response tag from streamed chunks.
+
+    Text outside the tag is dropped, including thinking sections that may mention
+    the tag, whether under the thinking tag or <think>. Whitespace that may end the
+    response is held back until the following chunks tell whether it does.
+    """
+
+    def __init__(self, response_tag: str, thinking_tag: str = "think"):
+        self._response_tag = response_tag
+        self._parser = TaggedStreamParser({thinking_tag, response_tag, "think"})
+        self._whitespace = ""
+        self._started = False
+        self._is_done = False
+
+    def feed(self, chunk: str) -> str:
+        """Returns the response content found so far in the new chunk."""
+
+        if self._is_done:
+            return ""
+
+        content = ""
+        for event in self._parser.feed(chunk):
+            if event.tag != self._response_tag:
+                continue
+            if isinstance(event, SectionDelta):
+                content += event.text
+            else:
+                # Only the first response section is streamed
+                self._is_done = True
+                return self._emit(content, is_last=True)
+        return self._emit(content)
+
+    def _emit(self, content: str, *, is_last: bool = False) -> str:
+        if not self._started:
+            content = content.lstrip()
+            self._started = bool(content)
+        content = self._whitespace + content
+        stripped = content.rstrip()
+        self._whitespace = "" if is_last else content[len(stripped) :]
+        return stripped
+
+
+async def stream_response(
+    chunks: AsyncIterable[str],
+    response_tag: str,
+    on_delta: Callable[[str], None] | None,
+    thinking_tag: str = "think",
+) -> str:
+    """Forwards the response tag's content as it streams and returns the full text."""
+
+    response_filter = ResponseStreamFilter(response_tag, thinking_tag)
+    completion = []
+    async for chunk in chunks:
+        completion.append(chunk)
+        delta = response_filter.feed(chunk)
+        if delta and on_delta is not None:
+            on_delta(delta)
+    return "".join(completion)
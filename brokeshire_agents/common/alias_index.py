@@ -0,0 +1,210 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from rapidfuzz import utils
+from rich.console import Console
+
+from brokeshire_agents.common.single_flight import SingleFlight
+
+ALIAS_INDEX_TTL = 60 * 10
+MAX_LEARNED_ALIASES = 10_000
+
+console = Console()
+
+
+def normalize_alias(alias: str) -> str:
+    return utils.default_process(alias)
+
+
+def _key_values(entity: dict[str, Any], key: str) -> list[str]:
+    value = entity.get(key)
+    if value is None:
+        return []
+    values = value if isinstance(value, list) else [value]
+    return [normalized for v in values if (normalized := normalize_alias(str(v)))]
+
+
+class AliasIndex:
+    """
+    Exact lookup of entities by any of their aliases
+
+    The values of `keys` are aliases of their entity, and so is every member of an
+    alias group that contains one of those values. Aliases shared by entities are
+    ambiguous and left out, so they fall through to fuzzy and LLM linking. An
+    alias that is the key value of one entity and only a group member of others
+    resolves to the former.
+
+    Learned aliases map to entity ids, so they survive the index being rebuilt.
+    """
+
+    def __init__(
+        self,
+        entities: list[dict[str, Any]],
+        keys: list[str],
+        id_key: str,
+        alias_groups: Iterable[set[str]] = (),
+        learned_aliases: OrderedDict[str, str] | None = None,
+    ):
+        self.entities = entities
+        self._id_key = id_key
+        self._by_id = {str(entity[id_key]): entity for entity in entities}
+        self._learned_aliases = (
+            learned_aliases if learned_aliases is not None else OrderedDict()
+        )
+
+        normalized_groups = [
+            {normalize_alias(a) for a in group} for group in alias_groups
+        ]
+        key_aliases: dict[str, set[str]] = {}
+        group_aliases: dict[str, set[str]] = {}
+        for entity in entities:
+            entity_id = str(entity[id_key])
+            values = {v for key in keys for v in _key_values(entity, key)}
+            for value in values:
+                key_aliases.setdefault(value, set()).add(entity_id)
+            for group in normalized_groups:
+                if values & group:
+                    for alias in group:
+                        group_aliases.setdefault(alias, set()).add(entity_id)
+
+        self._by_alias: dict[str, dict[str, Any]] = {}
+        for aliases in (group_aliases, key_aliases):
+            for alias, entity_ids in aliases.items():
+                if len(entity_ids) == 1:
+                    self._by_alias[alias] = self._by_id[next(iter(entity_ids))]
+                elif aliases is key_aliases:
+                    self._by_alias.pop(alias, None)
+
+    def __len__(self) -> int:
+        return len(self._by_alias)
+
+    def resolve(self, alias: str) -> dict[str, Any] | None:
+        normalized = normalize_alias(alias)
+        entity = self._by_alias.get(normalized)
+        if entity is not None:
+            return entity
+        entity_id = self._learned_aliases.get(normalized)
+        if entity_id is None:
+            return None
+        self._learned_aliases.move_to_end(normalized)
+        return self._by_id.get(entity_id)
+
+    def learn(self, alias: str, entity: dict[str, Any], max_aliases: int):
+        normalized = normalize_alias(alias)
+        if not normalized or normalized in self._by_alias:
+            return
+        self._learned_aliases[normalized] = str(entity[self._id_key])
+        self._learned_aliases.move_to_end(normalized)
+        while len(self._learned_aliases) > max_aliases:
+            self._learned_aliases.popitem(last=False)
+
+
+class AliasCatalog:
+    """
+    Process-wide alias index of a list of entities, refreshed after a time to live
+
+    Like `TokenCatalog`, concurrent requests share a single refresh, and if a
+    refresh fails the stale index is served until the next attempt. Aliases
+    learned from successful links are kept across refreshes.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[list[dict[str, Any]]]],
+        keys: list[str],
+        id_key: str,
+        alias_groups: Iterable[set[str]] = (),
+        ttl: float = ALIAS_INDEX_TTL,
+        max_learned_aliases: int = MAX_LEARNED_ALIASES,
+    ):
+        self._fetch = fetch
+        self._keys = keys
+        self._id_key = id_key
+        self._alias_groups = list(alias_groups)
+        self._ttl = ttl
+        self._max_learned_aliases = max_learned_aliases
+        self._learned_aliases: OrderedDict[str, str] = OrderedDict()
+        self._index: AliasIndex | None = None
+        self._fetched_at = 0.0
+        self._refreshes: SingleFlight[None, AliasIndex] = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    async def get(self) -> AliasIndex:
+        index = self._index
+        if index is not None and time.monotonic() - self._fetched_at < self._ttl:
+            return index
+
+        try:
+            return await self.refresh()
+        except Exception as e:
+            if index is None:
+                raise
+            console.print(f"[red]Serving stale alias index: {e}[/red]")
+            return index
+
+    async def refresh(self) -> AliasIndex:
+        """Rebuilds the index, joining a rebuild that is already running."""
+
+        return await self._refreshes.do(None, self._refresh)
+
+    async def _refresh(self) -> AliasIndex:
+        self.refreshes += 1
+        try:
+            entities = await self._fetch()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        self._index = AliasIndex(
+            entities,
+            self._keys,
+            self._id_key,
+            self._alias_groups,
+            self._learned_aliases,
+        )
+        self._fetched_at = time.monotonic()
+        return self._index
+
+    async def refresh_forever(self, interval: float | None = None):
+        """Preloads the index and keeps it fresh, so requests never wait on it."""
+
+        interval = self._ttl / 2 if interval is None else interval
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                console.print(f"[red]Failed to refresh alias index: {e}[/red]")
+            await asyncio.sleep(interval)
+
+    async def resolve(self, alias: str) -> dict[str, Any] | None:
+        entity = (await self.get()).resolve(alias)
+        if entity is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entity
+
+    async def entities(self) -> list[dict[str, Any]]:
+        return (await self.get()).entities
+
+    def learn(self, alias: str, entity: dict[str, Any]):
+        """Remembers that an alias links to an entity, e.g. after an LLM link."""
+
+        if self._index is not None:
+            self._index.learn(alias, entity, self._max_learned_aliases)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "aliases": len(self._index) if self._index is not None else 0,
+            "learned_aliases": len(self._learned_aliases),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "coalesced_refreshes": self._refreshes.stats()["coalesced"],
+        }
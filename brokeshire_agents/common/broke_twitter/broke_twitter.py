@@ -6,13 +6,13 @@ from rich.console import Console
 from brokeshire_agents.common.agent_team import AgentTeam
 from brokeshire_agents.common.ai_inference import openrouter
 from brokeshire_agents.common.ai_inference.parse_response import parse_response
-from brokeshire_agents.token_tech_analysis.curate_tokens import (
-    get_trending_tokens,
-)
 from brokeshire_agents.token_tech_analysis.token_ta_agent_team import (
     convert_metrics_data_to_token_data,
     format_token_data,
 )
+from brokeshire_agents.token_tech_analysis.trending_snapshot import (
+    get_trending_token_metrics,
+)
 
 
 class BrokeTwitterAgentTeam(AgentTeam):
@@ -115,7 +115,7 @@ After completing your thought process, provide your response in <response> tags,
 
 
 async def broke_twitter() -> str:
-    trending_tokens = await get_trending_tokens()
+    trending_tokens = await get_trending_token_metrics()
 
     curated_tokens = []
     for pool in trending_tokens:
@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import Any
+
+import numpy as np
+from rapidfuzz import utils
+
+MAX_LLM_CANDIDATES = 25
+
+# Bonuses added to the trigram similarity (0 to 1) of an entity
+EXACT_MATCH_BONUS = 2.0
+ALIAS_MATCH_BONUS = 1.5
+PHONETIC_MATCH_BONUS = 0.5
+PREFIX_MATCH_BONUS = 0.3
+
+# Values are indexed by their prefixes of these lengths
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 3
+
+# Groups of names users use interchangeably for the same asset
+ALIAS_GROUPS = [
+    {"eth", "ether", "ethereum", "weth", "wrapped eth", "wrapped ether"},
+    {"btc", "bitcoin", "wbtc", "btcb", "wrapped btc", "wrapped bitcoin"},
+    {"usd", "usdc", "usdt", "usd coin", "tether", "tether usd", "dai"},
+    {"bnb", "wbnb", "binance coin"},
+    {"avax", "wavax", "avalanche"},
+    {"matic", "pol", "wmatic", "polygon"},
+    {"sol", "wsol", "solana"},
+    {"arb", "arbitrum"},
+    {"op", "optimism"},
+    {"doge", "dogecoin"},
+]
+ALIASES: dict[str, set[str]] = {
+    alias: group for group in ALIAS_GROUPS for alias in group
+}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def phonetic_key(value: str) -> str:
+    """Soundex code of a value, ignoring spaces, digits and punctuation."""
+
+    letters = [c for c in value.lower() if c.isalpha()]
+    if not letters:
+        return ""
+
+    key = letters[0]
+    previous_code = SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        code = SOUNDEX_CODES.get(letter, "")
+        if code and code != previous_code:
+            key += code
+        if letter not in "hw":
+            previous_code = code
+    return key[:4].ljust(4, "0")
+
+
+def trigrams(value: str) -> set[str]:
+    padded = f"  {value} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class CandidateIndex:
+    """
+    Bounded candidate generation for entity linking
+
+    Entities are indexed by the trigrams, prefixes, phonetic keys and exact values
+    of the given keys. Looking up a named entity only touches entities that share
+    one of those with it, and at most `limit` candidates are returned, so the LLM
+    prompt stays small however large the entity list is.
+    """
+
+    def __init__(self, entity_list: list[dict[str, Any]], keys: list[str]):
+        self.size = len(entity_list)
+        self._exact: defaultdict[str, set[int]] = defaultdict(set)
+        self._prefixes: defaultdict[str, set[int]] = defaultdict(set)
+        self._phonetic: defaultdict[str, set[int]] = defaultdict(set)
+        self._values: list[list[str]] = []
+        postings: defaultdict[str, set[int]] = defaultdict(set)
+        trigram_counts = np.zeros(self.size, dtype=np.float32)
+
+        for i, entity in enumerate(entity_list):
+            entity_trigrams: set[str] = set()
+            values = [utils.default_process(str(entity.get(key, ""))) for key in keys]
+            self._values.append([value for value in values if value])
+            for value in self._values[i]:
+                self._exact[value].add(i)
+                for length in range(MIN_PREFIX_LENGTH, MAX_PREFIX_LENGTH + 1):
+                    if len(value) >= length:
+                        self._prefixes[value[:length]].add(i)
+                self._phonetic[phonetic_key(value)].add(i)
+                entity_trigrams |= trigrams(value)
+            for trigram in entity_trigrams:
+                postings[trigram].add(i)
+            trigram_counts[i] = len(entity_trigrams)
+
+        self._postings = {
+            trigram: np.fromiter(indices, dtype=np.int64, count=len(indices))
+            for trigram, indices in postings.items()
+        }
+        self._trigram_counts = trigram_counts
+
+    def scores(self, named_entity: str) -> np.ndarray:
+        """Return a relevance score for every entity, 0 for unrelated ones."""
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        query = utils.default_process(named_entity)
+        if not query or self.size == 0:
+            return scores
+
+        # Jaccard similarity of the trigram sets
+        query_trigrams = trigrams(query)
+        matched = [self._postings[t] for t in query_trigrams if t in self._postings]
+        if matched:
+            overlap = np.bincount(np.concatenate(matched), minlength=self.size)
+            union = len(query_trigrams) + self._trigram_counts - overlap
+            np.divide(overlap, union, out=scores, where=union > 0)
+
+        def add_bonus(indices: set[int], bonus: float):
+            if indices:
+                scores[list(indices)] += bonus
+
+        add_bonus(self._exact.get(query, set()), EXACT_MATCH_BONUS)
+        for alias in ALIASES.get(query, set()) - {query}:
+            add_bonus(self._exact.get(alias, set()), ALIAS_MATCH_BONUS)
+        add_bonus(self._phonetic.get(phonetic_key(query), set()), PHONETIC_MATCH_BONUS)
+        add_bonus(
+            {
+                i
+                for i in self._prefixes.get(query[:MAX_PREFIX_LENGTH], set())
+                if len(query) <= MAX_PREFIX_LENGTH
+                or any(value.startswith(query) for value in self._values[i])
+            },
+            PREFIX_MATCH_BONUS,
+        )
+        return scores
+
+    def candidates(
+        self, named_entity: str, limit: int = MAX_LLM_CANDIDATES
+    ) -> list[int]:
+        """Return the indices of the most relevant entities, best first."""
+
+        scores = self.scores(named_entity)
+        related = np.flatnonzero(scores > 0)
+        if len(related) > limit:
+            kth_score = np.partition(scores[related], -limit)[-limit]
+            related = related[scores[related] >= kth_score]
+        ranked = related[np.argsort(-scores[related], kind="stable")]
+        return ranked[:limit].tolist()
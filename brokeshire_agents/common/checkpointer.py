@@ -0,0 +1,602 @@
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+from brokeshire_agents.settings import SETTINGS
+
+SQLITE_URL_PREFIX = "sqlite:///"
+
+# Channels whose values only grow between steps, so they are stored as deltas
+DELTA_CHANNELS = frozenset({"conversation"})
+# A full copy of a delta channel is stored at least every this many versions
+KEYFRAME_INTERVAL = 16
+# Old checkpoints are pruned once a thread has this many more than it keeps
+PRUNE_SLACK = 10
+# Expired threads are deleted once every this many checkpoints
+EXPIRY_INTERVAL = 1000
+
+DELTA_MARKER = "__delta__"
+EMPTY_TYPE = "empty"
+# Value of channels that were emptied, as opposed to channels set to None
+EMPTY = object()
+
+
+def diff_value(base: Any, value: Any) -> dict[str, Any]:
+    """Returns a delta that turns `base` into `value`.
+
+    Lists that extend their base are stored as the appended items and dicts as
+    deltas of their items, anything else is replaced outright.
+    """
+
+    if isinstance(base, list) and isinstance(value, list):
+        if value[: len(base)] == base:
+            return {DELTA_MARKER: "append", "items": value[len(base) :]}
+    elif isinstance(base, dict) and isinstance(value, dict):
+        return {
+            DELTA_MARKER: "merge",
+            "items": {
+                key: (
+                    diff_value(base[key], item)
+                    if key in base
+                    else {DELTA_MARKER: "replace", "value": item}
+                )
+                for key, item in value.items()
+            },
+            "removed": [key for key in base if key not in value],
+        }
+    return {DELTA_MARKER: "replace", "value": value}
+
+
+def apply_delta(base: Any, delta: dict[str, Any]) -> Any:
+    match delta[DELTA_MARKER]:
+        case "append":
+            return [*base, *delta["items"]]
+        case "merge":
+            value = {
+                key: item for key, item in base.items() if key not in delta["removed"]
+            }
+            for key, item_delta in delta["items"].items():
+                value[key] = apply_delta(value.get(key), item_delta)
+            return value
+        case _:
+            return delta["value"]
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer persisted to a SQLite database in WAL mode.
+
+    Channel values are stored apart from checkpoints and only written when their
+    version changes. Values of `DELTA_CHANNELS` are stored as deltas on their
+    previous version, with a full keyframe every `KEYFRAME_INTERVAL` versions so
+    reads never replay long chains.
+
+    Only the latest `max_checkpoints` of a thread are kept, along with the values
+    they reference, and threads without a new checkpoint for `ttl` seconds are
+    deleted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_checkpoints: int = SETTINGS.checkpoint_retention,
+        ttl: float = SETTINGS.checkpoint_ttl,
+    ):
+        super().__init__()
+        self._max_checkpoints = max_checkpoints
+        self._ttl = ttl
+        self._puts_since_expiry = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA busy_timeout=5000;
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE INDEX IF NOT EXISTS checkpoints_updated_at
+                ON checkpoints (updated_at);
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                base_version TEXT,
+                chain_length INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = """SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint,
+            metadata_type, metadata FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?"""
+        parameters: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            parameters += (checkpoint_id,)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        with self._lock:
+            row = self._connection.execute(query, parameters).fetchone()
+            if row is None:
+                return None
+            return self._load_checkpoint_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,  # noqa: A002
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = """SELECT thread_id, checkpoint_ns, checkpoint_id,
+            parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+            FROM checkpoints WHERE 1 = 1"""
+        parameters: tuple = ()
+        if config is not None:
+            query += " AND thread_id = ?"
+            parameters += (config["configurable"]["thread_id"],)
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                query += " AND checkpoint_ns = ?"
+                parameters += (checkpoint_ns,)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                parameters += (checkpoint_id,)
+        if before is not None and (before_checkpoint_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            parameters += (before_checkpoint_id,)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[4], row[5]))
+            if filter and not all(
+                metadata.get(key) == value for key, value in filter.items()
+            ):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                checkpoint_tuple = self._load_checkpoint_tuple(
+                    thread_id, checkpoint_ns, tuple(row)
+                )
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        saved_checkpoint = {
+            key: value
+            for key, value in checkpoint.items()
+            if key not in ("channel_values", "pending_sends")
+        }
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(saved_checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+
+        with self._lock, self._connection:
+            for channel, version in new_versions.items():
+                self._put_blob(
+                    thread_id,
+                    checkpoint_ns,
+                    channel,
+                    str(version),
+                    checkpoint["channel_values"].get(channel, EMPTY),
+                )
+            self._connection.execute(
+                """INSERT OR REPLACE INTO checkpoints VALUES
+                (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                    time.time(),
+                ),
+            )
+            self._prune(thread_id, checkpoint_ns)
+
+        self._puts_since_expiry += 1
+        if self._puts_since_expiry >= EXPIRY_INTERVAL:
+            self._puts_since_expiry = 0
+            self.delete_expired(time.time() - self._ttl)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    # Like MemorySaver, the async methods run the sync ones on the default executor
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.get_tuple, config
+        )
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,  # noqa: A002
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit)),
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+    ) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.put_writes, config, writes, task_id
+        )
+
+    def get_next_version(self, current: str | None, channel: ChannelProtocol) -> str:
+        # Same format as MemorySaver, so checkpoints can move between them
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"  # noqa: S311
+
+    def delete_thread(self, thread_id: str):
+        with self._lock, self._connection:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._connection.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?",  # noqa: S608
+                    (thread_id,),
+                )
+
+    def delete_expired(self, updated_before: float) -> int:
+        """Deletes threads without a new checkpoint since the given time."""
+
+        with self._lock:
+            thread_ids = [
+                thread_id
+                for (thread_id,) in self._connection.execute(
+                    """SELECT thread_id FROM checkpoints GROUP BY thread_id
+                    HAVING MAX(updated_at) < ?""",
+                    (updated_before,),
+                )
+            ]
+        for thread_id in thread_ids:
+            self.delete_thread(thread_id)
+        return len(thread_ids)
+
+    def _put_blob(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: str,
+        value: Any,
+    ):
+        base_version = None
+        chain_length = 0
+        if value is EMPTY:
+            value_type, blob = EMPTY_TYPE, None
+        else:
+            if channel in DELTA_CHANNELS:
+                base = self._connection.execute(
+                    """SELECT version, chain_length FROM blobs
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ?
+                    AND type != ? ORDER BY version DESC LIMIT 1""",
+                    (thread_id, checkpoint_ns, channel, EMPTY_TYPE),
+                ).fetchone()
+                if base is not None and base[1] + 1 < KEYFRAME_INTERVAL:
+                    base_value = self._load_blob(
+                        thread_id, checkpoint_ns, channel, base[0]
+                    )
+                    delta = diff_value(base_value, value)
+                    if delta[DELTA_MARKER] != "replace":
+                        base_version, chain_length = base[0], base[1] + 1
+                        value = delta
+            value_type, blob = self.serde.dumps_typed(value)
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                thread_id,
+                checkpoint_ns,
+                channel,
+                version,
+                value_type,
+                blob,
+                base_version,
+                chain_length,
+            ),
+        )
+
+    def _load_blob(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: str
+    ) -> Any:
+        """Loads a channel value, replaying deltas from the last keyframe."""
+
+        deltas = []
+        while True:
+            row = self._connection.execute(
+                """SELECT type, blob, base_version FROM blobs WHERE thread_id = ?
+                AND checkpoint_ns = ? AND channel = ? AND version = ?""",
+                (thread_id, checkpoint_ns, channel, version),
+            ).fetchone()
+            if row is None:
+                msg = f"Missing value of channel {channel} at version {version}"
+                raise KeyError(msg)
+            value_type, blob, base_version = row
+            if value_type == EMPTY_TYPE:
+                return EMPTY
+            value = self.serde.loads_typed((value_type, blob))
+            if base_version is None:
+                break
+            deltas.append(value)
+            version = base_version
+
+        for delta in reversed(deltas):
+            value = apply_delta(value, delta)
+        return value
+
+    def _load_checkpoint_tuple(
+        self, thread_id: str, checkpoint_ns: str, row: tuple
+    ) -> CheckpointTuple:
+        (
+            checkpoint_id,
+            parent_checkpoint_id,
+            checkpoint_type,
+            checkpoint_blob,
+            metadata_type,
+            metadata_blob,
+        ) = row
+        checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            value = self._load_blob(thread_id, checkpoint_ns, channel, str(version))
+            if value is not EMPTY:
+                channel_values[channel] = value
+
+        pending_sends = []
+        if parent_checkpoint_id:
+            pending_sends = [
+                self.serde.loads_typed((value_type, value))
+                for value_type, value in self._connection.execute(
+                    """SELECT type, value FROM writes WHERE thread_id = ?
+                    AND checkpoint_ns = ? AND checkpoint_id = ? AND channel = ?
+                    ORDER BY task_id, idx""",
+                    (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+                )
+            ]
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((value_type, value)))
+            for task_id, channel, value_type, value in self._connection.execute(
+                """SELECT task_id, channel, type, value FROM writes
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                ORDER BY task_id, idx""",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        ]
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": channel_values,
+                "pending_sends": pending_sends,
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Deletes old checkpoints of a thread and values no longer referenced."""
+
+        rows = self._connection.execute(
+            """SELECT checkpoint_id, type, checkpoint FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?
+            ORDER BY checkpoint_id DESC""",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        if len(rows) <= self._max_checkpoints + PRUNE_SLACK:
+            return
+
+        kept, pruned = rows[: self._max_checkpoints], rows[self._max_checkpoints :]
+        referenced = {
+            (channel, str(version))
+            for _, checkpoint_type, checkpoint_blob in kept
+            for channel, version in self.serde.loads_typed(
+                (checkpoint_type, checkpoint_blob)
+            )["channel_versions"].items()
+        }
+        # Values referenced by kept checkpoints need the bases of their deltas too
+        base_versions = {
+            (channel, version): base_version
+            for channel, version, base_version in self._connection.execute(
+                """SELECT channel, version, base_version FROM blobs
+                WHERE thread_id = ? AND checkpoint_ns = ?""",
+                (thread_id, checkpoint_ns),
+            )
+        }
+        needed = set()
+        for channel, version in referenced:
+            key: tuple[str, str | None] = (channel, version)
+            while key[1] is not None and key not in needed:
+                needed.add(key)
+                key = (channel, base_versions.get(key))
+
+        self._connection.executemany(
+            """DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?
+            AND channel = ? AND version = ?""",
+            [
+                (thread_id, checkpoint_ns, channel, version)
+                for channel, version in base_versions.keys() - needed
+            ],
+        )
+        for table in ("checkpoints", "writes"):
+            self._connection.executemany(
+                f"""DELETE FROM {table} WHERE thread_id = ?
+                AND checkpoint_ns = ? AND checkpoint_id = ?""",  # noqa: S608
+                [
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                    for checkpoint_id, *_ in pruned
+                ],
+            )
+
+
+_checkpointer: SqliteCheckpointSaver | None = None
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Returns the checkpointer agent team graphs are compiled with.
+
+    `CHECKPOINTER_URL` selects a SQLite database shared by every team, which keeps
+    conversations across restarts, or `memory://` for a separate in-memory
+    checkpointer per team.
+    """
+
+    global _checkpointer  # noqa: PLW0603
+    url = SETTINGS.checkpointer_url
+    if url == "memory://":
+        return MemorySaver()
+    if not url.startswith(SQLITE_URL_PREFIX):
+        msg = f"Unsupported checkpointer URL: {url}"
+        raise ValueError(msg)
+    if _checkpointer is None:
+        _checkpointer = SqliteCheckpointSaver(url.removeprefix(SQLITE_URL_PREFIX))
+    return _checkpointer
+
+
+def close_checkpointer() -> None:
+    """Closes the shared checkpointer. Called on application shutdown."""
+
+    global _checkpointer  # noqa: PLW0603
+    if _checkpointer is not None:
+        _checkpointer.close()
+        _checkpointer = None
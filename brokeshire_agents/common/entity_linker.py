@@ -1,7 +1,8 @@
-import json
+from collections import Counter
 from math import exp, log
-from typing import Any, TypedDict
+from typing import Any, Literal, TypedDict
 
+import numpy as np
 from openai.types.chat import ChatCompletionMessageParam
 from rapidfuzz import fuzz, process, utils
 
@@ -9,9 +10,32 @@ from brokeshire_agents.common.ai_inference.openai import (
     Temperature,
     get_openai_response,
 )
+from brokeshire_agents.common.candidate_index import (
+    MAX_LLM_CANDIDATES,
+    CandidateIndex,
+)
+from brokeshire_agents.common.metrics import register_metrics
 
 LOGPROBS_REQUIRED_ERROR = "Logprobs are required but were not provided."
 
+# A fuzzy match is decisive, and the LLM skipped, when it scores at least
+# DECISIVE_MIN_SCORE and leads the runner-up by at least DECISIVE_MARGIN
+DECISIVE_MIN_SCORE = 90.0
+DECISIVE_MARGIN = 15.0
+
+# How each named entity was linked:
+# - alias_match: the named entity is a known alias of the entity, nothing else ran
+# - exact_match: one candidate has a key equal to the named entity, LLM skipped
+# - clear_margin: the top fuzzy match is far ahead of the rest, LLM skipped
+# - llm: the LLM picked the match
+# - fuzzy_only: no LLM linking was requested
+LinkDecision = Literal[
+    "alias_match", "exact_match", "clear_margin", "llm", "fuzzy_only"
+]
+
+link_decision_counts: Counter[LinkDecision] = Counter()
+register_metrics("entity_linking", lambda: dict(link_decision_counts))
+
 
 class EntityMatch(TypedDict):
     entity: dict[str, Any]
@@ -19,9 +43,17 @@ class EntityMatch(TypedDict):
 
 
 class LinkedEntityResults(TypedDict):
+    """
+    Matches of a named entity
+
+    When fuzzy matching is decisive the LLM is skipped, and `llm_matches` holds the
+    decisive fuzzy match instead, so callers can keep preferring LLM matches.
+    """
+
     named_entity: str
     fuzzy_matches: list[EntityMatch] | None
     llm_matches: list[EntityMatch] | None
+    decision: LinkDecision
 
 
 def log_weighted_average(values):
@@ -33,53 +65,87 @@ def log_weighted_average(values):
     return weighted_sum / sum_of_weights if sum_of_weights > 0 else 0
 
 
+class FuzzyChoices:
+    """
+    Preprocessed values of entities to fuzzy match against
+
+    Build it once per entity list and pass it to every `fuzzy_entity_match` call on
+    that list, so values aren't extracted and preprocessed on each call. Values are
+    stored key-major, so the scores of all keys come from a single `cdist` call.
+    """
+
+    def __init__(self, entity_list: list[dict[str, Any]], keys: list[str]):
+        self.keys = keys
+        self.size = len(entity_list)
+        self.values = [
+            utils.default_process(str(entity.get(key, "")))
+            for key in keys
+            for entity in entity_list
+        ]
+
+    def scores(self, named_entity: str, keys: list[str]) -> np.ndarray:
+        """Return a (len(keys), size) matrix of WRatio scores."""
+
+        if not set(keys) <= set(self.keys):
+            msg = f"Fuzzy choices are missing keys: {set(keys) - set(self.keys)}"
+            raise ValueError(msg)
+
+        if self.size == 0:
+            return np.zeros((len(keys), 0))
+        all_scores = process.cdist(
+            [utils.default_process(named_entity)],
+            self.values,
+            scorer=fuzz.WRatio,
+            processor=None,
+            dtype=np.float64,
+            workers=-1,
+        ).reshape(len(self.keys), self.size)
+        return all_scores[[self.keys.index(key) for key in keys]]
+
+
 def fuzzy_entity_match(
     named_entity: str,
     entity_list: list[dict[str, Any]],
     keys_to_match: list[str],
     score_cutoff: float = 0.7,
     limit: int = 5,
+    choices: FuzzyChoices | None = None,
 ) -> list[EntityMatch]:
+    """
+    Fuzzy match a named entity against the given keys of each entity
+
+    `choices` must have been built from `entity_list`. Without it, the values are
+    preprocessed on every call.
+    """
+
     if len(keys_to_match) == 0:
         message = "At least one key must be provided to match entities."
         raise ValueError(message)
 
-    # Create dictionaries of values for each key
-    key_values = {
-        key: {i: str(entity.get(key, "")) for i, entity in enumerate(entity_list)}
-        for key in keys_to_match
-    }
+    if choices is None:
+        choices = FuzzyChoices(entity_list, keys_to_match)
+    elif choices.size != len(entity_list):
+        message = "Fuzzy choices were built from a different entity list."
+        raise ValueError(message)
 
-    # Calculate scores for each key using process.extract
-    key_scores = {}
-    for key, values in key_values.items():
-        matches = process.extract(
-            named_entity,
-            values,
-            scorer=fuzz.WRatio,
-            processor=utils.default_process,
-            limit=None,
-        )
-        key_scores[key] = {
-            i: score if score > 0 else score + 1 for (_, score, i) in matches
-        }
-
-    # Calculate log weighted average scores
-    avg_scores = {}
-    for i in range(len(entity_list)):
-        scores = [key_scores[key].get(i, 0) for key in keys_to_match]
-        avg_scores[i] = log_weighted_average(scores)
-
-    # Sort by average score, apply score cutoff, and then apply limit
-    top_matches = sorted(
-        [(i, score) for i, score in avg_scores.items() if score >= score_cutoff],
-        key=lambda x: x[1],
-        reverse=True,
-    )[:limit]
+    key_scores = choices.scores(named_entity, keys_to_match)
+    key_scores[key_scores <= 0] += 1
+
+    # Log weighted average of the key scores. The weights exp(log(x)) are the scores
+    # themselves, as every score is positive by now.
+    avg_scores = np.square(key_scores).sum(axis=0) / key_scores.sum(axis=0)
+
+    # Apply score cutoff, then keep the top scores. Ties keep entity order.
+    candidates = np.flatnonzero(avg_scores >= score_cutoff)
+    if len(candidates) > limit > 0:
+        kth_score = np.partition(avg_scores[candidates], -limit)[-limit]
+        candidates = candidates[avg_scores[candidates] >= kth_score]
+    top_matches = candidates[np.argsort(-avg_scores[candidates], kind="stable")]
+    top_matches = top_matches[: max(limit, 0)]
 
     return [
-        EntityMatch(entity=entity_list[i], confidence_percentage=score)
-        for i, score in top_matches
+        EntityMatch(entity=entity_list[i], confidence_percentage=float(avg_scores[i]))
+        for i in top_matches
     ]
 
 
@@ -101,7 +167,17 @@ def get_system_prompt(unique_entities: dict[int, dict[str, Any]]):
 }}
 
 # Unique entities
-{json.dumps(unique_entities, indent=2)}"""
+One per line, as the index followed by the entity's keys and values
+{format_entities(unique_entities)}"""
+
+
+def format_entities(unique_entities: dict[int, dict[str, Any]]) -> str:
+    """Compact serialization of entities for prompts, one line per entity"""
+
+    return "\n".join(
+        f"{index}: " + "; ".join(f"{key}={value}" for key, value in entity.items())
+        for index, entity in unique_entities.items()
+    )
 
 
 def safe_int(s: str) -> int | None:
@@ -115,11 +191,28 @@ async def llm_entity_match(
     named_entity: str,
     entity_list: list[dict[str, Any]],
     keys_to_match: list[str],
+    candidate_index: CandidateIndex | None = None,
 ) -> list[EntityMatch]:
+    """
+    Link a named entity to one of the entities with an LLM
+
+    Only the `MAX_LLM_CANDIDATES` most relevant entities are included in the
+    prompt. `candidate_index` must have been built from `entity_list`; without it,
+    one is built on the fly for large entity lists.
+    """
+
     if len(keys_to_match) == 0:
         message = "At least one key must be provided to match entities."
         raise ValueError(message)
 
+    if len(entity_list) > MAX_LLM_CANDIDATES:
+        if candidate_index is None or candidate_index.size != len(entity_list):
+            candidate_index = CandidateIndex(entity_list, keys_to_match)
+        candidates = candidate_index.candidates(named_entity, MAX_LLM_CANDIDATES)
+        entity_list = [entity_list[i] for i in candidates]
+    if len(entity_list) == 0:
+        return []
+
     filtered_entity_keys = [
         {key: d[key] for key in keys_to_match if key in d} for d in entity_list
     ]
@@ -156,27 +249,99 @@ async def llm_entity_match(
     ]
 
 
+def decide_fuzzy_match(
+    named_entity: str, fuzzy_matches: list[EntityMatch], keys: list[str]
+) -> tuple[LinkDecision, EntityMatch | None]:
+    """
+    Decide whether the fuzzy matches are unambiguous enough to skip the LLM
+
+    Returns the decision and the decisive match, if there is one. Exact matches
+    are certain, so they get a confidence of 100.
+    """
+
+    if not fuzzy_matches:
+        return "llm", None
+
+    query = utils.default_process(named_entity)
+    exact_matches = [
+        match
+        for match in fuzzy_matches
+        if any(
+            utils.default_process(str(match["entity"].get(key, ""))) == query
+            for key in keys
+        )
+    ]
+    if len(exact_matches) == 1:
+        return "exact_match", EntityMatch(
+            entity=exact_matches[0]["entity"], confidence_percentage=100.0
+        )
+    if exact_matches:
+        return "llm", None
+
+    top_score = fuzzy_matches[0]["confidence_percentage"]
+    runner_up_score = (
+        fuzzy_matches[1]["confidence_percentage"] if len(fuzzy_matches) > 1 else 0
+    )
+    if top_score >= DECISIVE_MIN_SCORE and top_score - runner_up_score >= (
+        DECISIVE_MARGIN
+    ):
+        return "clear_margin", fuzzy_matches[0]
+    return "llm", None
+
+
+def record_link_decision(decision: LinkDecision):
+    link_decision_counts[decision] += 1
+
+
 async def link_entity(
     named_entity: str,
     unique_entities: list[dict],
     fuzzy_keys: list[str] | None = None,
     llm_keys: list[str] | None = None,
+    fuzzy_choices: FuzzyChoices | None = None,
+    candidate_index: CandidateIndex | None = None,
 ) -> LinkedEntityResults:
     """
     Link a named entity to a unique entity from a list of unique entities
+
+    The LLM is only asked when the fuzzy matches don't already settle the link, see
+    `decide_fuzzy_match`.
     """
 
     fuzzy_matches = (
         None
         if fuzzy_keys is None
-        else fuzzy_entity_match(named_entity, unique_entities, fuzzy_keys)
+        else fuzzy_entity_match(
+            named_entity,
+            unique_entities,
+            fuzzy_keys,
+            choices=fuzzy_choices,
+        )
     )
     llm_matches = None
+    decision: LinkDecision = "fuzzy_only"
     if llm_keys is not None:
-        llm_entity_list = (
-            [le["entity"] for le in fuzzy_matches] if fuzzy_matches else unique_entities
+        decision, decisive_match = decide_fuzzy_match(
+            named_entity, fuzzy_matches or [], fuzzy_keys or []
         )
-        llm_matches = await llm_entity_match(named_entity, llm_entity_list, llm_keys)
+        if decisive_match is not None:
+            llm_matches = [decisive_match]
+        else:
+            llm_entity_list = (
+                [le["entity"] for le in fuzzy_matches]
+                if fuzzy_matches
+                else unique_entities
+            )
+            llm_matches = await llm_entity_match(
+                named_entity,
+                llm_entity_list,
+                llm_keys,
+                candidate_index=None if fuzzy_matches else candidate_index,
+            )
+    record_link_decision(decision)
     return LinkedEntityResults(
-        named_entity=named_entity, fuzzy_matches=fuzzy_matches, llm_matches=llm_matches
+        named_entity=named_entity,
+        fuzzy_matches=fuzzy_matches,
+        llm_matches=llm_matches,
+        decision=decision,
     )
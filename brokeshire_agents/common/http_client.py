@@ -0,0 +1,112 @@
+import asyncio
+from urllib.parse import urlsplit
+
+import httpx
+
+from brokeshire_agents.common.rate_limiter import (
+    RateLimiter,
+    get_rate_limiter,
+    parse_retry_after,
+)
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=60
+)
+
+# Per-host connection limits. With HTTP/2 a single connection multiplexes many
+# concurrent requests, so these mostly bound the HTTP/1.1 fallback.
+HOST_LIMITS: dict[str, httpx.Limits] = {
+    "openrouter.ai": httpx.Limits(
+        max_connections=50, max_keepalive_connections=20, keepalive_expiry=120
+    ),
+    "api.geckoterminal.com": httpx.Limits(
+        max_connections=10, max_keepalive_connections=5, keepalive_expiry=60
+    ),
+    "api.dexscreener.com": httpx.Limits(
+        max_connections=20, max_keepalive_connections=10, keepalive_expiry=60
+    ),
+    "public-api.birdeye.so": httpx.Limits(
+        max_connections=10, max_keepalive_connections=5, keepalive_expiry=60
+    ),
+}
+
+# Rate limited requests are retried this many times, unless the upstream asks us
+# to wait longer than the maximum delay
+MAX_RATE_LIMIT_RETRIES = 2
+MAX_RATE_LIMIT_DELAY = 10.0
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Transport that keeps the requests to a host within its rate limit.
+
+    Responses with status 429 make the limiter back off for their Retry-After
+    delay, and the request is retried once it's allowed again.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter):
+        self._transport = transport
+        self._limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            response = await self._transport.handle_async_request(request)
+            if response.status_code != httpx.codes.TOO_MANY_REQUESTS:
+                self._limiter.recover()
+                return response
+
+            delay = self._limiter.backoff(
+                parse_retry_after(response.headers.get("Retry-After"))
+            )
+            if attempt == MAX_RATE_LIMIT_RETRIES or delay > MAX_RATE_LIMIT_DELAY:
+                return response
+            await response.aclose()
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _get_origin(url: str) -> tuple[str, str]:
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        msg = f"Cannot resolve a host for URL: {url}"
+        raise ValueError(msg)
+    return f"{parts.scheme}://{parts.netloc}", parts.hostname or parts.netloc
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """Return the pooled client for the host of the given URL.
+
+    Clients are created lazily, one per origin, and keep their connections alive
+    between requests. Requests to hosts with a known rate limit are kept within it.
+    Per-request settings such as headers or timeouts should be passed on each call
+    instead of on the client.
+    """
+
+    origin, host = _get_origin(url)
+    client = _clients.get(origin)
+    if client is None or client.is_closed:
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+            http2=True, limits=HOST_LIMITS.get(host, DEFAULT_LIMITS)
+        )
+        limiter = get_rate_limiter(url)
+        if limiter is not None:
+            transport = RateLimitedTransport(transport, limiter)
+        client = httpx.AsyncClient(transport=transport, timeout=DEFAULT_TIMEOUT)
+        _clients[origin] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client. Called on application shutdown."""
+
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(
+        *(client.aclose() for client in clients), return_exceptions=True
+    )
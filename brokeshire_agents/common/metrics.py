@@ -0,0 +1,43 @@
+import os
+import resource
+import sys
+from collections.abc import Callable
+from typing import Any
+
+MetricsProvider = Callable[[], dict[str, Any]]
+
+_providers: dict[str, MetricsProvider] = {}
+
+
+def register_metrics(name: str, provider: MetricsProvider) -> None:
+    """Register a callable that reports a snapshot of a component's metrics.
+
+    Registering the same name again replaces the previous provider.
+    """
+
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict[str, dict[str, Any]]:
+    """Return the current metrics of every registered component."""
+
+    return {name: provider() for name, provider in _providers.items()}
+
+
+def process_memory() -> dict[str, int]:
+    """Resident and peak resident memory of this process, in bytes."""
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        rss = peak_rss
+    return {"rss_bytes": rss, "peak_rss_bytes": peak_rss}
+
+
+register_metrics("process", process_memory)
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from collections.abc import Callable
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from brokeshire_agents.common.metrics import register_metrics
+
+# Requests per second and burst size of the upstream APIs' public rate limits
+HOST_RATE_LIMITS: dict[str, tuple[float, int]] = {
+    "api.geckoterminal.com": (0.5, 10),
+    "api.dexscreener.com": (4.0, 20),
+    "public-api.birdeye.so": (1.0, 5),
+    "api.coingecko.com": (0.5, 5),
+    "pro-api.coingecko.com": (8.0, 20),
+}
+
+# Backoff after a rate limited response without a Retry-After header
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+# A rate limited response halves the rate, down to this fraction of the limit,
+# and every successful one recovers this fraction of the limit
+MIN_RATE_FACTOR = 1 / 8
+RATE_RECOVERY_STEP = 1 / 20
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, given in seconds or as a date."""
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token bucket holding up to `burst` requests, refilled at `rate` per second.
+
+    Waiting requests are served in the order they arrived. When the upstream rate
+    limits us anyway, `backoff` pauses every request for the Retry-After delay and
+    halves the rate, which `recover` then raises back as requests succeed.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0 or burst < 1:
+            msg = "Rate limiter rate and burst must be positive."
+            raise ValueError(msg)
+
+        self.rate = rate
+        self.max_rate = rate
+        self.burst = burst
+        self._timer = timer
+        self._tokens = float(burst)
+        self._updated_at = timer()
+        self._blocked_until = 0.0
+        self._consecutive_backoffs = 0
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.rate_limited = 0
+
+    def _refill(self):
+        now = self._timer()
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated_at = max(now, self._updated_at)
+
+    async def acquire(self) -> None:
+        """Waits until a request is allowed and takes it from the bucket."""
+
+        self.waiting += 1
+        try:
+            async with self._lock:
+                throttled = False
+                while True:
+                    now = self._timer()
+                    if now < self._blocked_until:
+                        delay = self._blocked_until - now
+                    else:
+                        self._refill()
+                        if self._tokens >= 1:
+                            break
+                        delay = (1 - self._tokens) / self.rate
+                    throttled = True
+                    await asyncio.sleep(delay)
+                self._tokens -= 1
+                self.acquired += 1
+                if throttled:
+                    self.throttled += 1
+        finally:
+            self.waiting -= 1
+
+    def backoff(self, retry_after: float | None = None) -> float:
+        """Pauses requests after a rate limited response and returns for how long."""
+
+        self.rate_limited += 1
+        self._consecutive_backoffs += 1
+        delay = (
+            retry_after
+            if retry_after is not None
+            else min(BASE_BACKOFF * 2 ** (self._consecutive_backoffs - 1), MAX_BACKOFF)
+        )
+        self.rate = max(self.max_rate * MIN_RATE_FACTOR, self.rate / 2)
+        self._blocked_until = max(self._blocked_until, self._timer() + delay)
+        # Nothing accumulates while blocked, so requests don't burst right after
+        self._tokens = 0
+        self._updated_at = self._blocked_until
+        return delay
+
+    def recover(self):
+        """Raises the rate back towards the limit after a successful response."""
+
+        self._consecutive_backoffs = 0
+        self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY_STEP)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "rate": self.rate,
+            "max_rate": self.max_rate,
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "rate_limited": self.rate_limited,
+        }
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(url: str) -> RateLimiter | None:
+    """Return the shared rate limiter of the URL's host, if it has a known limit."""
+
+    host = urlsplit(url).hostname or ""
+    limiter = _limiters.get(host)
+    if limiter is None and host in HOST_RATE_LIMITS:
+        limiter = RateLimiter(*HOST_RATE_LIMITS[host])
+        _limiters[host] = limiter
+    return limiter
+
+
+def rate_limiter_stats() -> dict[str, dict[str, int | float]]:
+    return {host: limiter.stats() for host, limiter in _limiters.items()}
+
+
+register_metrics("rate_limiters", rate_limiter_stats)
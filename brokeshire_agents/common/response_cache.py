@@ -0,0 +1,267 @@
+import asyncio
+import functools
+import pickle
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple, ParamSpec, TypeVar
+
+from rich.console import Console
+
+from brokeshire_agents.common.cache import TTLCache
+from brokeshire_agents.common.metrics import register_metrics
+from brokeshire_agents.common.single_flight import SingleFlight
+from brokeshire_agents.settings import SETTINGS
+
+SQLITE_URL_PREFIX = "sqlite:///"
+
+P = ParamSpec("P")
+V = TypeVar("V")
+
+console = Console()
+
+
+class CachedResponse(NamedTuple):
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class SqliteResponseStore:
+    """Disk tier of the response cache, so responses survive restarts.
+
+    Values are pickled, so cached pydantic models come back without being parsed or
+    validated again. Queries run on a single dedicated thread.
+    """
+
+    def __init__(self, path: str, timer: Callable[[], float] = time.time):
+        self._timer = timer
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        with self._connection:
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    fresh_until REAL NOT NULL,
+                    stale_until REAL NOT NULL,
+                    value BLOB NOT NULL
+                )"""
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE stale_until <= ?", (timer(),)
+            )
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        def get():
+            row = self._connection.execute(
+                """SELECT value, fresh_until, stale_until FROM responses
+                WHERE key = ? AND stale_until > ?""",
+                (key, self._timer()),
+            ).fetchone()
+            if row is None:
+                return None
+            pickled, fresh_until, stale_until = row
+            # Only this cache writes the file, so its pickles are trusted
+            value = pickle.loads(pickled)  # noqa: S301
+            return CachedResponse(value, fresh_until, stale_until)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, get)
+
+    async def put(self, key: str, response: CachedResponse) -> None:
+        def put():
+            with self._connection:
+                self._connection.execute(
+                    """INSERT INTO responses (key, fresh_until, stale_until, value)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET
+                        fresh_until = excluded.fresh_until,
+                        stale_until = excluded.stale_until,
+                        value = excluded.value""",
+                    (
+                        key,
+                        response.fresh_until,
+                        response.stale_until,
+                        pickle.dumps(response.value),
+                    ),
+                )
+
+        await asyncio.get_running_loop().run_in_executor(self._executor, put)
+
+
+class ResponseCache:
+    """
+    Cache of parsed upstream responses with stale-while-revalidate
+
+    Responses are kept in an in-memory LRU and, if a store is given, on disk. A fresh
+    response is returned as is. A stale one, past its time to live but within its
+    stale time to live, is returned while it's refreshed in the background. Anything
+    older is fetched again, with concurrent fetches of a key sharing one call.
+
+    Cached values are shared by every caller, so they must not be mutated.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        store: SqliteResponseStore | None = None,
+        timer: Callable[[], float] = time.time,
+    ):
+        self._timer = timer
+        self._memory: TTLCache[str, CachedResponse] = TTLCache(
+            maxsize, ttl=0, timer=timer
+        )
+        self._store = store
+        self._fetches: SingleFlight[str, Any] = SingleFlight()
+        self._revalidations: dict[str, asyncio.Task] = {}
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.fetches = 0
+        self.revalidation_errors = 0
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[V]],
+        ttl: float,
+        stale_ttl: float = 0,
+    ) -> V:
+        response = await self._get(key)
+        now = self._timer()
+        if response is not None and now < response.fresh_until:
+            return response.value
+        if response is not None and now < response.stale_until:
+            self.stale_hits += 1
+            self._revalidate(key, fetch, ttl, stale_ttl)
+            return response.value
+        return await self._fetches.do(
+            key, lambda: self._fetch(key, fetch, ttl, stale_ttl)
+        )
+
+    async def _get(self, key: str) -> CachedResponse | None:
+        response = self._memory.get(key)
+        if response is not None or self._store is None:
+            return response
+
+        try:
+            response = await self._store.get(key)
+        except Exception as e:
+            console.print(f"[red]Failed reading cached response {key}: {e}[/red]")
+            return None
+        if response is not None:
+            self.disk_hits += 1
+            self._memory.set(key, response, ttl=response.stale_until - self._timer())
+        return response
+
+    async def _fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[V]],
+        ttl: float,
+        stale_ttl: float,
+    ) -> V:
+        self.fetches += 1
+        value = await fetch()
+        now = self._timer()
+        response = CachedResponse(value, now + ttl, now + ttl + stale_ttl)
+        self._memory.set(key, response, ttl=ttl + stale_ttl)
+        if self._store is not None:
+            try:
+                await self._store.put(key, response)
+            except Exception as e:
+                console.print(f"[red]Failed storing cached response {key}: {e}[/red]")
+        return value
+
+    def _revalidate(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float,
+    ):
+        if key in self._revalidations:
+            return
+
+        task = asyncio.create_task(
+            self._fetches.do(key, lambda: self._fetch(key, fetch, ttl, stale_ttl))
+        )
+        self._revalidations[key] = task
+        task.add_done_callback(lambda _: self._finish_revalidation(key, task))
+
+    def _finish_revalidation(self, key: str, task: asyncio.Task):
+        self._revalidations.pop(key, None)
+        if task.cancelled() or task.exception() is None:
+            return
+        self.revalidation_errors += 1
+        console.print(
+            f"[red]Serving stale response {key}, refresh failed: "
+            f"{task.exception()}[/red]"
+        )
+
+    def invalidate(self, key: str) -> None:
+        self._memory.delete(key)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            **self._memory.stats(),
+            "disk_hits": self.disk_hits,
+            "stale_hits": self.stale_hits,
+            "fetches": self.fetches,
+            "revalidation_errors": self.revalidation_errors,
+        }
+
+
+def create_response_cache(url: str, maxsize: int) -> ResponseCache:
+    """Creates a cache from a URL, `memory://` or `sqlite:///<path>` to add disk."""
+
+    if url == "memory://":
+        return ResponseCache(maxsize)
+    if url.startswith(SQLITE_URL_PREFIX):
+        store = SqliteResponseStore(url.removeprefix(SQLITE_URL_PREFIX))
+        return ResponseCache(maxsize, store)
+
+    msg = f"Unsupported response cache URL: {url}"
+    raise ValueError(msg)
+
+
+def _default_key(*args: Any, **kwargs: Any) -> Hashable:
+    return args, tuple(sorted(kwargs.items()))
+
+
+def cached_response(
+    namespace: str,
+    ttl: float | Callable[..., float],
+    stale_ttl: float | Callable[..., float] = 0,
+    key: Callable[..., Hashable] = _default_key,
+) -> Callable[[Callable[P, Awaitable[V]]], Callable[P, Awaitable[V]]]:
+    """
+    Caches the responses of an async function in the shared response cache
+
+    `key` receives the function's arguments and returns what to cache them under,
+    which must have a stable `repr`. `ttl` and `stale_ttl` can also be functions of
+    the arguments, for clients with several endpoints.
+    """
+
+    def decorator(
+        function: Callable[P, Awaitable[V]],
+    ) -> Callable[P, Awaitable[V]]:
+        @functools.wraps(function)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> V:
+            return await response_cache.get_or_fetch(
+                f"{namespace}:{key(*args, **kwargs)!r}",
+                lambda: function(*args, **kwargs),
+                ttl(*args, **kwargs) if callable(ttl) else ttl,
+                stale_ttl(*args, **kwargs) if callable(stale_ttl) else stale_ttl,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+response_cache = create_response_cache(
+    SETTINGS.response_cache_url, SETTINGS.response_cache_size
+)
+register_metrics("response_cache", response_cache.stats)
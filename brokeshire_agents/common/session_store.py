@@ -0,0 +1,139 @@
+import asyncio
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from brokeshire_agents.common.agent_team import AgentTeamSnapshot
+
+SQLITE_URL_PREFIX = "sqlite:///"
+
+
+class SessionSnapshot(BaseModel):
+    """Everything needed to recreate an agent team session on another worker."""
+
+    session_id: str
+    version: int
+    updated_at: float = Field(default_factory=time.time)
+    route: str | None
+    store_transaction_info: Any = None
+    user_chat_id: str
+    user_address: str | None = None
+    agent_team: AgentTeamSnapshot
+
+
+class SessionStore(ABC):
+    """Storage for session snapshots shared by every worker."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> SessionSnapshot | None:
+        """Returns the latest snapshot of a session, if there is one."""
+
+    @abstractmethod
+    async def put(self, snapshot: SessionSnapshot) -> None:
+        """Saves a snapshot, replacing the previous one of its session."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Deletes the snapshot of a session."""
+
+    @abstractmethod
+    async def delete_expired(self, updated_before: float) -> int:
+        """Deletes snapshots last updated before the given time."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process local store, only suitable for a single worker."""
+
+    def __init__(self) -> None:
+        self._snapshots: dict[str, SessionSnapshot] = {}
+
+    async def get(self, session_id: str) -> SessionSnapshot | None:
+        return self._snapshots.get(session_id)
+
+    async def put(self, snapshot: SessionSnapshot) -> None:
+        self._snapshots[snapshot.session_id] = snapshot
+
+    async def delete(self, session_id: str) -> None:
+        self._snapshots.pop(session_id, None)
+
+    async def delete_expired(self, updated_before: float) -> int:
+        expired = [
+            session_id
+            for session_id, snapshot in self._snapshots.items()
+            if snapshot.updated_at < updated_before
+        ]
+        for session_id in expired:
+            del self._snapshots[session_id]
+        return len(expired)
+
+
+class SqliteSessionStore(SessionStore):
+    """Store in a SQLite database file that every worker on a host can open.
+
+    Queries run on a single dedicated thread, so they never block the event loop
+    and are applied in the order they were made.
+    """
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL,
+                snapshot TEXT NOT NULL
+            )"""
+        )
+        self._connection.commit()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def _run(self, query: str, parameters: tuple = ()) -> tuple[list[tuple], int]:
+        """Runs a query in a transaction and returns its rows and row count."""
+
+        def run():
+            with self._connection:
+                cursor = self._connection.execute(query, parameters)
+                return cursor.fetchall(), cursor.rowcount
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+
+    async def get(self, session_id: str) -> SessionSnapshot | None:
+        rows, _ = await self._run(
+            "SELECT snapshot FROM sessions WHERE session_id = ?", (session_id,)
+        )
+        return SessionSnapshot.model_validate_json(rows[0][0]) if rows else None
+
+    async def put(self, snapshot: SessionSnapshot) -> None:
+        await self._run(
+            """INSERT INTO sessions (session_id, updated_at, snapshot)
+            VALUES (?, ?, ?)
+            ON CONFLICT (session_id) DO UPDATE SET
+                updated_at = excluded.updated_at, snapshot = excluded.snapshot""",
+            (snapshot.session_id, snapshot.updated_at, snapshot.model_dump_json()),
+        )
+
+    async def delete(self, session_id: str) -> None:
+        await self._run("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    async def delete_expired(self, updated_before: float) -> int:
+        _, deleted = await self._run(
+            "DELETE FROM sessions WHERE updated_at < ?", (updated_before,)
+        )
+        return deleted
+
+
+def create_session_store(url: str) -> SessionStore:
+    """Creates a store from a URL, either `memory://` or `sqlite:///<path>`."""
+
+    if url == "memory://":
+        return InMemorySessionStore()
+    if url.startswith(SQLITE_URL_PREFIX):
+        return SqliteSessionStore(url.removeprefix(SQLITE_URL_PREFIX))
+
+    msg = f"Unsupported session store URL: {url}"
+    raise ValueError(msg)
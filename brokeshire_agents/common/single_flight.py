@@ -0,0 +1,91 @@
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, ParamSpec, TypeVar
+
+from brokeshire_agents.common.metrics import register_metrics
+
+P = ParamSpec("P")
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_groups: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Coalesces concurrent calls with the same key into a single in-flight call
+
+    The first caller of a key starts the call and every caller that arrives before it
+    finishes awaits the same result or exception. Results are shared, so callers must
+    not mutate them. Nothing is cached once the call is done.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[K, asyncio.Task[V]] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: K, call: Callable[[], Awaitable[V]]) -> V:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        # Shielded so a cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: K, task: asyncio.Task[V]):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self) -> dict[str, int | float]:
+        coalesced = self.calls - self.executions
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": coalesced,
+            "coalescing_ratio": coalesced / self.calls if self.calls else 0.0,
+        }
+
+
+def _default_key(*args: Any, **kwargs: Any) -> Hashable:
+    return args, tuple(sorted(kwargs.items()))
+
+
+def single_flight(
+    name: str, key: Callable[..., Hashable] = _default_key
+) -> Callable[[Callable[P, Awaitable[V]]], Callable[P, Awaitable[V]]]:
+    """
+    Decorates an async function so concurrent calls with the same key share one call
+
+    `key` receives the function's arguments and returns the key to coalesce on. By
+    default it's the arguments themselves, which must then be hashable. The
+    coalescing stats of every decorated function are reported under its `name`.
+    """
+
+    def decorator(
+        function: Callable[P, Awaitable[V]],
+    ) -> Callable[P, Awaitable[V]]:
+        group: SingleFlight[Hashable, V] = SingleFlight()
+        _groups[name] = group
+
+        @functools.wraps(function)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> V:
+            return await group.do(
+                key(*args, **kwargs), lambda: function(*args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def single_flight_stats() -> dict[str, dict[str, int | float]]:
+    return {name: group.stats() for name, group in _groups.items()}
+
+
+register_metrics("single_flight", single_flight_stats)
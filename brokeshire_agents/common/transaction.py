@@ -1,14 +1,63 @@
 import math
+import time
+from collections.abc import Awaitable, Callable
+from functools import cached_property
+from typing import Any
 
-import httpx
 from pydantic import BaseModel, ConfigDict, HttpUrl
 from pydantic.alias_generators import to_camel
+from rich.console import Console
 from solders.pubkey import Pubkey
 from web3 import Web3
 
-from brokeshire_agents.common.entity_linker import link_entity
+from brokeshire_agents.common.alias_index import AliasCatalog
+from brokeshire_agents.common.candidate_index import CandidateIndex
+from brokeshire_agents.common.entity_linker import (
+    EntityMatch,
+    FuzzyChoices,
+    LinkedEntityResults,
+    decide_fuzzy_match,
+    fuzzy_entity_match,
+    link_entity,
+    record_link_decision,
+)
+from brokeshire_agents.common.http_client import get_http_client
+from brokeshire_agents.common.metrics import register_metrics
+from brokeshire_agents.common.single_flight import SingleFlight, single_flight
 from brokeshire_agents.settings import SETTINGS
 
+TOKEN_CATALOG_TTL = 60 * 5
+TOKEN_FUZZY_KEYS = ["name", "symbol"]
+TOKEN_LLM_KEYS = ["name", "symbol"]
+CHAIN_KEYS = ["name", "chain_id"]
+ABSTRACT_TOKEN_KEYS = ["name", "symbol"]
+# Links of at least this confidence teach the alias index the linked name
+LEARN_ALIAS_MIN_CONFIDENCE = 90.0
+
+# Names and abbreviations users call the same chain or asset by
+CHAIN_ALIAS_GROUPS = [
+    {"ethereum", "eth", "mainnet", "ethereum mainnet", "ether"},
+    {"arbitrum", "arbitrum one", "arb", "arbi"},
+    {"optimism", "op", "op mainnet"},
+    {"base", "base mainnet"},
+    {"bnb chain", "bnb smart chain", "binance smart chain", "bsc", "bnb"},
+    {"polygon", "polygon pos", "matic", "pol"},
+    {"avalanche", "avalanche c-chain", "avax"},
+    {"solana", "sol"},
+]
+ABSTRACT_TOKEN_ALIAS_GROUPS = [
+    {"eth", "ether", "ethereum"},
+    {"btc", "bitcoin"},
+    {"usdc", "usd coin"},
+    {"usdt", "tether", "tether usd"},
+    {"sol", "solana"},
+    {"bnb", "binance coin"},
+    {"avax", "avalanche"},
+    {"doge", "dogecoin"},
+]
+
+console = Console()
+
 
 class Explorer(BaseModel):
     name: str
@@ -88,24 +137,39 @@ class YieldStrategy(BaseModel):
     lockup_period: str | None = None
 
 
+async def _link_with_aliases(
+    named_entity: str, catalog: AliasCatalog, keys: list[str]
+) -> LinkedEntityResults:
+    """Link a named entity by its alias, falling back to the entity linker."""
+
+    entity = await catalog.resolve(named_entity)
+    if entity is not None:
+        record_link_decision("alias_match")
+        match = EntityMatch(entity=entity, confidence_percentage=100.0)
+        return LinkedEntityResults(
+            named_entity=named_entity,
+            fuzzy_matches=[match],
+            llm_matches=[match],
+            decision="alias_match",
+        )
+
+    results = await link_entity(named_entity, await catalog.entities(), keys, keys)
+    llm_matches = results["llm_matches"]
+    if (
+        results["decision"] in ("llm", "clear_margin")
+        and llm_matches
+        and llm_matches[0]["confidence_percentage"] >= LEARN_ALIAS_MIN_CONFIDENCE
+    ):
+        catalog.learn(named_entity, llm_matches[0]["entity"])
+    return results
+
+
 async def link_chain(chain_name: str):
-    supported_chains = await _get_supported_chains()
-    return await link_entity(
-        chain_name,
-        [chain.model_dump() for chain in supported_chains],
-        ["name", "chain_id"],
-        ["name", "chain_id"],
-    )
+    return await _link_with_aliases(chain_name, chain_aliases, CHAIN_KEYS)
 
 
 async def link_abstract_token(token: str):
-    supported_abstract_tokens = await _get_supported_abstract_tokens()
-    return await link_entity(
-        token,
-        [token.model_dump() for token in supported_abstract_tokens],
-        ["name", "symbol"],
-        ["name", "symbol"],
-    )
+    return await _link_with_aliases(token, abstract_token_aliases, ABSTRACT_TOKEN_KEYS)
 
 
 def is_valid_sol_address(addr: str) -> bool:
@@ -118,27 +182,163 @@ def is_valid_sol_address(addr: str) -> bool:
         return False
 
 
+def normalize_address(address: str) -> str:
+    """Return the canonical form of an address, checksummed for EVM chains.
+
+    Solana addresses are base58 and case sensitive, so they are returned as is.
+    """
+
+    return Web3.to_checksum_address(address) if Web3.is_address(address) else address
+
+
+class ChainTokens:
+    """The supported tokens of a chain, with indexes for fast lookups.
+
+    Tokens are validated once when the catalog is fetched and stored as dicts, the
+    form entity linking works with.
+    """
+
+    def __init__(self, tokens: list[dict[str, Any]]):
+        self.tokens = tokens
+        self.fetched_at = time.monotonic()
+        self.by_address = {normalize_address(t["address"]): t for t in tokens}
+        self.by_symbol: dict[str, list[dict[str, Any]]] = {}
+        for token in tokens:
+            self.by_symbol.setdefault(token["symbol"].lower(), []).append(token)
+        # Preprocessed once so fuzzy matching doesn't redo it on every request
+        self.fuzzy_choices = FuzzyChoices(tokens, TOKEN_FUZZY_KEYS)
+
+    @cached_property
+    def candidate_index(self) -> CandidateIndex:
+        # Built on first use, it's only needed when fuzzy matching finds nothing
+        return CandidateIndex(self.tokens, TOKEN_LLM_KEYS)
+
+    def get_by_address(self, address: str) -> dict[str, Any] | None:
+        return self.by_address.get(normalize_address(address))
+
+
+class TokenCatalog:
+    """Per-chain cache of supported tokens that refreshes after a time to live.
+
+    Concurrent requests for a chain that needs refreshing share a single fetch. If a
+    refresh fails, the stale tokens are served until the next attempt.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[list[dict[str, Any]]]],
+        ttl: float = TOKEN_CATALOG_TTL,
+    ):
+        self._fetch = fetch
+        self._ttl = ttl
+        self._chains: dict[str, ChainTokens] = {}
+        self._refreshes: SingleFlight[str, ChainTokens] = SingleFlight()
+        self.hits = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+
+    async def get(self, chain_id: str) -> ChainTokens:
+        chain_tokens = self._chains.get(chain_id)
+        if (
+            chain_tokens is not None
+            and time.monotonic() - chain_tokens.fetched_at < self._ttl
+        ):
+            self.hits += 1
+            return chain_tokens
+
+        try:
+            return await self._refreshes.do(chain_id, lambda: self._refresh(chain_id))
+        except Exception as e:
+            if chain_tokens is None:
+                raise
+            console.print(f"[red]Serving stale tokens for chain {chain_id}: {e}[/red]")
+            return chain_tokens
+
+    async def _refresh(self, chain_id: str) -> ChainTokens:
+        self.fetches += 1
+        try:
+            tokens = await self._fetch(chain_id)
+        except Exception:
+            self.fetch_errors += 1
+            raise
+        chain_tokens = ChainTokens(tokens)
+        self._chains[chain_id] = chain_tokens
+        return chain_tokens
+
+    def invalidate(self, chain_id: str | None = None) -> None:
+        if chain_id is None:
+            self._chains.clear()
+        else:
+            self._chains.pop(chain_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "chains": len(self._chains),
+            "tokens": sum(len(c.tokens) for c in self._chains.values()),
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "coalesced_fetches": self._refreshes.stats()["coalesced"],
+        }
+
+
 async def link_token(token: str, chain_id: str):
-    supported_tokens = await _get_supported_tokens(chain_id)
+    chain_tokens = await token_catalog.get(chain_id)
+    supported_tokens = chain_tokens.tokens
     print("Token length", len(supported_tokens))
-    supported_tokens_dict = [token.model_dump() for token in supported_tokens]
 
     # Check if it's an address (either ETH or SOL)
     if Web3.is_address(token) or is_valid_sol_address(token):
+        address_match = chain_tokens.get_by_address(token)
+        if address_match is not None:
+            record_link_decision("exact_match")
+            return LinkedEntityResults(
+                named_entity=token,
+                fuzzy_matches=[
+                    EntityMatch(entity=address_match, confidence_percentage=100.0)
+                ],
+                llm_matches=None,
+                decision="exact_match",
+            )
+
         fuzzy_keys = ["address"]
         return await link_entity(
             token,
-            supported_tokens_dict,
+            supported_tokens,
             fuzzy_keys,
         )
 
-    fuzzy_keys = ["name", "symbol"]
-    fuzzy_results = await link_entity(
+    symbol_matches = chain_tokens.by_symbol.get(token.strip().lower())
+    if symbol_matches:
+        # Prefer tokens vetted by the primary data source, as fuzzy matching does
+        symbol_matches = [
+            entity
+            for entity in symbol_matches
+            if entity["is_vetted_by_primary_data_source"]
+        ] or symbol_matches
+        if len(symbol_matches) == 1:
+            record_link_decision("exact_match")
+            symbol_match = EntityMatch(
+                entity=symbol_matches[0], confidence_percentage=100.0
+            )
+            return LinkedEntityResults(
+                named_entity=token,
+                fuzzy_matches=[symbol_match],
+                llm_matches=[symbol_match],
+                decision="exact_match",
+            )
+        # Tokens sharing the symbol are the only candidates worth asking about. They
+        # are fuzzy matched too, for callers to fall back on if the LLM picks none.
+        return await link_entity(
+            token, symbol_matches, TOKEN_FUZZY_KEYS, TOKEN_LLM_KEYS
+        )
+
+    fuzzy_matches = fuzzy_entity_match(
         token,
-        supported_tokens_dict,
-        fuzzy_keys,
+        supported_tokens,
+        TOKEN_FUZZY_KEYS,
+        choices=chain_tokens.fuzzy_choices,
     )
-    fuzzy_matches = fuzzy_results.get("fuzzy_matches")
     if fuzzy_matches:
         # Check if any matches are vetted by the primary data source
         vetted_matches = [
@@ -146,23 +346,32 @@ async def link_token(token: str, chain_id: str):
             for match in fuzzy_matches
             if match["entity"]["is_vetted_by_primary_data_source"]
         ]
-        if vetted_matches:
-            # If there are vetted matches, use only those
-            llm_entity_list = [match["entity"] for match in vetted_matches]
-        else:
-            # If none are vetted, include all matches
-            llm_entity_list = [match["entity"] for match in fuzzy_matches]
+        # If there are vetted matches, use only those
+        candidate_matches = vetted_matches or fuzzy_matches
+        decision, decisive_match = decide_fuzzy_match(
+            token, candidate_matches, TOKEN_FUZZY_KEYS
+        )
+        if decisive_match is not None:
+            record_link_decision(decision)
+            return LinkedEntityResults(
+                named_entity=token,
+                fuzzy_matches=fuzzy_matches,
+                llm_matches=[decisive_match],
+                decision=decision,
+            )
+        llm_entity_list = [match["entity"] for match in candidate_matches]
     else:
-        # If fuzzy_matches is None or empty, use the full list
-        llm_entity_list = supported_tokens_dict
-
-    llm_keys = ["name", "symbol"]
+        # If fuzzy_matches is None or empty, prune the full list to the most likely
+        # candidates
+        llm_entity_list = [
+            supported_tokens[i] for i in chain_tokens.candidate_index.candidates(token)
+        ]
 
     return await link_entity(
         token,
         llm_entity_list,
         None,
-        llm_keys,
+        TOKEN_LLM_KEYS,
     )
 
 
@@ -178,8 +387,7 @@ async def get_best_yield_strategy(
         "chain_id": chain_id,
     }
     try:
-        async with httpx.AsyncClient(http2=True, timeout=3) as client:
-            response = await client.get(url, params=params)
+        response = await get_http_client(url).get(url, params=params, timeout=3)
     except Exception as e:
         msg = f"An error occurred while requesting {url}: {e}"
         raise Exception(msg) from e
@@ -188,11 +396,11 @@ async def get_best_yield_strategy(
     return _select_optimal_yield_strategy(yield_strategies)
 
 
+@single_flight("transaction_service_chains")
 async def _get_supported_chains():
     url = f"{SETTINGS.transaction_service_url}/chains"
     try:
-        async with httpx.AsyncClient(http2=True, timeout=2) as client:
-            response = await client.get(url)
+        response = await get_http_client(url).get(url, timeout=2)
     except Exception as e:
         msg = f"An error occurred while requesting {url}: {e}"
         raise Exception(msg) from e
@@ -200,28 +408,57 @@ async def _get_supported_chains():
     return [Chain.model_validate(chain) for chain in response.json()]
 
 
+@single_flight("transaction_service_abstract_tokens")
 async def _get_supported_abstract_tokens():
     url = f"{SETTINGS.transaction_service_url}/tokens/abstract"
     try:
-        async with httpx.AsyncClient(http2=True, timeout=2) as client:
-            response = await client.get(url)
+        response = await get_http_client(url).get(url, timeout=2)
     except Exception as e:
         msg = f"An error occurred while requesting {url}: {e}"
         raise Exception(msg) from e
     return [AbstractToken.model_validate(token) for token in response.json()]
 
 
+@single_flight("transaction_service_tokens")
 async def _get_supported_tokens(chain_id: str):
     url = f"{SETTINGS.transaction_service_url}/tokens/{chain_id}"
     try:
-        async with httpx.AsyncClient(http2=True, timeout=2) as client:
-            response = await client.get(url)
+        response = await get_http_client(url).get(url, timeout=2)
     except Exception as e:
         msg = f"An error occurred while requesting {url}: {e}"
         raise Exception(msg) from e
     return [Token.model_validate(token) for token in response.json()]
 
 
+async def _fetch_supported_token_dicts(chain_id: str) -> list[dict[str, Any]]:
+    return [token.model_dump() for token in await _get_supported_tokens(chain_id)]
+
+
+async def _fetch_supported_chain_dicts() -> list[dict[str, Any]]:
+    return [chain.model_dump() for chain in await _get_supported_chains()]
+
+
+async def _fetch_supported_abstract_token_dicts() -> list[dict[str, Any]]:
+    return [token.model_dump() for token in await _get_supported_abstract_tokens()]
+
+
+token_catalog = TokenCatalog(_fetch_supported_token_dicts)
+register_metrics("token_catalog", token_catalog.stats)
+
+chain_aliases = AliasCatalog(
+    _fetch_supported_chain_dicts, CHAIN_KEYS, "chain_id", CHAIN_ALIAS_GROUPS
+)
+register_metrics("chain_aliases", chain_aliases.stats)
+
+abstract_token_aliases = AliasCatalog(
+    _fetch_supported_abstract_token_dicts,
+    ABSTRACT_TOKEN_KEYS,
+    "symbol",
+    ABSTRACT_TOKEN_ALIAS_GROUPS,
+)
+register_metrics("abstract_token_aliases", abstract_token_aliases.stats)
+
+
 def _select_optimal_yield_strategy(
     strategies: list[YieldStrategy],
     alpha: float = 1.5,
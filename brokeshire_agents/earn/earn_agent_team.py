@@ -3,10 +3,8 @@ import json
 from collections.abc import Callable
 from typing import Annotated, Any, Literal, get_args
 
-import httpx
 import rich
 from langchain_core.runnables.config import RunnableConfig
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
 from openai.types.chat import (
     ChatCompletionMessageParam,
@@ -24,11 +22,13 @@ from brokeshire_agents.common.agents.schema_validator import (
     convert_to_schema,
     flatten_classified_entities,
 )
+from brokeshire_agents.common.checkpointer import get_checkpointer
 from brokeshire_agents.common.conversation import (
     Conversation,
     conversation_reducer,
     get_context,
 )
+from brokeshire_agents.common.http_client import get_http_client
 from brokeshire_agents.common.transaction import (
     get_best_yield_strategy,
     link_abstract_token,
@@ -482,8 +482,9 @@ class EarnAgentTeam(AgentTeam):
     async def _prepare_transaction_preview(self, request: EarnRequest):
         # NOTE: ERC-7683 Intent standard might be returned here in the future
         url = f"{SETTINGS.transaction_service_url}/earn/deposit/preview"
-        async with httpx.AsyncClient(http2=True, timeout=65) as client:
-            response = await client.post(url, json=request.model_dump())
+        response = await get_http_client(url).post(
+            url, json=request.model_dump(), timeout=65
+        )
 
         response_json = response.json()
         if not response_json["success"]:
@@ -577,7 +578,7 @@ Details: {error_message}"""
         return state.next_node
 
     def _init_graph(self):
-        self._config: RunnableConfig = {"configurable": {"thread_id": 42}}
+        self._config: RunnableConfig = {"configurable": {"thread_id": self._thread_id}}
         self._graph = StateGraph(AgentState)
 
         self._graph.add_node("entity_extractor", self._entity_extractor_action)
@@ -608,7 +609,7 @@ Details: {error_message}"""
         self._graph.add_edge("ask_user", "clarifier")
         self._graph.add_edge("transactor", END)
 
-        checkpointer = MemorySaver()
+        checkpointer = get_checkpointer()
 
         self._app = self._graph.compile(
             checkpointer=checkpointer, interrupt_before=["ask_user"]
@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple
+
+import numpy as np
+
+
+class CachedAnswer(NamedTuple):
+    embedding: np.ndarray
+    answer: str
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """Answers reused for near-duplicate questions that retrieved the same chunks.
+
+    Answers are grouped by the ids of the doc chunks their question retrieved, so a
+    lookup only compares the question's embedding with the few questions of its
+    group. The most similar one is a hit when its cosine similarity reaches
+    `threshold`. Entries expire after `ttl` and the least recently used groups are
+    evicted first once `maxsize` answers are cached.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        threshold: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize <= 0:
+            msg = "Cache maxsize must be positive."
+            raise ValueError(msg)
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._timer = timer
+        self._groups: OrderedDict[tuple[str, ...], list[CachedAnswer]] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, embedding: list[float], chunk_ids: tuple[str, ...]) -> str | None:
+        answers = self._groups.get(chunk_ids)
+        if answers:
+            now = self._timer()
+            live = [answer for answer in answers if answer.expires_at > now]
+            self._expire(chunk_ids, answers, live)
+            if live:
+                similarities = np.stack([a.embedding for a in live]) @ _normalize(
+                    embedding
+                )
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._groups.move_to_end(chunk_ids)
+                    self.hits += 1
+                    return live[best].answer
+
+        self.misses += 1
+        return None
+
+    def set(
+        self, embedding: list[float], chunk_ids: tuple[str, ...], answer: str
+    ) -> None:
+        answers = self._groups.setdefault(chunk_ids, [])
+        answers.append(
+            CachedAnswer(_normalize(embedding), answer, self._timer() + self.ttl)
+        )
+        self._groups.move_to_end(chunk_ids)
+        self._size += 1
+        while self._size > self.maxsize:
+            oldest_ids, oldest = next(iter(self._groups.items()))
+            oldest.pop(0)
+            if not oldest:
+                del self._groups[oldest_ids]
+            self._size -= 1
+            self.evictions += 1
+
+    def bypass(self) -> None:
+        """Counts a question answered without the cache, e.g. one with history."""
+
+        self.bypasses += 1
+
+    def _expire(
+        self,
+        chunk_ids: tuple[str, ...],
+        answers: list[CachedAnswer],
+        live: list[CachedAnswer],
+    ) -> None:
+        expired = len(answers) - len(live)
+        if not expired:
+            return
+
+        self._size -= expired
+        self.expirations += expired
+        if live:
+            self._groups[chunk_ids] = live
+        else:
+            del self._groups[chunk_ids]
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _normalize(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
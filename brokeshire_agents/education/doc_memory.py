@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import sqlite3
+from collections.abc import Awaitable, Callable
+
+import numpy as np
+from rich.console import Console
+
+from brokeshire_agents.education.vector_index import Vector, VectorIndex
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_DIMENSIONS = 1024
+
+Embed = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+console = Console()
+
+
+def chunk_id(chunk: str) -> str:
+    """Id of a doc chunk, derived from its content so unchanged chunks keep it."""
+
+    return hashlib.sha256(chunk.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """Embeddings of doc chunks stored on disk by model, dimensions and chunk id.
+
+    Lookups are meant to run in a thread, see `embed_chunks`.
+    """
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    PRIMARY KEY (model, dimensions, chunk_id)
+                )"""
+            )
+
+    def get_many(
+        self, model: str, dimensions: int, chunk_ids: list[str]
+    ) -> dict[str, list[float]]:
+        placeholders = ", ".join("?" * len(chunk_ids))
+        rows = self._connection.execute(
+            f"""SELECT chunk_id, embedding FROM embeddings
+            WHERE model = ? AND dimensions = ? AND chunk_id IN ({placeholders})""",  # noqa: S608
+            (model, dimensions, *chunk_ids),
+        ).fetchall()
+        return {
+            chunk_id: np.frombuffer(embedding, dtype=np.float32).tolist()
+            for chunk_id, embedding in rows
+        }
+
+    def put_many(
+        self, model: str, dimensions: int, embeddings: dict[str, list[float]]
+    ) -> None:
+        with self._connection:
+            self._connection.executemany(
+                """INSERT OR REPLACE INTO embeddings
+                (model, dimensions, chunk_id, embedding) VALUES (?, ?, ?, ?)""",
+                [
+                    (
+                        model,
+                        dimensions,
+                        chunk_id,
+                        np.asarray(embedding, dtype=np.float32).tobytes(),
+                    )
+                    for chunk_id, embedding in embeddings.items()
+                ],
+            )
+
+
+async def embed_chunks(
+    chunks: list[str],
+    embed: Embed,
+    cache: EmbeddingCache,
+    model: str = EMBEDDING_MODEL,
+    dimensions: int = EMBEDDING_DIMENSIONS,
+) -> list[list[float]]:
+    """Embeddings of the chunks, only calling `embed` for those not in the cache."""
+
+    ids = [chunk_id(chunk) for chunk in chunks]
+    embeddings = await asyncio.to_thread(cache.get_many, model, dimensions, ids)
+
+    missing = {
+        i: chunk for i, chunk in zip(ids, chunks, strict=True) if i not in embeddings
+    }
+    if missing:
+        new_embeddings = dict(
+            zip(missing, await embed(list(missing.values())), strict=True)
+        )
+        await asyncio.to_thread(cache.put_many, model, dimensions, new_embeddings)
+        embeddings.update(new_embeddings)
+
+    return [embeddings[i] for i in ids]
+
+
+async def sync_doc_memory(
+    chunks: list[tuple[str, str]],
+    index: VectorIndex,
+    embed: Embed,
+    cache: EmbeddingCache,
+) -> tuple[int, int]:
+    """
+    Makes the index hold exactly the given (doc, chunk) pairs
+
+    Only chunks missing from the index are embedded and upserted, and chunks no
+    longer in the docs are deleted afterwards, so the index is never left empty.
+    Returns how many vectors were upserted and deleted.
+    """
+
+    docs_by_id = {chunk_id(chunk): (doc, chunk) for doc, chunk in chunks}
+    try:
+        existing_ids = await index.list_ids()
+    except Exception as e:
+        # Without the existing ids nothing can be diffed, so rebuild everything
+        console.print(f"[yellow]Rebuilding doc memory, listing failed: {e}[/yellow]")
+        await index.delete_all()
+        existing_ids = set()
+
+    new_ids = [i for i in docs_by_id if i not in existing_ids]
+    if new_ids:
+        embeddings = await embed_chunks(
+            [docs_by_id[i][1] for i in new_ids], embed, cache
+        )
+        await index.upsert(
+            [
+                Vector(
+                    id=i,
+                    values=embedding,
+                    metadata={"doc": docs_by_id[i][0], "chunk": docs_by_id[i][1]},
+                )
+                for i, embedding in zip(new_ids, embeddings, strict=True)
+            ]
+        )
+
+    removed_ids = sorted(existing_ids - docs_by_id.keys())
+    if removed_ids:
+        await index.delete(removed_ids)
+
+    return len(new_ids), len(removed_ids)
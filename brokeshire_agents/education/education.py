@@ -1,25 +1,53 @@
 import os
 import random
 import typing
-import uuid
+from collections.abc import Callable
 from datetime import UTC, datetime
 
 from langchain_text_splitters import CharacterTextSplitter
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam
-from pinecone import Pinecone
 from rich.console import Console
 
 from brokeshire_agents.common.agent_team import AgentTeam
+from brokeshire_agents.common.ai_inference.early_stop import stop_after_sections
 from brokeshire_agents.common.ai_inference.openrouter import (
     Message,
     Model,
     Role,
-    get_openrouter_response,
+    stream_openrouter_response,
 )
-from brokeshire_agents.common.ai_inference.parse_response import parse_response
+from brokeshire_agents.common.ai_inference.parse_response import (
+    parse_response,
+    parse_tagged,
+    stream_response,
+)
+from brokeshire_agents.common.cache import TTLCache
+from brokeshire_agents.common.metrics import register_metrics
+from brokeshire_agents.education.answer_cache import SemanticAnswerCache
+from brokeshire_agents.education.doc_memory import (
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_MODEL,
+    EmbeddingCache,
+    sync_doc_memory,
+)
+from brokeshire_agents.education.vector_index import create_vector_index
 from brokeshire_agents.settings import SETTINGS
 
+INTENT_SUGGESTION_OPTIONS = [
+    "brokeagi token analysis",
+    "buy CNT1cbvCxBev8WTjmrhKxXFFfnXzBxoaZSNkhKwtpump",
+    "swap usdc on base for arb on arbitrum",
+    "sol price",
+    "who's behind brokeshire hathaway?",
+    "what can you do?",
+    "random token analysis",
+    "design a trading strategy",
+    "send dai",
+    "get yield on rETH",
+    "tell me about the team",
+]
+
 
 class EducationAgentTeam(AgentTeam):
     async def _run_conversation(
@@ -34,26 +62,30 @@ class EducationAgentTeam(AgentTeam):
             )
             for msg in reversed(context or [])
         ]
-        response = await education(message, context=converted_context)
-        intent_suggestion_options = [
-            "brokeagi token analysis",
-            "buy CNT1cbvCxBev8WTjmrhKxXFFfnXzBxoaZSNkhKwtpump",
-            "swap usdc on base for arb on arbitrum",
-            "sol price",
-            "who's behind brokeshire hathaway?",
-            "what can you do?",
-            "random token analysis",
-            "design a trading strategy",
-            "send dai",
-            "get yield on rETH",
-            "tell me about the team",
-        ]
-        intent_suggestions = random.sample(intent_suggestion_options, 3)
+        response = await education(
+            message, context=converted_context, on_delta=self._send_response_delta
+        )
+        intent_suggestions = random.sample(INTENT_SUGGESTION_OPTIONS, 3)
         self._send_team_response(response, intent_suggestions=intent_suggestions)
 
 
-pc = Pinecone(SETTINGS.pinecone_api_key)
-index = pc.Index("brokeshire")
+vector_index = create_vector_index(SETTINGS.vector_index_url, "brokeshire_docs")
+
+QUERY_EMBEDDING_CACHE_MAXSIZE = 10_000
+QUERY_EMBEDDING_CACHE_TTL = 60 * 60 * 24
+ANSWER_CACHE_MAXSIZE = 1_000
+
+query_embedding_cache: TTLCache[str, list[float]] = TTLCache(
+    maxsize=QUERY_EMBEDDING_CACHE_MAXSIZE, ttl=QUERY_EMBEDDING_CACHE_TTL
+)
+register_metrics("query_embedding_cache", query_embedding_cache.stats)
+
+answer_cache = SemanticAnswerCache(
+    maxsize=ANSWER_CACHE_MAXSIZE,
+    ttl=SETTINGS.education_answer_cache_ttl,
+    threshold=SETTINGS.education_answer_similarity_threshold,
+)
+register_metrics("education_answer_cache", answer_cache.stats)
 
 client = AsyncOpenAI(api_key=SETTINGS.openai_api_key)
 
@@ -192,25 +224,53 @@ Help Brokeshire AI (Brokeshire) users with their crypto and DeFi needs, taking a
 console = Console()
 
 
-async def education(user_request: str, context: list[Message] | None = None) -> str:
-    """Return an educational response to the user's request."""
-
+async def embed_texts(texts: list[str]) -> list[list[float]]:
     embedding_response = await client.embeddings.create(
-        model="text-embedding-3-large",
-        input=user_request,
+        model=EMBEDDING_MODEL,
+        input=texts,
         encoding_format="float",
-        extra_body={"dimensions": 1024},
+        extra_body={"dimensions": EMBEDDING_DIMENSIONS},
     )
+    return [
+        embedding.embedding
+        for embedding in sorted(embedding_response.data, key=lambda e: e.index)
+    ]
 
-    query_response = index.query(
-        vector=embedding_response.data[0].embedding,
-        top_k=3,
-        include_metadata=True,
-        namespace="brokeshire_docs",
-    )
+
+async def embed_query(user_request: str) -> list[float]:
+    """Embedding of a request, cached by its case and whitespace insensitive text."""
+
+    key = " ".join(user_request.lower().split())
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = (await embed_texts([user_request]))[0]
+        query_embedding_cache.set(key, embedding)
+    return embedding
+
+
+async def education(
+    user_request: str,
+    context: list[Message] | None = None,
+    on_delta: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Return an educational response to the user's request
+
+    The response is passed to `on_delta` as it's generated. Requests without
+    conversation history reuse the answer of a near-duplicate request that
+    retrieved the same doc chunks.
+    """
+
+    embedding = await embed_query(user_request)
+    matches = await vector_index.query(embedding, top_k=3)
+    chunk_ids = tuple(match["id"] for match in matches)
+    if context:
+        answer_cache.bypass()
+    elif (cached_answer := answer_cache.get(embedding, chunk_ids)) is not None:
+        return cached_answer
 
     search_results = ""
-    for i, context_match in enumerate(query_response["matches"]):
+    for i, context_match in enumerate(matches):
         search_results = (
             search_results
             + f"\n\n## Search Result {i + 1}\n```\n{context_match['metadata']['chunk']}\n```"
@@ -229,8 +289,17 @@ async def education(user_request: str, context: list[Message] | None = None) ->
     ]
     model: Model = "deepseek/deepseek-r1-distill-llama-70b"
     try:
-        chat_completion = await get_openrouter_response(messages, [model])
-        response = chat_completion.choices[0].message.content
+        response = await stream_response(
+            stop_after_sections(
+                stream_openrouter_response(messages, [model]),
+                ["response"],
+                "education",
+                tags=["response_planning"],
+            ),
+            "response",
+            on_delta,
+            thinking_tag="response_planning",
+        )
     except Exception as e:
         console.print(f"[red]Error getting OpenRouter response: {e!s}[/red]")
         return f"I apologize, but I encountered an error while processing your request: {e!s}"
@@ -239,6 +308,17 @@ async def education(user_request: str, context: list[Message] | None = None) ->
     try:
         result = parse_response(response, "response_planning", "response")
         parsed_response = result[0]
+        # Only complete answers are reused, not a cut off or fallback one
+        response_section = parse_tagged(
+            response, {"response_planning", "response", "think"}
+        ).section("response")
+        if (
+            not context
+            and parsed_response
+            and response_section is not None
+            and response_section.closed
+        ):
+            answer_cache.set(embedding, chunk_ids, parsed_response)
         return parsed_response
     except Exception as e:
         console.print(f"[red]Error parsing response: {e!s}[/red]")
@@ -246,10 +326,7 @@ async def education(user_request: str, context: list[Message] | None = None) ->
 
 
 async def upload_doc_memory():
-    try:
-        index.delete(delete_all=True, namespace="brokeshire_docs")
-    except Exception as e:
-        print(f"Namespace 'brokeshire_docs' not found to delete.\n{e}")
+    """Syncs the docs' chunks to the index, embedding only new or changed ones."""
 
     doc_list = [
         "Community Manifesto.md",
@@ -258,30 +335,20 @@ async def upload_doc_memory():
         "Project Overview.md",
         "Team.md",
     ]
+    text_splitter = CharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name="cl100k_base", chunk_size=256, chunk_overlap=32
+    )
+    chunks: list[tuple[str, str]] = []
     for doc in doc_list:
         with open(f"brokeshire_agents/brokeshire_ai_docs/{doc}") as f:
-            doc_text = f.read()
-
-            text_splitter = CharacterTextSplitter.from_tiktoken_encoder(
-                encoding_name="cl100k_base", chunk_size=256, chunk_overlap=32
-            )
-            chunks = text_splitter.split_text(doc_text)
+            chunks.extend((doc, chunk) for chunk in text_splitter.split_text(f.read()))
 
-            embedding_response = await client.embeddings.create(
-                model="text-embedding-3-large",
-                input=chunks,
-                encoding_format="float",
-                extra_body={"dimensions": 1024},
-            )
-
-            vectors = []
-            for embedding in embedding_response.data:
-                vectors.append(
-                    {
-                        "id": str(uuid.uuid4()),
-                        "values": embedding.embedding,
-                        "metadata": {"chunk": chunks[embedding.index]},
-                    }
-                )
-
-            index.upsert(vectors, "brokeshire_docs")
+    upserted, deleted = await sync_doc_memory(
+        chunks,
+        vector_index,
+        embed_texts,
+        EmbeddingCache(SETTINGS.embedding_cache_path),
+    )
+    console.print(
+        f"[green]Synced doc memory: {upserted} chunks upserted, {deleted} deleted[/green]"
+    )
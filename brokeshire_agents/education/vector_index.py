@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from functools import cached_property
+from pathlib import Path
+from typing import Any, TypedDict
+
+import numpy as np
+from pinecone import Pinecone
+
+from brokeshire_agents.settings import SETTINGS
+
+PINECONE_URL_PREFIX = "pinecone://"
+LOCAL_URL_PREFIX = "local:///"
+# Pinecone's limits per request
+UPSERT_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1_000
+
+
+class Vector(TypedDict):
+    id: str
+    values: list[float]
+    metadata: dict[str, Any]
+
+
+class Match(TypedDict):
+    id: str
+    score: float
+    metadata: dict[str, Any]
+
+
+class VectorIndex(ABC):
+    """Namespace of a vector index that the education docs are stored in."""
+
+    @abstractmethod
+    async def query(self, vector: list[float], top_k: int) -> list[Match]:
+        """Returns the `top_k` most similar vectors, most similar first."""
+
+    @abstractmethod
+    async def list_ids(self) -> set[str]:
+        """Returns the ids of every vector in the namespace."""
+
+    @abstractmethod
+    async def upsert(self, vectors: list[Vector]) -> None:
+        """Inserts vectors, replacing those with the same ids."""
+
+    @abstractmethod
+    async def delete(self, ids: list[str]) -> None:
+        """Deletes the vectors with the given ids."""
+
+    @abstractmethod
+    async def delete_all(self) -> None:
+        """Deletes every vector in the namespace."""
+
+
+class PineconeVectorIndex(VectorIndex):
+    """Namespace of a Pinecone index.
+
+    The index is only connected to when first used. The Pinecone client is
+    synchronous, so its calls run in a thread to keep them from blocking the event
+    loop.
+    """
+
+    def __init__(self, index_name: str, namespace: str):
+        self._index_name = index_name
+        self._namespace = namespace
+
+    @cached_property
+    def _index(self) -> Any:
+        return Pinecone(SETTINGS.pinecone_api_key).Index(self._index_name)
+
+    async def query(self, vector: list[float], top_k: int) -> list[Match]:
+        response = await asyncio.to_thread(
+            lambda: self._index.query(
+                vector=vector,
+                top_k=top_k,
+                include_metadata=True,
+                namespace=self._namespace,
+            )
+        )
+        return [
+            Match(id=match["id"], score=match["score"], metadata=match["metadata"])
+            for match in response["matches"]
+        ]
+
+    async def list_ids(self) -> set[str]:
+        def list_ids():
+            return {
+                vector_id
+                for page in self._index.list(namespace=self._namespace)
+                for vector_id in page
+            }
+
+        return await asyncio.to_thread(list_ids)
+
+    async def upsert(self, vectors: list[Vector]) -> None:
+        for i in range(0, len(vectors), UPSERT_BATCH_SIZE):
+            await asyncio.to_thread(
+                lambda batch: self._index.upsert(
+                    vectors=batch, namespace=self._namespace
+                ),
+                vectors[i : i + UPSERT_BATCH_SIZE],
+            )
+
+    async def delete(self, ids: list[str]) -> None:
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            await asyncio.to_thread(
+                lambda batch: self._index.delete(ids=batch, namespace=self._namespace),
+                ids[i : i + DELETE_BATCH_SIZE],
+            )
+
+    async def delete_all(self) -> None:
+        await asyncio.to_thread(
+            lambda: self._index.delete(delete_all=True, namespace=self._namespace)
+        )
+
+
+class LocalVectorIndex(VectorIndex):
+    """In-process index of a few thousand vectors at most, such as the docs' chunks.
+
+    Vectors are normalized into a matrix memory-mapped from `<namespace>.npy` in the
+    directory, next to their ids and metadata in `<namespace>.json`. A query is one
+    matrix product and an argpartition, scoring by cosine similarity like Pinecone.
+    """
+
+    def __init__(self, directory: str, namespace: str):
+        self._matrix_path = Path(directory) / f"{namespace}.npy"
+        self._records_path = Path(directory) / f"{namespace}.json"
+        self._matrix: np.ndarray | None = None
+        self._records: list[tuple[str, dict[str, Any]]] = []
+
+    def _load(self) -> np.ndarray:
+        if self._matrix is None:
+            if self._matrix_path.exists() and self._records_path.exists():
+                self._matrix = np.load(self._matrix_path, mmap_mode="r")
+                with self._records_path.open() as f:
+                    self._records = [tuple(record) for record in json.load(f)]
+            else:
+                self._matrix = np.empty((0, 0), dtype=np.float32)
+                self._records = []
+        return self._matrix
+
+    def _save(self, matrix: np.ndarray, records: list[tuple[str, dict[str, Any]]]):
+        # Written aside and swapped in, so a crash never leaves half an index
+        self._matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        matrix_tmp = self._matrix_path.with_suffix(".npy.tmp")
+        records_tmp = self._records_path.with_suffix(".json.tmp")
+        with matrix_tmp.open("wb") as f:
+            np.save(f, matrix)
+        with records_tmp.open("w") as f:
+            json.dump(records, f)
+        os.replace(matrix_tmp, self._matrix_path)
+        os.replace(records_tmp, self._records_path)
+        self._matrix = np.load(self._matrix_path, mmap_mode="r")
+        self._records = records
+
+    async def query(self, vector: list[float], top_k: int) -> list[Match]:
+        matrix = self._load()
+        k = min(top_k, len(self._records))
+        if k <= 0:
+            return []
+
+        scores = matrix @ _normalize(np.asarray([vector], dtype=np.float32))[0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            Match(
+                id=self._records[i][0],
+                score=float(scores[i]),
+                metadata=self._records[i][1],
+            )
+            for i in top
+        ]
+
+    async def list_ids(self) -> set[str]:
+        self._load()
+        return {vector_id for vector_id, _ in self._records}
+
+    async def upsert(self, vectors: list[Vector]) -> None:
+        if not vectors:
+            return
+
+        matrix = self._load()
+        rows = {vector_id: i for i, (vector_id, _) in enumerate(self._records)}
+        records = list(self._records)
+        new_rows = []
+        for vector in vectors:
+            record = (vector["id"], vector["metadata"])
+            if vector["id"] in rows:
+                records[rows[vector["id"]]] = record
+            else:
+                rows[vector["id"]] = len(records)
+                records.append(record)
+            new_rows.append(rows[vector["id"]])
+
+        values = _normalize(np.asarray([v["values"] for v in vectors], np.float32))
+        updated = np.zeros((len(records), values.shape[1]), dtype=np.float32)
+        if len(matrix):
+            updated[: len(matrix)] = matrix
+        updated[new_rows] = values
+        await asyncio.to_thread(self._save, updated, records)
+
+    async def delete(self, ids: list[str]) -> None:
+        matrix = self._load()
+        removed = set(ids)
+        kept = [
+            i
+            for i, (vector_id, _) in enumerate(self._records)
+            if vector_id not in removed
+        ]
+        await asyncio.to_thread(
+            self._save,
+            np.asarray(matrix[kept], dtype=np.float32),
+            [self._records[i] for i in kept],
+        )
+
+    async def delete_all(self) -> None:
+        await asyncio.to_thread(self._save, np.empty((0, 0), dtype=np.float32), [])
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def create_vector_index(url: str, namespace: str) -> VectorIndex:
+    """Creates an index from a URL, `pinecone://<index>` or `local:///<directory>`."""
+
+    if url.startswith(PINECONE_URL_PREFIX):
+        return PineconeVectorIndex(url.removeprefix(PINECONE_URL_PREFIX), namespace)
+    if url.startswith(LOCAL_URL_PREFIX):
+        return LocalVectorIndex(url.removeprefix(LOCAL_URL_PREFIX), namespace)
+
+    msg = f"Unsupported vector index URL: {url}"
+    raise ValueError(msg)
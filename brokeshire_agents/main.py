@@ -1,5 +1,6 @@
 import asyncio
 from asyncio import Queue
+from contextlib import asynccontextmanager
 from typing import Any, Literal, cast
 
 from fastapi import FastAPI, Request
@@ -8,14 +9,55 @@ from pydantic import BaseModel
 from rich import print
 from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 
-from brokeshire_agents.agent_router.intent_classifier import INTENT
+from brokeshire_agents.agent_router.intent_classifier import (
+    INTENT,
+    warm_intent_cache,
+)
 from brokeshire_agents.agent_router.router import AgentTeamSessionManager, Router
 from brokeshire_agents.bg_tasks import add_bg_task, delete_task
 from brokeshire_agents.common.agent_team import ExpressionSuggestion
+from brokeshire_agents.common.checkpointer import close_checkpointer
+from brokeshire_agents.common.http_client import close_http_clients
+from brokeshire_agents.common.metrics import collect_metrics
+from brokeshire_agents.common.transaction import (
+    abstract_token_aliases,
+    chain_aliases,
+)
 from brokeshire_agents.common.types import MessageType
-from brokeshire_agents.education.education import upload_doc_memory
+from brokeshire_agents.education.education import (
+    INTENT_SUGGESTION_OPTIONS,
+    upload_doc_memory,
+)
+from brokeshire_agents.token_tech_analysis.trending_snapshot import (
+    trending_prefetcher,
+)
+
+# Utterances the bots suggest to users, so suggestion clicks skip the LLM
+PREWARMED_UTTERANCES = [*INTENT_SUGGESTION_OPTIONS, "< Go back"]
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    add_bg_task(asyncio.create_task(upload_doc_memory()))
+    add_bg_task(asyncio.create_task(warm_intent_cache(PREWARMED_UTTERANCES)))
+    periodic_tasks = [
+        asyncio.create_task(agent_team_session_manager.reap_idle_sessions_forever()),
+        # Preload the alias indexes so chain and token linking never waits on them
+        asyncio.create_task(chain_aliases.refresh_forever()),
+        asyncio.create_task(abstract_token_aliases.refresh_forever()),
+        # Keeps trending token metrics warm for the token curator and broke_twitter
+        asyncio.create_task(trending_prefetcher.refresh_forever()),
+    ]
+    for task in periodic_tasks:
+        add_bg_task(task)
+    yield
+    for task in periodic_tasks:
+        task.cancel()
+    await close_http_clients()
+    close_checkpointer()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 class MessageContext(BaseModel):
@@ -47,7 +89,7 @@ def context_to_messages(
     ]
 
 
-ResponseStatus = Literal["done", "processing", "error"]
+ResponseStatus = Literal["done", "processing", "delta", "error"]
 
 
 class Response(BaseModel):
@@ -65,8 +107,12 @@ def read_root():
     return {"message": "Hello World"}
 
 
+@app.get("/v1/metrics")
+def read_metrics():
+    return collect_metrics()
+
+
 agent_team_session_manager = AgentTeamSessionManager()
-add_bg_task(asyncio.create_task(upload_doc_memory()))
 
 ONE_MINUTE_TIMEOUT = 60
 
@@ -89,6 +135,10 @@ def event_router(
         response = Response(status="processing", message=activity)
         message_queue.put_nowait(response)
 
+    def on_response_delta(delta: str):
+        # Parts of the response message as it's generated, before the `done` event
+        message_queue.put_nowait(Response(status="delta", message=delta))
+
     session_id = agent_team_session_manager.get_session_id(
         body.user_chat_id, thread_id, body.client_id
     )
@@ -115,6 +165,7 @@ def event_router(
                 context=context_to_messages(body.context),
                 user_address=body.user_address,
                 required_route=body.required_route,
+                response_delta=on_response_delta,
             )
             response = Response(
                 status="done",
@@ -132,32 +183,40 @@ def event_router(
     async def event_generator():
         task = asyncio.create_task(send_message())
         add_bg_task(task)
-        while True:
-            if await request.is_disconnected():
-                break
-
-            try:
-                async with asyncio.timeout(ONE_MINUTE_TIMEOUT):
-                    response = await message_queue.get()
-            except TimeoutError:
-                delete_task(task)
-                agent_team_session_manager.remove_session(session_id)
-                yield ServerSentEvent(
-                    {"message": "Operation aborted due to timeout"}, event="error"
-                )
-                return
-
-            json = response.model_dump_json()
-            match response.status:
-                case "done":
-                    yield ServerSentEvent(json, event="done")
-                    break
-                case "processing":
-                    yield ServerSentEvent(json, event="activity")
-                case "error":
-                    yield ServerSentEvent(json, event="error")
+        try:
+            while True:
+                if await request.is_disconnected():
                     break
 
+                try:
+                    async with asyncio.timeout(ONE_MINUTE_TIMEOUT):
+                        response = await message_queue.get()
+                except TimeoutError:
+                    delete_task(task)
+                    agent_team_session_manager.remove_session(session_id)
+                    yield ServerSentEvent(
+                        {"message": "Operation aborted due to timeout"}, event="error"
+                    )
+                    return
+
+                json = response.model_dump_json()
+                match response.status:
+                    case "done":
+                        yield ServerSentEvent(json, event="done")
+                        break
+                    case "processing":
+                        yield ServerSentEvent(json, event="activity")
+                    case "delta":
+                        yield ServerSentEvent(json, event="delta")
+                    case "error":
+                        yield ServerSentEvent(json, event="error")
+                        break
+        finally:
+            # Stop any in-flight work (e.g. intent classification) for a request
+            # that is no longer being listened to
+            if not task.done():
+                task.cancel()
+
     # Select route for thread
     # Route to proper agent team
     # send activiy updates from agent team
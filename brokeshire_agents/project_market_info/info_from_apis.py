@@ -2,11 +2,12 @@ import json
 from collections.abc import Callable, Iterable
 from typing import Any, Literal, TypeVar
 
-import httpx
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam
 from pydantic import BaseModel
 
+from brokeshire_agents.common.http_client import get_http_client
+from brokeshire_agents.common.response_cache import cached_response
 from brokeshire_agents.settings import SETTINGS
 
 Sentiment = Literal["positive", "neutral", "negative", "unknown"]
@@ -20,6 +21,10 @@ openai_settings = {
     "seed": 1,
 }
 
+# Coin data carries prices, while search results only map names to ids
+COINGECKO_ROUTE_TTLS = {"/search": 60 * 60}
+COINGECKO_DEFAULT_TTL = 30
+
 
 class ProjectInfo(BaseModel):
     # coingecko
@@ -250,6 +255,17 @@ async def information_from_token_apis(token_queried: TokenQueried) -> ProjectInf
     return await search_coingecko_with_id(coingecko_id)
 
 
+def _coingecko_key(
+    route: str, parameters: dict[str, Any] | None = None
+) -> tuple[str, tuple[tuple[str, Any], ...]]:
+    return route, tuple(sorted((parameters or {}).items()))
+
+
+def _coingecko_ttl(route: str, parameters: dict[str, Any] | None = None) -> float:
+    return COINGECKO_ROUTE_TTLS.get(route, COINGECKO_DEFAULT_TTL)
+
+
+@cached_response("coingecko", _coingecko_ttl, _coingecko_ttl, key=_coingecko_key)
 async def query_coingecko(route: str, parameters: dict[str, Any] | None = None) -> Any:
     """It queries coingecko API in a given route depending on the API key provided."""
 
@@ -258,10 +274,12 @@ async def query_coingecko(route: str, parameters: dict[str, Any] | None = None)
         "x-cg-demo-api-key" if SETTINGS.use_coingecko_pro_api else "x_cg_pro_api_key"
     )
     url = f"https://{api_prefix}.coingecko.com/api/v3{route}"
-    async with httpx.AsyncClient(http2=True) as client:
-        response = await client.get(
-            url, params=parameters, headers={header_name: SETTINGS.coingecko_api_key}
-        )
+    response = await get_http_client(url).get(
+        url,
+        params=parameters,
+        headers={header_name: SETTINGS.coingecko_api_key},
+        timeout=5.0,
+    )
     if not response.is_success:
         msg = "Failed querying coingecko"
         raise ValueError(msg)
@@ -274,8 +292,7 @@ async def query_gecko_terminal(
     """It queries gecko terminal for dex information."""
 
     url = f"https://api.geckoterminal.com/api/v2{route}"
-    async with httpx.AsyncClient(http2=True) as client:
-        response = await client.get(url, params=parameters)
+    response = await get_http_client(url).get(url, params=parameters, timeout=5.0)
     if not response.is_success:
         msg = "Failed querying gecko terminal"
         raise ValueError(msg)
@@ -284,11 +301,10 @@ async def query_gecko_terminal(
 
 async def query_token_in_dexscreener(tokenAddressOrSymbol: str):
     # catch if its a contract address
-    async with httpx.AsyncClient(http2=True) as client:
-        response = await client.get(
-            "https://api.dexscreener.com/latest/dex/search",
-            params={"q": tokenAddressOrSymbol},
-        )
+    url = "https://api.dexscreener.com/latest/dex/search"
+    response = await get_http_client(url).get(
+        url, params={"q": tokenAddressOrSymbol}, timeout=5.0
+    )
 
     token_information = get_largest_by_volume(
         response.json(),
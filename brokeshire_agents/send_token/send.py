@@ -4,7 +4,6 @@ import tempfile
 from collections.abc import Awaitable, Callable
 from typing import Any
 
-import httpx
 from autogen import (
     Agent,
     AssistantAgent,
@@ -19,6 +18,7 @@ from openai.types.chat import ChatCompletionMessageParam
 from pydantic import BaseModel, ValidationError
 
 from brokeshire_agents.common.agent_team import AgentTeam
+from brokeshire_agents.common.http_client import get_http_client
 from brokeshire_agents.common.transaction import link_chain, link_token
 from brokeshire_agents.common.utils import format_transaction_url
 from brokeshire_agents.common.validators import PositiveAmount
@@ -385,10 +385,9 @@ class SendTokenAgentTeam(AgentTeam):
                     raise ValueError(msg)
 
                 url = f"{SETTINGS.transaction_service_url}/send/prepare"
-                async with httpx.AsyncClient(http2=True, timeout=65) as client:
-                    response = await client.post(
-                        url, json=self._transaction_request.model_dump()
-                    )
+                response = await get_http_client(url).post(
+                    url, json=self._transaction_request.model_dump(), timeout=65
+                )
 
                 response_json = response.json()
                 try:
@@ -30,6 +30,34 @@ class Environment(BaseSettings):
     use_coingecko_pro_api: bool = False
     disable_transaction_signing_url: bool = False
     birdeye_api_key: SensitiveField
+    local_intent_confidence_threshold: float = 0.9
+    local_strict_intent_confidence_threshold: float = 0.97
+    max_agent_team_sessions: int = 10_000
+    agent_team_session_idle_ttl: float = 60 * 30
+    # Where sessions are shared between workers, `memory://` or `sqlite:///<path>`
+    session_store_url: str = "sqlite:///sessions.db"
+    # Where agent team graphs are checkpointed, `memory://` or `sqlite:///<path>`.
+    # Conversations are only resumed after a restart when both this and the session
+    # store, which keeps the thread ids of checkpoints, are on disk.
+    checkpointer_url: str = "sqlite:///checkpoints.db"
+    checkpoint_retention: int = 20
+    checkpoint_ttl: float = 60 * 60 * 24
+    # Where market data responses are cached, `memory://` or `sqlite:///<path>`
+    response_cache_url: str = "memory://"
+    response_cache_size: int = 2_000
+    # Networks whose trending pools are ingested on top of the global list
+    trending_networks: list[str] = ["solana", "base", "eth", "bsc"]
+    trending_pages: int = 2
+    trending_concurrency: int = 4
+    # Where education docs are retrieved from, `pinecone://<index>` or
+    # `local:///<directory>` for an in-process index
+    vector_index_url: str = "pinecone://brokeshire"
+    # SQLite file the education doc embeddings are cached in across restarts
+    embedding_cache_path: str = "embeddings.db"
+    # Education answers are reused for questions at least this similar that
+    # retrieved the same doc chunks, unless they come with conversation history
+    education_answer_similarity_threshold: float = 0.95
+    education_answer_cache_ttl: float = 60 * 60
 
 
 SETTINGS = Environment()  # type: ignore
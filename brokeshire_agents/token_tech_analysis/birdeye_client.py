@@ -1,11 +1,14 @@
 from typing import TypedDict
 
-import httpx
-
+from brokeshire_agents.common.http_client import get_http_client
+from brokeshire_agents.common.response_cache import cached_response
 from brokeshire_agents.settings import SETTINGS
 
 BIRDEYE_BASE_URL = "https://public-api.birdeye.so"
 BIRDEYE_API_KEY = SETTINGS.birdeye_api_key
+# Security data such as authorities and holders rarely changes
+SECURITY_TTL = 60 * 60 * 6
+SECURITY_STALE_TTL = 60 * 60
 
 
 class PreMarketHolder(TypedDict):
@@ -67,23 +70,25 @@ class BirdeyeErrorResponse(TypedDict):
     message: str
 
 
+@cached_response("birdeye_security", SECURITY_TTL, SECURITY_STALE_TTL)
 async def query_birdeye_security(
     token_address: str,
 ) -> BirdeyeResponse | BirdeyeErrorResponse:
     """Query Birdeye API for token security information."""
     headers = {"X-API-KEY": BIRDEYE_API_KEY, "accept": "application/json"}
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{BIRDEYE_BASE_URL}/defi/token_security",
-            params={"address": token_address},
-            headers=headers,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        if not data.get("success"):
-            msg = f"Birdeye API error: {data.get('message', 'Unknown error')}"
-            raise ValueError(msg)
-
-        return data
+    url = f"{BIRDEYE_BASE_URL}/defi/token_security"
+    response = await get_http_client(url).get(
+        url,
+        params={"address": token_address},
+        headers=headers,
+        timeout=5.0,
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    if not data.get("success"):
+        msg = f"Birdeye API error: {data.get('message', 'Unknown error')}"
+        raise ValueError(msg)
+
+    return data
@@ -1,19 +1,20 @@
 import asyncio
-from collections.abc import Sequence
+from collections.abc import Awaitable
 from datetime import UTC, datetime
-from functools import partial
-from math import log
-from typing import Any, Tuple, TypedDict, Union
+from typing import Any, Tuple, TypeVar, Union
 
+import numpy as np
 from rich.console import Console
 
+from brokeshire_agents.common.single_flight import single_flight
 from brokeshire_agents.common.transaction import Token, link_token
+from brokeshire_agents.settings import SETTINGS
 from brokeshire_agents.token_tech_analysis.birdeye_client import query_birdeye_security
 from brokeshire_agents.token_tech_analysis.dex_screener_client import (
-    query_dex_screener,
+    query_dex_screener_orders,
+    query_dex_screener_pairs,
 )
 from brokeshire_agents.token_tech_analysis.gecko_terminal_client import (
-    GeckoTerminalResponse,
     PoolData,
     PoolDataWithScore,
     query_gecko_terminal,
@@ -28,24 +29,32 @@ from brokeshire_agents.token_tech_analysis.token_metrics import (
 console = Console(force_terminal=True)
 
 SINGLE_TOKEN_PROBABILITY = 0.7
-
-
-class ComputedValues(TypedDict):
-    pool_created_at: float
-    volume_usd: float
-    reserve_usd: float
-    price_change_1h: float
-    price_change_6h: float
-    price_change_24h: float
-    transactions_count: int
-
-
-class TokenScore(TypedDict):
-    item: PoolData
-    computed_values: ComputedValues
-    score: float
-
-
+TRENDING_TOKENS_LIMIT = 10
+
+# Seconds each upstream lookup of `build_token_metrics` may take
+DEX_SCREENER_PAIRS_DEADLINE = 10.0
+DEX_SCREENER_ORDERS_DEADLINE = 5.0
+BIRDEYE_SECURITY_DEADLINE = 5.0
+# DexScreener chain ids of the GeckoTerminal networks whose ids differ
+DEX_SCREENER_CHAIN_IDS = {
+    "eth": "ethereum",
+    "polygon_pos": "polygon",
+    "avax": "avalanche",
+}
+
+T = TypeVar("T")
+
+# Weights of the features returned by `_pool_features`, with the price changes
+# sharing 15% between the 1h, 6h and 24h windows
+FEATURE_WEIGHTS = np.array([0.35, 0.25, 0.15, 0.075, 0.045, 0.03, 0.1])
+LOG_FEATURES = [1, 2, 6]
+PRICE_CHANGE_FEATURES = [3, 4, 5]
+MIN_PRICE_CHANGE = -100
+MAX_PRICE_CHANGE = 500
+SCORE_EPSILON = 1e-6
+
+
+@single_flight("find_top_pools")
 async def find_top_pools(search_term: str, limit: int = 3) -> list[PoolData]:
     """Find top pools by volume for a given search term."""
     console.print(f"[yellow]Searching for token: {search_term}[/yellow]")
@@ -57,10 +66,22 @@ async def find_top_pools(search_term: str, limit: int = 3) -> list[PoolData]:
         msg = f"No pools found for search term: {search_term}"
         raise Exception(msg)
 
-    # Create a dictionary to store the highest volume pool for each base token
+    # Sort unique pools by volume and take top N
+    sorted_pools = sorted(
+        _unique_by_base_token(response.data),
+        key=lambda pool: pool.attributes.volume_usd.h24 or 0,
+        reverse=True,
+    )[:limit]
+
+    return sorted_pools
+
+
+def _unique_by_base_token(pools: list[PoolData]) -> list[PoolData]:
+    """The highest volume pool of each base token, in order of first appearance."""
+
     token_pools: dict[str, PoolData] = {}
 
-    for pool in response.data:
+    for pool in pools:
         base_token_id = pool.relationships.base_token.data.id
         current_volume = pool.attributes.volume_usd.h24 or 0
 
@@ -70,32 +91,122 @@ async def find_top_pools(search_term: str, limit: int = 3) -> list[PoolData]:
         ):
             token_pools[base_token_id] = pool
 
-    # Sort unique pools by volume and take top N
-    sorted_pools = sorted(
-        token_pools.values(),
-        key=lambda pool: pool.attributes.volume_usd.h24 or 0,
-        reverse=True,
-    )[:limit]
+    return list(token_pools.values())
 
-    return sorted_pools
 
+async def fetch_trending_pools(
+    networks: list[str] | None = None,
+    pages: int | None = None,
+    concurrency: int | None = None,
+) -> list[PoolData]:
+    """
+    Trending pools of every page of the global and per-network lists
 
-async def build_token_metrics(pool: PoolData) -> TokenMetrics:
-    """Build TokenMetrics objects for a list of pools."""
+    At most `concurrency` pages are fetched at once, and the GeckoTerminal client
+    keeps to its rate limit. Pages that fail are skipped. Pools are deduplicated by
+    base token, keeping the highest volume one.
+    """
 
-    base_token = pool.relationships.base_token.data
-    chain_name, token_address = (
-        base_token.id.split("_", 1)
-        if "_" in base_token.id
-        else ("Chain unknown", base_token.id)
+    networks = SETTINGS.trending_networks if networks is None else networks
+    pages = SETTINGS.trending_pages if pages is None else pages
+    semaphore = asyncio.Semaphore(
+        SETTINGS.trending_concurrency if concurrency is None else concurrency
     )
+    routes = [
+        "/networks/trending_pools",
+        *(f"/networks/{network}/trending_pools" for network in networks),
+    ]
+
+    async def fetch_page(route: str, page: int) -> list[PoolData]:
+        async with semaphore:
+            return (await query_gecko_terminal(route, {"page": page})).data
+
+    results = await asyncio.gather(
+        *(fetch_page(route, page) for route in routes for page in range(1, pages + 1)),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if len(errors) == len(results):
+        raise errors[0]
+    for error in errors:
+        console.print(f"[yellow]Failed fetching trending pools: {error}[/yellow]")
+
+    return _unique_by_base_token(
+        [pool for result in results if isinstance(result, list) for pool in result]
+    )
+
+
+def _pool_network_and_address(pool: PoolData) -> tuple[str | None, str]:
+    """GeckoTerminal network id and base token address of a pool."""
+
+    base_token_id = pool.relationships.base_token.data.id
+    network = pool.relationships.network
+    if network is not None and base_token_id.startswith(f"{network.data.id}_"):
+        return network.data.id, base_token_id.removeprefix(f"{network.data.id}_")
+    if "_" in base_token_id:
+        network_id, token_address = base_token_id.split("_", 1)
+        return network_id, token_address
+    return None, base_token_id
+
+
+async def _with_deadline(
+    source: str, lookup: Awaitable[T], deadline: float
+) -> T | BaseException:
+    try:
+        return await asyncio.wait_for(lookup, deadline)
+    except Exception as e:
+        console.print(f"[yellow]{source} lookup failed: {e!r}[/yellow]")
+        return e
 
-    dex_result = await query_dex_screener(token_address)
-    if chain_name == "solana":
-        birdeye_result = await query_birdeye_security(token_address)
-    else:
-        birdeye_result = None
 
+async def _no_lookup() -> None:
+    return None
+
+
+async def build_token_metrics(pool: PoolData) -> TokenMetrics:
+    """
+    Build the TokenMetrics of a pool from GeckoTerminal, DexScreener and Birdeye
+
+    The DexScreener pairs and orders, and the Birdeye security data of Solana
+    tokens, are looked up at once using the pool's network. Each lookup has its own
+    deadline, and the metrics are built from whichever of them succeeded.
+    """
+
+    network, token_address = _pool_network_and_address(pool)
+    dex_screener_chain = DEX_SCREENER_CHAIN_IDS.get(network or "", network)
+
+    pairs_lookup = _with_deadline(
+        "DexScreener pairs",
+        query_dex_screener_pairs(token_address),
+        DEX_SCREENER_PAIRS_DEADLINE,
+    )
+    orders_lookup = (
+        _with_deadline(
+            "DexScreener orders",
+            query_dex_screener_orders(dex_screener_chain, token_address),
+            DEX_SCREENER_ORDERS_DEADLINE,
+        )
+        if dex_screener_chain is not None
+        else _no_lookup()
+    )
+    birdeye_lookup = (
+        _with_deadline(
+            "Birdeye security",
+            query_birdeye_security(token_address),
+            BIRDEYE_SECURITY_DEADLINE,
+        )
+        if network == "solana"
+        else _no_lookup()
+    )
+    pairs, orders, birdeye_result = await asyncio.gather(
+        pairs_lookup, orders_lookup, birdeye_lookup
+    )
+
+    dex_result = (
+        (pairs, None if isinstance(orders, BaseException) else orders)
+        if not isinstance(pairs, BaseException)
+        else None
+    )
     return create_token_metrics(pool, dex_result, birdeye_result)
 
 
@@ -126,289 +237,126 @@ async def build_token_metrics(pool: PoolData) -> TokenMetrics:
     return Token.model_validate(token_match["entity"])"""
 
 
-def get_top_tokens(pool_data: list[PoolData]) -> list[PoolDataWithScore]:
-    epsilon = 1e-6
+def _safe_parse_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0
 
-    def normalize(value: float, min_val: float, max_val: float) -> float:
-        return 0 if max_val - min_val == 0 else (value - min_val) / (max_val - min_val)
 
-    def get_percentile(sorted_values: Sequence[float], percentile: float) -> float:
-        if not sorted_values:
-            return 0
-        index = (percentile / 100) * (len(sorted_values) - 1)
-        lower = int(index)
-        upper = min(lower + 1, len(sorted_values) - 1)
-        weight = index % 1
+def _pool_features(pool: PoolData) -> list[float]:
+    """Raw values of a pool that `get_top_tokens` scores, as in `FEATURE_WEIGHTS`."""
 
-        if upper >= len(sorted_values):
-            return sorted_values[lower]
-        return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+    attrs = pool.attributes
+    pool_created_at = (
+        datetime.fromisoformat(attrs.pool_created_at.replace("Z", "+00:00")).timestamp()
+        * 1000
+    )
+    transactions = attrs.transactions.h24 if attrs.transactions else {}
+    transactions_count = (
+        transactions.get("buys", 0) + transactions.get("sells", 0)
+        if isinstance(transactions, dict)
+        else 0
+    )
+    return [
+        pool_created_at,
+        _safe_parse_float(attrs.volume_usd.h24) + SCORE_EPSILON,
+        _safe_parse_float(attrs.reserve_in_usd) + SCORE_EPSILON,
+        _safe_parse_float(attrs.price_change_percentage.h1),
+        _safe_parse_float(attrs.price_change_percentage.h6),
+        _safe_parse_float(attrs.price_change_percentage.h24),
+        transactions_count,
+    ]
 
-    def safe_parse_float(value: Any) -> float:
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return 0
 
-    # Extract and preprocess token data
-    tokens_with_scores: list[TokenScore] = []
-    for item in pool_data:
-        try:
-            attrs = item.attributes
-            pool_created_at = (
-                datetime.fromisoformat(
-                    attrs.pool_created_at.replace("Z", "+00:00")
-                ).timestamp()
-                * 1000
-            )
-            volume_usd = safe_parse_float(attrs.volume_usd.h24) + epsilon
-            reserve_usd = safe_parse_float(attrs.reserve_in_usd) + epsilon
-
-            price_change_1h = safe_parse_float(attrs.price_change_percentage.h1)
-            price_change_6h = safe_parse_float(attrs.price_change_percentage.h6)
-            price_change_24h = safe_parse_float(attrs.price_change_percentage.h24)
-
-            transactions = attrs.transactions.h24 if attrs.transactions else {}
-            transactions_count = (
-                transactions.get("buys", 0) + transactions.get("sells", 0)
-                if isinstance(transactions, dict)
-                else 0
-            )
+def get_top_tokens(
+    pool_data: list[PoolData], limit: int = 10
+) -> list[PoolDataWithScore]:
+    """
+    Rank pools by recency, volume, reserves, price change and transactions
 
-            tokens_with_scores.append(
-                {
-                    "item": item,
-                    "computed_values": {
-                        "pool_created_at": pool_created_at,
-                        "volume_usd": volume_usd,
-                        "reserve_usd": reserve_usd,
-                        "price_change_1h": max(-100, min(price_change_1h, 500)),
-                        "price_change_6h": max(-100, min(price_change_6h, 500)),
-                        "price_change_24h": max(-100, min(price_change_24h, 500)),
-                        "transactions_count": transactions_count,
-                    },
-                    "score": 0,
-                }
-            )
+    Every feature is normalized between its 5th and 95th percentile across the pools,
+    on a log scale for volume, reserves and transactions, then weighted.
+    """
+
+    pools: list[PoolData] = []
+    rows: list[list[float]] = []
+    for pool in pool_data:
+        try:
+            rows.append(_pool_features(pool))
         except Exception as e:
             console.print(f"[red]Error processing pool data: {e!s}[/red]")
             continue
+        pools.append(pool)
+    if not rows:
+        return []
 
-    # Collect all values for normalization
-    pool_created_at_times = [
-        t["computed_values"]["pool_created_at"] for t in tokens_with_scores
-    ]
-    volume_values = [t["computed_values"]["volume_usd"] for t in tokens_with_scores]
-    reserve_values = [t["computed_values"]["reserve_usd"] for t in tokens_with_scores]
-    price_change_1h_values = [
-        t["computed_values"]["price_change_1h"] for t in tokens_with_scores
-    ]
-    price_change_6h_values = [
-        t["computed_values"]["price_change_6h"] for t in tokens_with_scores
-    ]
-    price_change_24h_values = [
-        t["computed_values"]["price_change_24h"] for t in tokens_with_scores
-    ]
-    transactions_values = [
-        t["computed_values"]["transactions_count"] for t in tokens_with_scores
-    ]
-
-    # Sort values for percentile calculation
-    sorted_created_at = sorted(pool_created_at_times)
-    sorted_volumes = sorted(volume_values)
-    sorted_reserves = sorted(reserve_values)
-    sorted_price_change_1h = sorted(price_change_1h_values)
-    sorted_price_change_6h = sorted(price_change_6h_values)
-    sorted_price_change_24h = sorted(price_change_24h_values)
-    sorted_transactions = sorted(transactions_values)
-
-    # Calculate percentiles
-    percentile_calc = partial(get_percentile)
-    min_created_at = percentile_calc(sorted_created_at, 5)
-    max_created_at = percentile_calc(sorted_created_at, 95)
-    min_volume = percentile_calc(sorted_volumes, 5)
-    max_volume = percentile_calc(sorted_volumes, 95)
-    min_reserve = percentile_calc(sorted_reserves, 5)
-    max_reserve = percentile_calc(sorted_reserves, 95)
-    min_price_change_1h = percentile_calc(sorted_price_change_1h, 5)
-    max_price_change_1h = percentile_calc(sorted_price_change_1h, 95)
-    min_price_change_6h = percentile_calc(sorted_price_change_6h, 5)
-    max_price_change_6h = percentile_calc(sorted_price_change_6h, 95)
-    min_price_change_24h = percentile_calc(sorted_price_change_24h, 5)
-    max_price_change_24h = percentile_calc(sorted_price_change_24h, 95)
-    min_transactions = percentile_calc(sorted_transactions, 5)
-    max_transactions = percentile_calc(sorted_transactions, 95)
-
-    # Calculate scores
-    for token in tokens_with_scores:
-        cv = token["computed_values"]
-
-        try:
-            recency_score = normalize(
-                cv["pool_created_at"], min_created_at, max_created_at
-            )
-            volume_score = normalize(
-                log(cv["volume_usd"] + epsilon),
-                log(min_volume + epsilon),
-                log(max_volume + epsilon),
-            )
-            reserve_score = normalize(
-                log(cv["reserve_usd"] + epsilon),
-                log(min_reserve + epsilon),
-                log(max_reserve + epsilon),
-            )
-            price_change_score_1h = normalize(
-                cv["price_change_1h"], min_price_change_1h, max_price_change_1h
-            )
-            price_change_score_6h = normalize(
-                cv["price_change_6h"], min_price_change_6h, max_price_change_6h
-            )
-            price_change_score_24h = normalize(
-                cv["price_change_24h"], min_price_change_24h, max_price_change_24h
-            )
-            transactions_score = normalize(
-                log(cv["transactions_count"] + epsilon),
-                log(min_transactions + epsilon),
-                log(max_transactions + epsilon),
-            )
-
-            # Combine price change scores with weights
-            price_change_score = (
-                price_change_score_1h * 0.5
-                + price_change_score_6h * 0.3
-                + price_change_score_24h * 0.2
-            )
-
-            # Calculate final score with weights
-            token["score"] = (
-                recency_score * 0.35
-                + volume_score * 0.25
-                + reserve_score * 0.15
-                + price_change_score * 0.15
-                + transactions_score * 0.1
-            )
-        except Exception as e:
-            console.print(f"[red]Error calculating score: {e!s}[/red]")
-            token["score"] = 0
+    features = np.array(rows, dtype=np.float64)
+    features[:, PRICE_CHANGE_FEATURES] = np.clip(
+        features[:, PRICE_CHANGE_FEATURES], MIN_PRICE_CHANGE, MAX_PRICE_CHANGE
+    )
+    low, high = np.percentile(features, [5, 95], axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        features[:, LOG_FEATURES] = np.log(features[:, LOG_FEATURES] + SCORE_EPSILON)
+        low[LOG_FEATURES] = np.log(low[LOG_FEATURES] + SCORE_EPSILON)
+        high[LOG_FEATURES] = np.log(high[LOG_FEATURES] + SCORE_EPSILON)
+        spread = high - low
+        normalized = np.divide(
+            features - low,
+            spread,
+            out=np.zeros_like(features),
+            where=spread != 0,
+        )
+        scores = normalized @ FEATURE_WEIGHTS
+    # Pools whose features can't be scored, e.g. with a negative volume, score 0
+    scores[~np.isfinite(scores)] = 0
 
-    # Sort tokens by descending score
-    tokens_with_scores.sort(key=lambda x: x["score"], reverse=True)
+    # Only the top pools need sorting, ties keep their input order
+    top = np.arange(len(scores))
+    if len(scores) > limit > 0:
+        kth_score = -np.partition(-scores, limit - 1)[limit - 1]
+        top = np.flatnonzero(scores >= kth_score)
+    top = top[np.lexsort((top, -scores[top]))][:limit]
 
-    # Return the top tokens with their original data and scores
     return [
-        PoolDataWithScore(score=t["score"], **t["item"].model_dump())
-        for t in tokens_with_scores[:10]
+        PoolDataWithScore(score=float(scores[i]), **pools[i].model_dump()) for i in top
     ]
 
 
 async def get_trending_tokens() -> list[TokenMetrics]:
     try:
-        search_parameters = {"page": 1}
-        response = await query_gecko_terminal(
-            "/networks/trending_pools", search_parameters
-        )
-
-        if not isinstance(response, GeckoTerminalResponse) or not response.data:
+        pools = await fetch_trending_pools()
+        if not pools:
             console.print("[red]No trending pools found[/red]")
             return []
 
-        pools = response.data[:10]  # Limit to top 10
-        tasks = []
-
-        # Collect DexScreener & Birdeye calls in parallel
-        for pool in pools:
-            base_token = pool.relationships.base_token.data
-            chain_name, token_address = (
-                base_token.id.split("_", 1)
-                if "_" in base_token.id
-                else ("Chain unknown", base_token.id)
-            )
-
-            dex_task = query_dex_screener(token_address)
-            # Only query Birdeye for Solana tokens; otherwise None
-            birdeye_task = (
-                query_birdeye_security(token_address)
-                if chain_name.lower() == "solana"
-                else None
-            )
-
-            if birdeye_task:
-                # If we have two tasks, gather them as a tuple
-                tasks.append(
-                    (
-                        pool,
-                        asyncio.gather(dex_task, birdeye_task, return_exceptions=True),
-                    )
-                )
-            else:
-                # Otherwise just gather one
-                tasks.append((pool, asyncio.gather(dex_task, return_exceptions=True)))
-
-        # Execute all tasks
-        task_results = await asyncio.gather(
-            *[t[1] for t in tasks], return_exceptions=True
+        return await build_trending_token_metrics(
+            get_top_tokens(pools, TRENDING_TOKENS_LIMIT)
         )
 
-        token_metrics = []
-
-        # Process results in parallel to the tasks
-        for (pool, _), result in zip(tasks, task_results):
-            base_token = pool.relationships.base_token.data
-            chain_name, token_address = (
-                base_token.id.split("_", 1)
-                if "_" in base_token.id
-                else ("Chain unknown", base_token.id)
-            )
-
-            # If the entire gather failed for that pool
-            if isinstance(result, Exception):
-                console.print(
-                    f"[yellow]Error processing pool {base_token.id}: {result}[/yellow]"
-                )
-                continue
-
-            try:
-                # Type check and cast result to tuple
-                if not isinstance(result, (tuple, list)):
-                    console.print(
-                        f"[yellow]Unexpected result type for {base_token.id}: {type(result)}[/yellow]"
-                    )
-                    continue
-
-                # Now we know result is a sequence
-                if len(result) == 2:
-                    dex_result, birdeye_result = result
-                else:
-                    dex_result, birdeye_result = result[0], None
-
-                # If either is an Exception, skip
-                if isinstance(dex_result, Exception):
-                    console.print(
-                        f"[yellow]DexScreener error for {base_token.id}: {dex_result}[/yellow]"
-                    )
-                    continue
-                if isinstance(birdeye_result, Exception):
-                    console.print(
-                        f"[yellow]Birdeye error for {base_token.id}: {birdeye_result}[/yellow]"
-                    )
-                    # We can still proceed with just dex_result
-
-                metrics = create_token_metrics(pool, dex_result, birdeye_result)
-                token_metrics.append(metrics)
-
-            except Exception as e:
-                console.print(
-                    f"[yellow]Error processing pool {base_token.id}: {str(e)}[/yellow]"
-                )
-                continue
-
-        return token_metrics
-
     except Exception as error:
         console.print(f"[red]Error in get_trending_tokens: {error!s}[/red]")
         return []
 
 
+async def build_trending_token_metrics(pools: list[PoolData]) -> list[TokenMetrics]:
+    results = await asyncio.gather(
+        *(build_token_metrics(pool) for pool in pools), return_exceptions=True
+    )
+
+    token_metrics = []
+    for pool, result in zip(pools, results):
+        if isinstance(result, BaseException):
+            console.print(
+                f"[yellow]Error processing pool {pool.relationships.base_token.data.id}: "
+                f"{result}[/yellow]"
+            )
+            continue
+        token_metrics.append(result)
+    return token_metrics
+
+
 def create_token_metrics(
     pool: PoolData,
     dex_result: Any,
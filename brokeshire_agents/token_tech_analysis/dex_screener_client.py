@@ -4,6 +4,16 @@ import httpx
 from pydantic import BaseModel, ConfigDict, Field
 from rich.console import Console
 
+from brokeshire_agents.common.http_client import get_http_client
+from brokeshire_agents.common.response_cache import cached_response
+from brokeshire_agents.common.single_flight import single_flight
+
+# Pairs carry prices, while paid orders change rarely
+PAIRS_TTL = 30
+PAIRS_STALE_TTL = 30
+ORDERS_TTL = 60 * 60 * 6
+ORDERS_STALE_TTL = 60 * 60
+
 
 def to_camel(string: str) -> str:
     words = string.split("_")
@@ -120,6 +130,7 @@ class DexScreenerOrdersResponse(BaseModel):
     data: list[TokenProfileStatus]
 
 
+@cached_response("dex_screener_orders", ORDERS_TTL, ORDERS_STALE_TTL)
 async def query_dex_screener_orders(
     chain_id: str, token_address: str
 ) -> DexScreenerOrdersResponse:
@@ -129,34 +140,33 @@ async def query_dex_screener_orders(
         "User-Agent": "Mozilla/5.0 (compatible; MyBot/1.0)",
     }
 
-    async with httpx.AsyncClient(timeout=30.0, headers=headers) as client:
-        try:
-            response = await client.get(url)
-            response.raise_for_status()
-            return DexScreenerOrdersResponse.model_validate({"data": response.json()})
-        except httpx.TimeoutException as e:
-            msg = "DexScreener Orders API request timed out"
-            raise Exception(msg) from e
-        except httpx.HTTPStatusError as e:
-            msg = (
-                f"DexScreener Orders API returned status code: {e.response.status_code}"
-            )
-            raise Exception(msg) from e
-        except Exception as error:
-            msg = f"Failed querying DexScreener Orders: {error!s}"
-            raise Exception(msg) from error
+    try:
+        response = await get_http_client(url).get(url, headers=headers, timeout=30.0)
+        response.raise_for_status()
+        return DexScreenerOrdersResponse.model_validate({"data": response.json()})
+    except httpx.TimeoutException as e:
+        msg = "DexScreener Orders API request timed out"
+        raise Exception(msg) from e
+    except httpx.HTTPStatusError as e:
+        msg = f"DexScreener Orders API returned status code: {e.response.status_code}"
+        raise Exception(msg) from e
+    except Exception as error:
+        msg = f"Failed querying DexScreener Orders: {error!s}"
+        raise Exception(msg) from error
 
 
 console = Console()
 
 
+@single_flight("dex_screener")
 async def query_dex_screener(
     token_address: str,
 ) -> tuple[DexScreenerResponse, DexScreenerOrdersResponse | None]:
     console.print(
         f"[blue]Querying DexScreener with token address: {token_address}[/blue]"
     )
-    pairs_data = await _query_dex_screener_pairs(token_address)
+    pairs_data = await query_dex_screener_pairs(token_address)
+    orders_data = None
 
     # If we have pairs, get the orders data using the chain ID from the first pair
     if pairs_data.pairs:
@@ -169,33 +179,33 @@ async def query_dex_screener(
     return pairs_data, orders_data
 
 
-async def _query_dex_screener_pairs(token_address: str) -> DexScreenerResponse:
+@cached_response("dex_screener_pairs", PAIRS_TTL, PAIRS_STALE_TTL)
+async def query_dex_screener_pairs(token_address: str) -> DexScreenerResponse:
     url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
     headers = {
         "Accept": "application/json",
         "User-Agent": "Mozilla/5.0 (compatible; MyBot/1.0)",
     }
 
-    async with httpx.AsyncClient(timeout=30.0, headers=headers) as client:
-        try:
-            response = await client.get(url)
-            response.raise_for_status()
-            json_response = response.json()
-
-            # The DexScreener API returns pairs in a different structure
-            # We need to wrap it in the expected format
-            formatted_response = {
-                "schemaVersion": "1.0.0",
-                "pairs": json_response.get("pairs", []),
-            }
-
-            return DexScreenerResponse.model_validate(formatted_response)
-        except httpx.TimeoutException as e:
-            msg = "DexScreener API request timed out"
-            raise Exception(msg) from e
-        except httpx.HTTPStatusError as e:
-            msg = f"DexScreener API returned status code: {e.response.status_code}"
-            raise Exception(msg) from e
-        except Exception as error:
-            msg = f"Failed querying DexScreener: {error!s}"
-            raise Exception(msg) from error
+    try:
+        response = await get_http_client(url).get(url, headers=headers, timeout=30.0)
+        response.raise_for_status()
+        json_response = response.json()
+
+        # The DexScreener API returns pairs in a different structure
+        # We need to wrap it in the expected format
+        formatted_response = {
+            "schemaVersion": "1.0.0",
+            "pairs": json_response.get("pairs", []),
+        }
+
+        return DexScreenerResponse.model_validate(formatted_response)
+    except httpx.TimeoutException as e:
+        msg = "DexScreener API request timed out"
+        raise Exception(msg) from e
+    except httpx.HTTPStatusError as e:
+        msg = f"DexScreener API returned status code: {e.response.status_code}"
+        raise Exception(msg) from e
+    except Exception as error:
+        msg = f"Failed querying DexScreener: {error!s}"
+        raise Exception(msg) from error
@@ -5,8 +5,16 @@ import httpx
 from pydantic import BaseModel, Field, field_validator
 from rich.console import Console
 
+from brokeshire_agents.common.http_client import get_http_client
+from brokeshire_agents.common.response_cache import cached_response
+
 console = Console()
 
+# Trending pools change over minutes, while searches return pool prices. Matched
+# on the end of the route, to cover both the global and per-network routes.
+ROUTE_SUFFIX_TTLS = {"/trending_pools": 60 * 5}
+DEFAULT_TTL = 30
+
 
 class TokenResponseData(BaseModel):
     id: str
@@ -110,6 +118,25 @@ class GeckoTerminalResponse(BaseModel):
     data: list[PoolData]
 
 
+def _gecko_terminal_key(
+    route: str, parameters: dict[str, Any] | None = None
+) -> tuple[str, tuple[tuple[str, Any], ...]]:
+    return route, tuple(sorted((parameters or {}).items()))
+
+
+def _gecko_terminal_ttl(route: str, parameters: dict[str, Any] | None = None) -> float:
+    return next(
+        (ttl for suffix, ttl in ROUTE_SUFFIX_TTLS.items() if route.endswith(suffix)),
+        DEFAULT_TTL,
+    )
+
+
+@cached_response(
+    "gecko_terminal",
+    _gecko_terminal_ttl,
+    _gecko_terminal_ttl,
+    key=_gecko_terminal_key,
+)
 async def query_gecko_terminal(
     route: str, parameters: dict[str, Any] | None = None
 ) -> GeckoTerminalResponse:
@@ -119,17 +146,18 @@ async def query_gecko_terminal(
         "User-Agent": "Mozilla/5.0 (compatible; MyBot/1.0)",
     }
 
-    async with httpx.AsyncClient(timeout=30.0, headers=headers) as client:
-        try:
-            response = await client.get(url, params=parameters)
-            response.raise_for_status()
-            return GeckoTerminalResponse.model_validate(response.json())
-        except httpx.TimeoutException as e:
-            msg = "Gecko Terminal API request timed out"
-            raise Exception(msg) from e
-        except httpx.HTTPStatusError as e:
-            msg = f"Gecko Terminal API returned status code: {e.response.status_code}"
-            raise Exception(msg) from e
-        except Exception as error:
-            msg = f"Failed querying gecko terminal: {error!s}"
-            raise Exception(msg) from error
+    try:
+        response = await get_http_client(url).get(
+            url, params=parameters, headers=headers, timeout=30.0
+        )
+        response.raise_for_status()
+        return GeckoTerminalResponse.model_validate(response.json())
+    except httpx.TimeoutException as e:
+        msg = "Gecko Terminal API request timed out"
+        raise Exception(msg) from e
+    except httpx.HTTPStatusError as e:
+        msg = f"Gecko Terminal API returned status code: {e.response.status_code}"
+        raise Exception(msg) from e
+    except Exception as error:
+        msg = f"Failed querying gecko terminal: {error!s}"
+        raise Exception(msg) from error
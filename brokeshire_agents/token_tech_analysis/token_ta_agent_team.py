@@ -7,7 +7,6 @@ from typing import Annotated, Any, Literal, get_args
 
 import rich
 from langchain_core.runnables.config import RunnableConfig
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.errors import NodeInterrupt
 from langgraph.graph import END, StateGraph
 from openai.types.chat import (
@@ -23,7 +22,12 @@ from brokeshire_agents.common.agent_team import (
 from brokeshire_agents.common.agents.entity_extractor import extract_entities
 from brokeshire_agents.common.agents.schema_validator import InferredEntity
 from brokeshire_agents.common.ai_inference import openrouter
-from brokeshire_agents.common.ai_inference.parse_response import parse_response
+from brokeshire_agents.common.ai_inference.early_stop import stop_after_sections
+from brokeshire_agents.common.ai_inference.parse_response import (
+    parse_response,
+    stream_response,
+)
+from brokeshire_agents.common.checkpointer import get_checkpointer
 from brokeshire_agents.common.conversation import (
     Conversation,
     conversation_reducer,
@@ -37,7 +41,6 @@ from brokeshire_agents.common.utils import format_metric_suffix
 from brokeshire_agents.token_tech_analysis.curate_tokens import (
     build_token_metrics,
     find_top_pools,
-    get_trending_tokens,
 )
 from brokeshire_agents.token_tech_analysis.gecko_terminal_client import PoolData
 from brokeshire_agents.token_tech_analysis.risk_data_adapter import (
@@ -52,6 +55,9 @@ from brokeshire_agents.token_tech_analysis.token_models import (
     TokenInfo,
     TokenMarketData,
 )
+from brokeshire_agents.token_tech_analysis.trending_snapshot import (
+    get_trending_token_metrics,
+)
 
 """class TokenId(BaseModel):
     symbol: str
@@ -214,7 +220,7 @@ class TokenTaAgentTeam(AgentTeam):
 
     async def _token_curator_action(self, state: AgentState):
         self._send_activity_update("Finding opportunities...")
-        trending_tokens = await get_trending_tokens()
+        trending_tokens = await get_trending_token_metrics()
 
         curated_tokens = []
         for pool in trending_tokens:
@@ -494,15 +500,23 @@ class TokenTaAgentTeam(AgentTeam):
         [Your concise, 270-character max analysis suitable for Twitter, using newline separations for better readability]
         </tweet>
         """
-        response = await openrouter.get_openrouter_response(
-            messages=[
-                openrouter.Message(role="system", content=system_prompt),
-                openrouter.Message(role="user", content=user_prompt),
-            ],
-            models=["deepseek/deepseek-r1-distill-llama-70b"],
+        response_content = await stream_response(
+            stop_after_sections(
+                openrouter.stream_openrouter_response(
+                    messages=[
+                        openrouter.Message(role="system", content=system_prompt),
+                        openrouter.Message(role="user", content=user_prompt),
+                    ],
+                    models=["deepseek/deepseek-r1-distill-llama-70b"],
+                ),
+                ["tweet"],
+                "broke_analysis",
+                tags=["detailed_analysis"],
+            ),
+            "tweet",
+            self._send_response_delta,
+            thinking_tag="detailed_analysis",
         )
-
-        response_content = response.choices[0].message.content
         result = parse_response(response_content, "detailed_analysis", "tweet")
         parsed_response = result[0]
         return {
@@ -668,20 +682,29 @@ Rembrokeshire:
 - Ensure that your final output only includes the <is_relevant> and <response> tags and no additional information.
         """
         message_history = get_context(state.conversation, "broke_assistant")
-        response = await openrouter.get_openrouter_response(
-            messages=[
-                openrouter.Message(role="system", content=system_prompt),
-                *[
-                    openrouter.Message(role=msg["role"], content=msg["content"])
-                    for msg in message_history
-                    if msg["role"] in ("system", "user", "assistant")
-                ],
-                openrouter.Message(role="user", content=user_prompt),
-            ],
-            models=["google/gemini-pro-1.5"],
+        # Irrelevant messages get an empty response tag, so nothing streams for them
+        response_content = await stream_response(
+            stop_after_sections(
+                openrouter.stream_openrouter_response(
+                    messages=[
+                        openrouter.Message(role="system", content=system_prompt),
+                        *[
+                            openrouter.Message(role=msg["role"], content=msg["content"])
+                            for msg in message_history
+                            if msg["role"] in ("system", "user", "assistant")
+                        ],
+                        openrouter.Message(role="user", content=user_prompt),
+                    ],
+                    models=["google/gemini-pro-1.5"],
+                ),
+                ["response"],
+                "broke_assistant",
+                tags=["is_relevant"],
+            ),
+            "response",
+            self._send_response_delta,
+            thinking_tag="is_relevant",
         )
-
-        response_content = response.choices[0].message.content
         result = parse_response(response_content, "is_relevant", "response")
         parsed_response = result[0]
         is_relevant_str = result[1] if len(result) > 1 else "false"
@@ -944,7 +967,7 @@ _powered by Brokeshire AI_ ✨
         return state.next_node
 
     def _init_graph(self):
-        self._config: RunnableConfig = {"configurable": {"thread_id": 42}}
+        self._config: RunnableConfig = {"configurable": {"thread_id": self._thread_id}}
         self._graph = StateGraph(AgentState)
 
         self._graph.add_node("suggestion_router", self._suggestion_router_action)
@@ -984,7 +1007,7 @@ _powered by Brokeshire AI_ ✨
         self._graph.add_edge("token_risk_analyst", "token_strategist")
         self._graph.add_edge("token_strategist", "ask_user")
 
-        checkpointer = MemorySaver()
+        checkpointer = get_checkpointer()
 
         self._app = self._graph.compile(
             checkpointer=checkpointer, interrupt_before=["ask_user"]
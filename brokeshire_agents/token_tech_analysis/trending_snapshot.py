@@ -0,0 +1,139 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from rich.console import Console
+
+from brokeshire_agents.common.metrics import register_metrics
+from brokeshire_agents.token_tech_analysis.curate_tokens import (
+    TRENDING_TOKENS_LIMIT,
+    build_trending_token_metrics,
+    fetch_trending_pools,
+    get_top_tokens,
+    get_trending_tokens,
+)
+from brokeshire_agents.token_tech_analysis.gecko_terminal_client import (
+    PoolDataWithScore,
+)
+from brokeshire_agents.token_tech_analysis.token_metrics import TokenMetrics
+
+TRENDING_REFRESH_INTERVAL = 60 * 2
+# Fraction of the interval added or removed at random, so workers don't refresh
+# in lockstep and hit the upstream APIs together
+TRENDING_REFRESH_JITTER = 0.2
+TRENDING_RETRY_DELAY = 5
+TRENDING_MAX_BACKOFF = 60 * 15
+# Older snapshots are rebuilt on demand instead of being served
+MAX_SNAPSHOT_AGE = 60 * 15
+
+console = Console()
+
+TrendingData = tuple[list[TokenMetrics], list[PoolDataWithScore]]
+
+
+@dataclass(frozen=True)
+class TrendingSnapshot:
+    version: int
+    built_at: float
+    token_metrics: list[TokenMetrics]
+    top_pools: list[PoolDataWithScore]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.built_at
+
+
+async def build_trending_data() -> TrendingData:
+    pools = await fetch_trending_pools()
+    top_pools = get_top_tokens(pools, TRENDING_TOKENS_LIMIT)
+    token_metrics = await build_trending_token_metrics(top_pools)
+    if not token_metrics:
+        msg = "No trending token metrics could be built"
+        raise ValueError(msg)
+    return token_metrics, top_pools
+
+
+class TrendingPrefetcher:
+    """
+    Keeps a snapshot of the trending tokens warm in the background
+
+    Handlers read the latest snapshot instead of waiting on GeckoTerminal,
+    DexScreener and Birdeye. Snapshots are replaced whole and never mutated. A
+    failed rebuild keeps the previous snapshot and is retried with exponential
+    backoff.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[], Awaitable[TrendingData]],
+        interval: float = TRENDING_REFRESH_INTERVAL,
+        jitter: float = TRENDING_REFRESH_JITTER,
+        retry_delay: float = TRENDING_RETRY_DELAY,
+        max_backoff: float = TRENDING_MAX_BACKOFF,
+    ):
+        self._build = build
+        self._interval = interval
+        self._jitter = jitter
+        self._retry_delay = retry_delay
+        self._max_backoff = max_backoff
+        self.snapshot: TrendingSnapshot | None = None
+        self.consecutive_failures = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    async def refresh(self) -> TrendingSnapshot:
+        self.refreshes += 1
+        try:
+            token_metrics, top_pools = await self._build()
+        except Exception:
+            self.refresh_errors += 1
+            self.consecutive_failures += 1
+            raise
+        self.consecutive_failures = 0
+        version = self.snapshot.version + 1 if self.snapshot is not None else 1
+        self.snapshot = TrendingSnapshot(version, time.time(), token_metrics, top_pools)
+        return self.snapshot
+
+    def next_delay(self) -> float:
+        if self.consecutive_failures:
+            delay = min(
+                self._retry_delay * 2 ** (self.consecutive_failures - 1),
+                self._max_backoff,
+            )
+        else:
+            delay = self._interval
+        return delay * random.uniform(1 - self._jitter, 1 + self._jitter)  # noqa: S311
+
+    async def refresh_forever(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                console.print(f"[red]Failed to refresh trending tokens: {e}[/red]")
+            await asyncio.sleep(self.next_delay())
+
+    def stats(self) -> dict[str, int | float | None]:
+        snapshot = self.snapshot
+        return {
+            "version": snapshot.version if snapshot is not None else 0,
+            "age": snapshot.age if snapshot is not None else None,
+            "tokens": len(snapshot.token_metrics) if snapshot is not None else 0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+async def get_trending_token_metrics() -> list[TokenMetrics]:
+    """Trending token metrics from the latest snapshot, built now if it's missing."""
+
+    snapshot = trending_prefetcher.snapshot
+    if snapshot is not None and snapshot.age < MAX_SNAPSHOT_AGE:
+        return snapshot.token_metrics
+    return await get_trending_tokens()
+
+
+trending_prefetcher = TrendingPrefetcher(build_trending_data)
+register_metrics("trending_snapshot", trending_prefetcher.stats)
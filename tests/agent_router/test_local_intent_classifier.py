@@ -0,0 +1,101 @@
+import pytest
+
+from brokeshire_agents.agent_router.intent_classifier import (
+    classify_intent_locally,
+    is_local_intent_trusted,
+    normalize_utterance,
+)
+from brokeshire_agents.agent_router.local_intent_classifier import (
+    LocalIntentClassifier,
+    tokenize,
+)
+
+
+def test_tokenize_replaces_values():
+    assert tokenize("Send 10.5 USDC to 0x2b9B06e83b5d1B3e6a2c2c1f34c5d8C1f2e3a4b5") == [
+        "send",
+        "0",
+        "usdc",
+        "to",
+        "address",
+    ]
+    assert tokenize(
+        "@BrokeshireAIBot buy CNT1cbvCxBev8WTjmrhKxXFFfnXzBxoaZSNkhKwtpump"
+    ) == [
+        "buy",
+        "address",
+    ]
+
+
+@pytest.mark.parametrize(
+    "utterance, expected_intent",
+    [
+        ("sol price", "crypto_price_query"),
+        ("swap 10 sol to brokeagi", "convert_crypto_action"),
+        ("What can you do?", "capabilities_query"),
+        (
+            "send 5 dai to 0x2b9b06e83b5d1b3e6a2c2c1f34c5d8c1f2e3a4b5",
+            "transfer_crypto_action",
+        ),
+    ],
+)
+def test_classify_intent_locally(utterance: str, expected_intent: str):
+    classified_intent = classify_intent_locally(utterance)
+
+    assert classified_intent.name == expected_intent
+    assert classified_intent.linear_probability >= 0.9
+
+
+@pytest.mark.parametrize(
+    "utterance, expected_is_trusted",
+    [
+        ("sol price", True),
+        ("swap 10 sol to brokeagi", True),
+        ("What is an L3?", True),
+        # Negations are lost on the local classifier
+        ("do not send eth", False),
+        ("don't swap my sol", False),
+        ("never buy pepe", False),
+        # Confident, but wrong, so strict intents need more confidence
+        ("price of sol prediction", False),
+    ],
+)
+def test_is_local_intent_trusted(utterance: str, expected_is_trusted: bool):
+    classified_intent = classify_intent_locally(utterance)
+
+    assert is_local_intent_trusted(utterance, classified_intent) == expected_is_trusted
+
+
+def test_local_intent_classifier_probabilities():
+    classifier = LocalIntentClassifier(
+        {"greeting": ["hello there", "hi"], "farewell": ["goodbye", "see you later"]}
+    )
+
+    probabilities = classifier.predict_proba("hello")
+
+    assert sum(probabilities.values()) == pytest.approx(1)
+    assert classifier.predict("hello")[0] == "greeting"
+
+
+def test_local_intent_classifier_requires_examples():
+    with pytest.raises(ValueError):
+        LocalIntentClassifier({"greeting": ["hi"], "farewell": []})
+
+
+@pytest.mark.parametrize(
+    "utterance, expected_key",
+    [
+        ("  What can you DO?? ", "what can you do"),
+        ("@BrokeshireAIBot sol   price!", "sol price"),
+        (
+            "buy CNT1cbvCxBev8WTjmrhKxXFFfnXzBxoaZSNkhKwtpump",
+            "buy <address>",
+        ),
+        (
+            "send 5 dai to 0x2b9B06e83b5d1B3e6a2c2c1f34c5d8C1f2e3a4b5",
+            "send 5 dai to <address>",
+        ),
+    ],
+)
+def test_normalize_utterance(utterance: str, expected_key: str):
+    assert normalize_utterance(utterance) == expected_key
@@ -1,7 +1,9 @@
+import asyncio
 import uuid
 
 import pytest
 from brokeshire_agents.agent_router.router import AgentTeamSessionManager, Router
+from brokeshire_agents.common.session_store import InMemorySessionStore
 
 """
 @pytest.mark.parametrize(
@@ -31,7 +33,7 @@ def test_default_route(intent: str, expected: str):
 )
 @pytest.mark.skip
 async def test_send_route(message: str):
-    agent_team_sessions = AgentTeamSessionManager()
+    agent_team_sessions = AgentTeamSessionManager(store=InMemorySessionStore())
     router = Router(agent_team_sessions)
     sender_did = str(uuid.uuid4())
     thread_id = str(uuid.uuid4())
@@ -45,7 +47,7 @@ async def test_send_route(message: str):
     print(response)"""
 
 
-agent_team_sessions = AgentTeamSessionManager()
+agent_team_sessions = AgentTeamSessionManager(store=InMemorySessionStore())
 
 
 @pytest.mark.parametrize(
@@ -64,3 +66,102 @@ async def test_market_route(message: str):
     thread_id = str(uuid.uuid4())
     response = await router.send(sender_did, thread_id, message)
     print(response)
+
+
+class FakeAgentTeam:
+    def __init__(self) -> None:
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+
+def test_session_manager_evicts_least_recently_used():
+    session_manager = AgentTeamSessionManager(
+        max_sessions=2, idle_ttl=60, store=InMemorySessionStore()
+    )
+    teams = [FakeAgentTeam() for _ in range(3)]
+    session_manager.create_session("a", teams[0])
+    session_manager.create_session("b", teams[1])
+    session_manager.get_session("a")
+
+    session_manager.create_session("c", teams[2])
+
+    assert session_manager.get_session("b") is None
+    assert teams[1].is_cancelled
+    assert session_manager.get_session("a") is teams[0]
+    assert session_manager.stats()["evictions"] == 1
+
+
+def test_session_manager_reaps_idle_sessions():
+    session_manager = AgentTeamSessionManager(
+        max_sessions=10, idle_ttl=0, store=InMemorySessionStore()
+    )
+    team = FakeAgentTeam()
+    session_manager.create_session("a", team)
+
+    assert session_manager.reap_idle_sessions() == 1
+    assert team.is_cancelled
+    assert session_manager.stats()["live_sessions"] == 0
+
+
+def test_session_manager_ignores_removal_by_replaced_team():
+    session_manager = AgentTeamSessionManager(store=InMemorySessionStore())
+    old_team, new_team = FakeAgentTeam(), FakeAgentTeam()
+    session_manager.create_session("a", old_team)
+    session_manager.create_session("a", new_team)
+
+    session_manager.remove_session("a", old_team)
+
+    assert old_team.is_cancelled
+    assert session_manager.get_session("a") is new_team
+
+
+class ResumableAgentTeam(FakeAgentTeam):
+    def __init__(self, state: str) -> None:
+        super().__init__()
+        self.state = state
+
+    async def snapshot(self):
+        return {
+            "thread_id": "thread",
+            "checkpoint_type": "json",
+            "checkpoint": self.state,
+            "intent_suggestions": None,
+            "expression_suggestions": None,
+        }
+
+
+async def test_session_manager_resumes_sessions_saved_by_other_workers():
+    store = InMemorySessionStore()
+    worker_a = AgentTeamSessionManager(store=store)
+    worker_b = AgentTeamSessionManager(store=store)
+    spec = {
+        "route": "convert_crypto_action",
+        "store_transaction_info": None,
+        "user_chat_id": "chat",
+        "user_address": None,
+    }
+
+    async def resume(snapshot):
+        return ResumableAgentTeam(snapshot.agent_team["checkpoint"])
+
+    team_a = ResumableAgentTeam("first")
+    worker_a.create_session("a", team_a, spec)
+    await worker_a.save_session("a", team_a)
+
+    team_b = await worker_b.resolve_session("a", resume)
+    assert team_b.state == "first"
+    assert await worker_b.resolve_session("a", resume) is team_b
+
+    team_b.state = "second"
+    await worker_b.save_session("a", team_b)
+
+    resumed_team = await worker_a.resolve_session("a", resume)
+    assert resumed_team.state == "second"
+    assert team_a.is_cancelled
+    assert worker_a.stats()["resumes"] == 1
+
+    worker_a.remove_session("a")
+    await asyncio.sleep(0)
+    assert await store.get("a") is None
@@ -0,0 +1,94 @@
+"""Benchmark fuzzy_entity_match on synthetic token catalogs.
+
+Run with `python -m tests.benchmarks.bench_fuzzy_entity_match`. Compares the
+previous per-key `process.extract` implementation with the `cdist` path, with and
+without reusing `FuzzyChoices` across calls.
+"""
+
+import random
+import string
+import time
+
+from rapidfuzz import fuzz, process, utils
+
+from brokeshire_agents.common.entity_linker import (
+    FuzzyChoices,
+    fuzzy_entity_match,
+    log_weighted_average,
+)
+
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = ["usdc", "wrapped ether", "brokeagi", "doge coin", "arb"]
+KEYS = ["name", "symbol"]
+
+
+def extract_fuzzy_entity_match(named_entity, entity_list, keys, cutoff=0.7, limit=5):
+    key_scores = {}
+    for key in keys:
+        matches = process.extract(
+            named_entity,
+            {i: str(entity.get(key, "")) for i, entity in enumerate(entity_list)},
+            scorer=fuzz.WRatio,
+            processor=utils.default_process,
+            limit=None,
+        )
+        key_scores[key] = {
+            i: score if score > 0 else score + 1 for _, score, i in matches
+        }
+    avg_scores = {
+        i: log_weighted_average([key_scores[key].get(i, 0) for key in keys])
+        for i in range(len(entity_list))
+    }
+    return sorted(
+        [(i, score) for i, score in avg_scores.items() if score >= cutoff],
+        key=lambda x: x[1],
+        reverse=True,
+    )[:limit]
+
+
+def make_tokens(size: int) -> list[dict[str, str]]:
+    rng = random.Random(size)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        for _ in range(2_000)
+    ]
+    return [
+        {
+            "name": " ".join(rng.choices(words, k=rng.randint(1, 3))).title(),
+            "symbol": "".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 6))),
+        }
+        for _ in range(size)
+    ]
+
+
+def time_per_query(fn) -> float:
+    start = time.perf_counter()
+    for query in QUERIES:
+        fn(query)
+    return (time.perf_counter() - start) / len(QUERIES)
+
+
+def main() -> None:
+    print(
+        f"{'tokens':>8} {'extract':>10} {'cdist':>10} {'cdist+reuse':>12} {'build':>10}"
+    )
+    for size in SIZES:
+        tokens = make_tokens(size)
+
+        start = time.perf_counter()
+        choices = FuzzyChoices(tokens, KEYS)
+        build = time.perf_counter() - start
+
+        extract = time_per_query(lambda q: extract_fuzzy_entity_match(q, tokens, KEYS))
+        cdist = time_per_query(lambda q: fuzzy_entity_match(q, tokens, KEYS))
+        reuse = time_per_query(
+            lambda q: fuzzy_entity_match(q, tokens, KEYS, choices=choices)
+        )
+        print(
+            f"{size:>8} {extract * 1e3:>8.1f}ms {cdist * 1e3:>8.1f}ms "
+            f"{reuse * 1e3:>10.1f}ms {build * 1e3:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
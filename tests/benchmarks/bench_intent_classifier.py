@@ -0,0 +1,91 @@
+"""Benchmark the local intent pre-classifier against the LLM test cases.
+
+Run with `python -m tests.benchmarks.bench_intent_classifier`. Pass `--llm` to also
+time `classify_intent` end to end, which calls Fireworks for low confidence
+utterances and needs a real API key.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from brokeshire_agents.agent_router.intent_classifier import (
+    classify_intent,
+    classify_intent_locally,
+    is_local_intent_trusted,
+)
+from brokeshire_agents.settings import SETTINGS
+from tests.agent_router.test_intent_classifier import CLASSIFY_INTENT_CASES
+
+# The test cases predate the rename of swap_crypto_action
+LEGACY_INTENTS = {"swap_crypto_action": "convert_crypto_action"}
+ROUNDS = 200
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench_local() -> None:
+    threshold = SETTINGS.local_intent_confidence_threshold
+    strict_threshold = SETTINGS.local_strict_intent_confidence_threshold
+    correct = fast_path = fast_path_correct = 0
+    timings = []
+    for utterance, expected, _ in CLASSIFY_INTENT_CASES:
+        expected = LEGACY_INTENTS.get(expected, expected)
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            intent = classify_intent_locally(utterance)
+            timings.append(time.perf_counter() - start)
+
+        is_correct = intent.name == expected
+        is_fast_path = is_local_intent_trusted(utterance, intent)
+        correct += is_correct
+        fast_path += is_fast_path
+        fast_path_correct += is_fast_path and is_correct
+        marker = "fast" if is_fast_path else "llm "
+        print(
+            f"{marker} {'ok ' if is_correct else 'BAD'} "
+            f"{intent.linear_probability:.2f} {intent.name:<24} {utterance[:48]!r}"
+        )
+
+    total = len(CLASSIFY_INTENT_CASES)
+    print(f"\nLocal top-1 accuracy: {correct}/{total} ({correct / total:.0%})")
+    print(
+        f"Fast path (thresholds {threshold}/{strict_threshold}): {fast_path}/{total} "
+        f"({fast_path / total:.0%}) with {fast_path_correct}/{fast_path or 1} correct"
+    )
+    print(
+        f"Local latency: p50 {statistics.median(timings) * 1e6:.0f}µs, "
+        f"p95 {percentile(timings, 0.95) * 1e6:.0f}µs"
+    )
+
+
+async def bench_llm() -> None:
+    timings = []
+    correct = 0
+    for utterance, expected, _ in CLASSIFY_INTENT_CASES:
+        expected = LEGACY_INTENTS.get(expected, expected)
+        start = time.perf_counter()
+        intent = await classify_intent(utterance)
+        timings.append(time.perf_counter() - start)
+        correct += intent.name == expected
+
+    total = len(CLASSIFY_INTENT_CASES)
+    print(f"\nclassify_intent accuracy: {correct}/{total} ({correct / total:.0%})")
+    print(
+        f"classify_intent latency: p50 {statistics.median(timings) * 1e3:.0f}ms, "
+        f"p95 {percentile(timings, 0.95) * 1e3:.0f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm", action="store_true", help="also benchmark the LLM")
+    args = parser.parse_args()
+
+    bench_local()
+    if args.llm:
+        asyncio.run(bench_llm())
@@ -0,0 +1,116 @@
+"""Benchmark get_top_tokens on synthetic GeckoTerminal pools.
+
+Run with `python -m tests.benchmarks.bench_top_tokens`. Compares the previous
+scalar implementation with the NumPy one.
+"""
+
+import time
+from datetime import datetime
+from math import log
+from typing import Any
+
+from brokeshire_agents.token_tech_analysis.curate_tokens import get_top_tokens
+from brokeshire_agents.token_tech_analysis.gecko_terminal_client import PoolData
+from tests.pools import make_pools
+
+SIZES = [20, 200, 2_000, 20_000]
+
+
+def scalar_get_top_tokens(pool_data: list[PoolData], limit: int = 10):
+    """The previous implementation, returning (pool, score) pairs."""
+
+    epsilon = 1e-6
+
+    def normalize(value: float, min_val: float, max_val: float) -> float:
+        return 0 if max_val - min_val == 0 else (value - min_val) / (max_val - min_val)
+
+    def get_percentile(sorted_values: list[float], percentile: float) -> float:
+        if not sorted_values:
+            return 0
+        index = (percentile / 100) * (len(sorted_values) - 1)
+        lower = int(index)
+        upper = min(lower + 1, len(sorted_values) - 1)
+        weight = index % 1
+        return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+    def safe_parse_float(value: Any) -> float:
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return 0
+
+    tokens = []
+    for item in pool_data:
+        attrs = item.attributes
+        pc = attrs.price_change_percentage
+        tokens.append(
+            (
+                item,
+                [
+                    datetime.fromisoformat(
+                        attrs.pool_created_at.replace("Z", "+00:00")
+                    ).timestamp()
+                    * 1000,
+                    safe_parse_float(attrs.volume_usd.h24) + epsilon,
+                    safe_parse_float(attrs.reserve_in_usd) + epsilon,
+                    max(-100, min(pc.h1, 500)),
+                    max(-100, min(pc.h6, 500)),
+                    max(-100, min(pc.h24, 500)),
+                    # h24 is a model rather than a dict, so this was always 0
+                    0,
+                ],
+            )
+        )
+
+    columns = [sorted(values[i] for _, values in tokens) for i in range(7)]
+    lows = [get_percentile(column, 5) for column in columns]
+    highs = [get_percentile(column, 95) for column in columns]
+    logged = {1, 2, 6}
+
+    scores = []
+    for item, values in tokens:
+        normalized = [
+            (
+                normalize(log(value + epsilon), log(low + epsilon), log(high + epsilon))
+                if i in logged
+                else normalize(value, low, high)
+            )
+            for i, (value, low, high) in enumerate(
+                zip(values, lows, highs, strict=False)
+            )
+        ]
+        price_change_score = (
+            normalized[3] * 0.5 + normalized[4] * 0.3 + normalized[5] * 0.2
+        )
+        score = (
+            normalized[0] * 0.35
+            + normalized[1] * 0.25
+            + normalized[2] * 0.15
+            + price_change_score * 0.15
+            + normalized[6] * 0.1
+        )
+        scores.append((item, score))
+
+    scores.sort(key=lambda x: x[1], reverse=True)
+    return scores[:limit]
+
+
+def time_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    print(f"{'pools':>8} {'scalar':>10} {'numpy':>10}")
+    for size in SIZES:
+        pools = make_pools(size)
+        repeat = max(1, 2_000 // size)
+        scalar = time_call(lambda: scalar_get_top_tokens(pools), repeat)
+        vectorized = time_call(lambda: get_top_tokens(pools), repeat)
+        print(f"{size:>8} {scalar * 1e3:>8.2f}ms {vectorized * 1e3:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
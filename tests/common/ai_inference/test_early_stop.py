@@ -0,0 +1,111 @@
+from brokeshire_agents.common.ai_inference.early_stop import (
+    CHARS_PER_TOKEN,
+    get_early_stop_stats,
+    stop_after_sections,
+)
+from brokeshire_agents.common.ai_inference.parse_response import parse_response
+
+COMPLETION = [
+    "<scratchpad>I'll fill <output>",
+    "</scratchpad>\n<output>{}",
+    "</output>",
+    "\nLet me know",
+    " if anything else is needed.",
+]
+TRAILING = COMPLETION[3:]
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Upstream:
+    def __init__(self, timer: FakeTimer) -> None:
+        self.timer = timer
+        self.streamed = 0
+        self.closed = False
+
+    async def stream(self):
+        try:
+            for chunk in COMPLETION:
+                self.timer.now += 0.5
+                self.streamed += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+
+async def complete(upstream: Upstream, call_site: str, sample_rate: float) -> str:
+    chunks = stop_after_sections(
+        upstream.stream(),
+        ["output"],
+        call_site,
+        tags=["scratchpad"],
+        sample_rate=sample_rate,
+        timer=upstream.timer,
+    )
+    return "".join([chunk async for chunk in chunks])
+
+
+async def test_stop_after_sections_measures_then_stops_once_sections_close():
+    timer = FakeTimer()
+
+    # Without an estimate, the first call streams to the end to measure
+    sampled = Upstream(timer)
+    assert await complete(sampled, "test_extractor", sample_rate=0) == "".join(
+        COMPLETION
+    )
+    assert sampled.streamed == len(COMPLETION)
+
+    stopped = Upstream(timer)
+    assert await complete(stopped, "test_extractor", sample_rate=0) == "".join(
+        COMPLETION[:3]
+    )
+    assert stopped.streamed == 3
+    assert stopped.closed
+
+    trailing_tokens = len("".join(TRAILING)) / CHARS_PER_TOKEN
+    assert get_early_stop_stats("test_extractor").stats() == {
+        "calls": 2,
+        "stopped": 1,
+        "sampled": 1,
+        "estimated_tokens_saved": trailing_tokens,
+        "estimated_latency_saved": 0.5 * len(TRAILING),
+    }
+
+
+async def test_stop_after_sections_samples_calls_to_keep_measuring():
+    timer = FakeTimer()
+    for _ in range(3):
+        upstream = Upstream(timer)
+        await complete(upstream, "test_sampled", sample_rate=1)
+        assert upstream.streamed == len(COMPLETION)
+
+    stats = get_early_stop_stats("test_sampled").stats()
+    assert stats["sampled"] == 3
+    assert stats["stopped"] == 0
+
+
+async def test_stop_after_sections_ignores_stop_tags_mentioned_while_planning():
+    async def stream():
+        yield "<response_planning>I'll answer in <response></response> tags"
+        yield "</response_planning>\n<response>gm</response>"
+        yield "\ntrailing notes"
+
+    # The first call is measured, the second one stops early
+    for _ in range(2):
+        chunks = stop_after_sections(
+            stream(),
+            ["response"],
+            "test_planning",
+            tags=["response_planning"],
+            sample_rate=0,
+        )
+        completion = "".join([chunk async for chunk in chunks])
+
+    assert not completion.endswith("trailing notes")
+    assert parse_response(completion, "response_planning", "response")[0] == "gm"
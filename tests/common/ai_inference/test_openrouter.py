@@ -0,0 +1,53 @@
+import json
+
+import httpx
+import pytest
+
+from brokeshire_agents.common.ai_inference import openrouter
+
+
+def sse_body(*events: dict | str) -> bytes:
+    lines = [": OPENROUTER PROCESSING", ""]
+    for event in events:
+        data = event if isinstance(event, str) else json.dumps(event)
+        lines += [f"data: {data}", ""]
+    return "\n".join(lines).encode()
+
+
+def delta(content: str) -> dict:
+    return {"choices": [{"index": 0, "delta": {"content": content}}]}
+
+
+async def collect(monkeypatch: pytest.MonkeyPatch, body: bytes) -> list[str]:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, content=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(openrouter, "get_http_client", lambda _: client)
+    messages = [openrouter.Message(role="user", content="gm")]
+    try:
+        return [
+            chunk
+            async for chunk in openrouter.stream_openrouter_response(
+                messages, ["google/gemini-pro-1.5"]
+            )
+        ]
+    finally:
+        assert json.loads(requests[0].content)["stream"] is True
+        await client.aclose()
+
+
+async def test_stream_openrouter_response_yields_content_deltas(monkeypatch):
+    body = sse_body(delta("<response>"), delta("gm"), delta(""), "[DONE]", delta("x"))
+
+    assert await collect(monkeypatch, body) == ["<response>", "gm"]
+
+
+async def test_stream_openrouter_response_raises_streamed_errors(monkeypatch):
+    body = sse_body(delta("gm"), {"error": {"message": "overloaded"}})
+
+    with pytest.raises(ValueError, match="overloaded"):
+        await collect(monkeypatch, body)
@@ -0,0 +1,164 @@
+import pytest
+
+from brokeshire_agents.common.ai_inference.parse_response import (
+    ResponseStreamFilter,
+    Section,
+    SectionDelta,
+    TaggedStreamParser,
+    extract_tagged_sections,
+    extract_xml_content,
+    parse_response,
+    stream_response,
+)
+
+COMPLETION = """<think>
+I'll answer in <response> tags.
+</think>
+
+<response>
+Brokeshire blends value investing
+with crypto.
+</response>
+trailing notes"""
+
+
+def split_every(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1_000])
+def test_response_stream_filter_only_streams_the_response(chunk_size: int):
+    response_filter = ResponseStreamFilter("response")
+    streamed = "".join(
+        response_filter.feed(chunk) for chunk in split_every(COMPLETION, chunk_size)
+    )
+
+    assert streamed == "Brokeshire blends value investing\nwith crypto."
+    assert streamed == parse_response(COMPLETION, "think", "response")[0]
+
+
+def test_response_stream_filter_holds_back_partial_tags_and_whitespace():
+    response_filter = ResponseStreamFilter("tweet")
+
+    assert response_filter.feed("<twe") == ""
+    assert response_filter.feed("et>\n gm ") == "gm"
+    assert response_filter.feed(" frens</") == "  frens"
+    assert response_filter.feed("tweet> <tweet>again") == ""
+
+
+def test_response_stream_filter_drops_planning_sections():
+    response_filter = ResponseStreamFilter("response", "response_planning")
+    streamed = response_filter.feed(
+        "<response_planning>I'll put the final answer in <response> tags"
+    )
+    streamed += response_filter.feed(
+        " as instructed.</response_planning>\n<think><response>no</response></think>"
+    )
+    streamed += response_filter.feed("<response>Brokeshire was built by the team.")
+
+    assert streamed == "Brokeshire was built by the team."
+
+
+async def test_stream_response_returns_the_whole_completion():
+    async def chunks():
+        for chunk in split_every(COMPLETION, 5):
+            yield chunk
+
+    deltas: list[str] = []
+    completion = await stream_response(chunks(), "response", deltas.append)
+
+    assert completion == COMPLETION
+    assert "".join(deltas) == "Brokeshire blends value investing\nwith crypto."
+    assert len(deltas) > 1
+
+
+ENTITIES = """<scratchpad>
+"2 < 3" so I'll put the JSON in <output>.
+</scratchpad>
+
+<output>
+{"entities": []}
+</output>"""
+
+
+def test_tagged_stream_parser_emits_sections_as_they_close():
+    parser = TaggedStreamParser(["scratchpad", "output"])
+    events = [
+        event for chunk in split_every(ENTITIES, 4) for event in parser.feed(chunk)
+    ]
+    events += parser.close()
+
+    sections = [event for event in events if isinstance(event, Section)]
+    assert sections == [
+        Section("scratchpad", '\n"2 < 3" so I\'ll put the JSON in <output>.\n'),
+        Section("output", '\n{"entities": []}\n'),
+    ]
+    # The output section is complete before the end of the stream
+    assert events.index(sections[1]) == len(events) - 1
+    output_deltas = [
+        event.text
+        for event in events
+        if isinstance(event, SectionDelta) and event.tag == "output"
+    ]
+    assert "".join(output_deltas) == sections[1].content
+    assert [segment.tag for segment in parser.segments] == [
+        "scratchpad",
+        None,
+        "output",
+    ]
+
+
+def test_tagged_stream_parser_tolerates_unterminated_sections():
+    parser = TaggedStreamParser(["response"])
+    assert parser.feed("<<response>gm <b>fren</") == [
+        SectionDelta("response", "gm <b>fren")
+    ]
+    assert parser.section("response") is None
+
+    # The possible closing tag held back turns out to be content
+    assert parser.close() == [
+        SectionDelta("response", "</"),
+        Section("response", "gm <b>fren</", closed=False),
+    ]
+    assert parser.section("response") == Section("response", "gm <b>fren</", False)
+
+
+def test_extract_tagged_sections():
+    sections = extract_tagged_sections(
+        ENTITIES + "<next_node></next_node>",
+        ["scratchpad", "output", "next_node", "questions"],
+    )
+
+    assert sections == {
+        "scratchpad": '"2 < 3" so I\'ll put the JSON in <output>.',
+        "output": '{"entities": []}',
+    }
+    assert extract_xml_content("<next_node> ask_user\n</next_node>", "next_node") == (
+        "ask_user"
+    )
+    assert extract_xml_content(ENTITIES, "questions") is None
+
+
+@pytest.mark.parametrize(
+    "response, expected",
+    [
+        ("<is_relevant>true</is_relevant>\n<response> gm </response>", ("gm", "true")),
+        ("<think>plan</think>\n<response>gm</response>", ("gm",)),
+        ("<think><response>no</response></think><response>gm</response>", ("gm",)),
+        ("<is_relevant>false</is_relevant>\n<b>gm</b>\n", ("gm", "false")),
+        ("<response>cut off", ("cut off",)),
+        # An unterminated thinking section still gives up the response it holds
+        ("<is_relevant>true<response>gm</response>", ("gm", "true")),
+    ],
+)
+def test_parse_response(response: str, expected: tuple[str, ...]):
+    assert parse_response(response, "is_relevant", "response") == expected
+
+
+def test_parse_response_finds_the_response_in_unterminated_planning():
+    response = "<response_planning>plan<response>answer</response>"
+
+    assert parse_response(response, "response_planning", "response") == (
+        "answer",
+        "plan",
+    )
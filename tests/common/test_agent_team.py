@@ -0,0 +1,100 @@
+import asyncio
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from brokeshire_agents.common.agent_team import AgentTeam
+from brokeshire_agents.common.conversation import Conversation, conversation_reducer
+
+
+class StalledAgentTeam(AgentTeam):
+    async def _run_conversation(self, message, context=None):
+        await asyncio.Event().wait()
+
+
+async def test_cancel_stops_conversation_and_pending_send():
+    completed = []
+    agent_team = StalledAgentTeam(lambda: completed.append(True))
+
+    send = asyncio.create_task(agent_team.send("hello", "chat"))
+    # Let the conversation start
+    for _ in range(3):
+        await asyncio.sleep(0)
+    agent_team.cancel()
+
+    with pytest.raises(RuntimeError):
+        await send
+    await asyncio.sleep(0)
+    assert agent_team._conversation_task.cancelled()
+    assert completed == [True]
+
+
+class EchoState(TypedDict, total=False):
+    conversation: Annotated[Conversation, conversation_reducer]
+    user_utterance: str
+    intent_classification: str
+    suggestion_choice: dict | None
+    is_run_complete: bool
+
+
+class EchoAgentTeam(AgentTeam):
+    """Echoes user messages until the user has sent three of them."""
+
+    def __init__(self, on_complete=None):
+        super().__init__(on_complete)
+        self._config = {"configurable": {"thread_id": self._thread_id}}
+        graph = StateGraph(EchoState)
+        graph.add_node("echo", self._echo)
+        graph.add_node("ask_user", lambda state: {})
+        graph.add_edge(START, "echo")
+        graph.add_conditional_edges(
+            "echo",
+            lambda state: END if state.get("is_run_complete") else "ask_user",
+        )
+        graph.add_edge("ask_user", "echo")
+        self._app = graph.compile(
+            checkpointer=MemorySaver(), interrupt_before=["ask_user"]
+        )
+
+    def _echo(self, state: EchoState):
+        user_messages = [
+            message["content"]
+            for message in state["conversation"]["history"]
+            if message["sender_name"] == "user"
+        ]
+        return {
+            "conversation": {
+                "history": [
+                    {
+                        "sender_name": "echo",
+                        "content": " ".join(user_messages),
+                        "is_visible_to_user": True,
+                    }
+                ]
+            },
+            "is_run_complete": len(user_messages) == 3,  # noqa: PLR2004
+        }
+
+    async def _run_conversation(self, message, context=None):
+        await self._run_graph(self._app, self._config, message, ["user", "echo"])
+
+
+async def test_snapshot_resumes_conversation_in_another_team():
+    agent_team = EchoAgentTeam()
+    assert await agent_team.snapshot() is None
+
+    response = await agent_team.send("one", "chat")
+    assert response["message"] == "one"
+    snapshot = await agent_team.snapshot()
+    assert snapshot is not None
+    agent_team.cancel()
+
+    resumed_team = EchoAgentTeam()
+    await resumed_team.resume(snapshot)
+
+    response = await resumed_team.send("two", "chat")
+    assert response["message"] == "one two"
+    response = await resumed_team.send("three", "chat")
+    assert response["message"] == "one two three"
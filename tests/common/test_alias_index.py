@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from brokeshire_agents.common.alias_index import AliasCatalog, AliasIndex
+
+CHAINS = [
+    {"name": "Ethereum", "chain_id": "1"},
+    {"name": "Arbitrum One", "chain_id": "42161"},
+    {"name": "Optimism", "chain_id": "10"},
+    {"name": "OP Sepolia", "chain_id": "11155420"},
+]
+ALIAS_GROUPS = [
+    {"ethereum", "eth", "mainnet"},
+    {"arbitrum", "arbitrum one", "arb"},
+    {"optimism", "op", "op mainnet"},
+    {"op sepolia", "op"},
+]
+
+
+def test_alias_index_resolves_names_ids_and_groups():
+    index = AliasIndex(CHAINS, ["name", "chain_id"], "chain_id", ALIAS_GROUPS)
+
+    assert index.resolve("ethereum") is CHAINS[0]
+    assert index.resolve("  ETH ") is CHAINS[0]
+    assert index.resolve("42161") is CHAINS[1]
+    assert index.resolve("arb") is CHAINS[1]
+    assert index.resolve("op mainnet") is CHAINS[2]
+    assert index.resolve("base") is None
+
+
+def test_alias_index_leaves_out_ambiguous_aliases():
+    index = AliasIndex(CHAINS, ["name", "chain_id"], "chain_id", ALIAS_GROUPS)
+
+    # "op" is in the alias groups of both Optimism and OP Sepolia
+    assert index.resolve("op") is None
+
+
+def test_alias_index_prefers_key_values_over_group_members():
+    chains = [*CHAINS, {"name": "Arb", "chain_id": "999"}]
+    index = AliasIndex(chains, ["name", "chain_id"], "chain_id", ALIAS_GROUPS)
+
+    assert index.resolve("arb")["chain_id"] == "999"
+    assert index.resolve("arbitrum one")["chain_id"] == "42161"
+
+
+async def test_alias_catalog_keeps_learned_aliases_across_refreshes():
+    fetches = 0
+
+    async def fetch():
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0)
+        return CHAINS
+
+    catalog = AliasCatalog(fetch, ["name", "chain_id"], "chain_id", ALIAS_GROUPS)
+    results = await asyncio.gather(*(catalog.resolve("eth") for _ in range(5)))
+    assert results == [CHAINS[0]] * 5
+    assert fetches == 1
+
+    assert await catalog.resolve("the arbitrum chain") is None
+    catalog.learn("the arbitrum chain", CHAINS[1])
+    await catalog.refresh()
+
+    assert fetches == 2
+    assert await catalog.resolve("The Arbitrum chain") is CHAINS[1]
+    assert catalog.stats()["learned_aliases"] == 1
+    assert catalog.stats()["misses"] == 1
+
+
+async def test_alias_catalog_serves_stale_index_on_error():
+    should_fail = False
+
+    async def fetch():
+        if should_fail:
+            raise RuntimeError("unavailable")
+        return CHAINS
+
+    catalog = AliasCatalog(fetch, ["name", "chain_id"], "chain_id", ttl=0)
+    assert await catalog.resolve("ethereum") is CHAINS[0]
+    should_fail = True
+
+    assert await catalog.resolve("ethereum") is CHAINS[0]
+    with pytest.raises(RuntimeError):
+        await catalog.refresh()
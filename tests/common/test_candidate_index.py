@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from brokeshire_agents.common.candidate_index import CandidateIndex, phonetic_key
+
+
+def load_tokens(file_name: str) -> list[dict]:
+    with open(f"tests/common/{file_name}") as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize(
+    "named_entity, file_name, expected_symbol",
+    [
+        ("doge coin", "squidV1BNBChainTokens.json", "DOGE"),
+        ("pancake", "squidV1BNBChainTokens.json", "CAKE"),
+        ("eth", "squidV1ArbitrumTokens.json", "WETH"),
+        ("bitcoin", "squidV1ArbitrumTokens.json", "WBTC"),
+        ("magik", "squidV1ArbitrumTokens.json", "MAGIC"),
+        ("arb", "squidV1ArbitrumTokens.json", "ARB"),
+    ],
+)
+def test_candidates_include_expected_token(
+    named_entity: str, file_name: str, expected_symbol: str
+):
+    tokens = load_tokens(file_name)
+    index = CandidateIndex(tokens, ["name", "symbol"])
+
+    candidates = index.candidates(named_entity, limit=5)
+
+    assert expected_symbol in [tokens[i]["symbol"] for i in candidates]
+
+
+def test_candidates_are_capped_and_ranked():
+    tokens = load_tokens("squidV1BNBChainTokens.json")
+    index = CandidateIndex(tokens, ["name", "symbol"])
+
+    candidates = index.candidates("binance", limit=3)
+    scores = index.scores("binance")
+
+    assert len(candidates) == 3
+    assert list(scores[candidates]) == sorted(scores[candidates], reverse=True)
+    assert index.candidates("", limit=3) == []
+
+
+def test_phonetic_key():
+    assert phonetic_key("Robert") == phonetic_key("Rupert") == "r163"
+    assert phonetic_key("magik") == phonetic_key("MAGIC")
+    assert phonetic_key("42") == ""
@@ -0,0 +1,107 @@
+from typing import Annotated, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from brokeshire_agents.common.checkpointer import (
+    SqliteCheckpointSaver,
+    apply_delta,
+    diff_value,
+)
+from brokeshire_agents.common.conversation import Conversation, conversation_reducer
+
+
+def test_diff_value_round_trip():
+    base = {"history": [1, 2], "contexts": {"a": [1]}, "name": "x", "old": True}
+    value = {"history": [1, 2, 3], "contexts": {"a": [1, 2], "b": [3]}, "name": "y"}
+
+    delta = diff_value(base, value)
+
+    assert delta["items"]["history"] == {"__delta__": "append", "items": [3]}
+    assert apply_delta(base, delta) == value
+    assert apply_delta([1, 2], diff_value([1, 2], [2, 1])) == [2, 1]
+
+
+class CountState(TypedDict):
+    conversation: Annotated[Conversation, conversation_reducer]
+    count: int
+
+
+def count(state: CountState):
+    return {
+        "conversation": {
+            "history": [
+                {
+                    "sender_name": "counter",
+                    "content": str(state["count"]),
+                    "is_visible_to_user": True,
+                }
+            ]
+        },
+        "count": state["count"] + 1,
+    }
+
+
+def compile_graph(checkpointer: SqliteCheckpointSaver):
+    graph = StateGraph(CountState)
+    graph.add_node("counter", count)
+    graph.add_edge(START, "counter")
+    graph.add_edge("counter", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def run_steps(app, config, steps: int):
+    app.invoke(
+        {
+            "conversation": {"history": [], "participants": ["user", "counter"]},
+            "count": 0,
+        },
+        config,
+    )
+    for _ in range(steps - 1):
+        state = app.get_state(config).values
+        app.invoke({"conversation": {"history": []}, "count": state["count"]}, config)
+
+
+def test_checkpointer_persists_state_across_instances(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    config = {"configurable": {"thread_id": "thread"}}
+    run_steps(compile_graph(SqliteCheckpointSaver(path)), config, 5)
+
+    restarted_saver = SqliteCheckpointSaver(path)
+    state = compile_graph(restarted_saver).get_state(config).values
+
+    assert state["count"] == 5
+    assert [m["content"] for m in state["conversation"]["history"]] == [
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+    deltas = restarted_saver._connection.execute(
+        "SELECT COUNT(*) FROM blobs WHERE base_version IS NOT NULL"
+    ).fetchone()[0]
+    assert deltas > 0
+
+
+def test_checkpointer_prunes_old_checkpoints(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.db"), max_checkpoints=3)
+    app = compile_graph(saver)
+    config = {"configurable": {"thread_id": "thread"}}
+    run_steps(app, config, 20)
+
+    assert len(list(saver.list(config))) <= 3 + 10
+    state = app.get_state(config).values
+    assert state["count"] == 20
+    assert len(state["conversation"]["history"]) == 20
+
+
+def test_checkpointer_deletes_expired_threads(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.db"))
+    app = compile_graph(saver)
+    config = {"configurable": {"thread_id": "thread"}}
+    run_steps(app, config, 1)
+
+    assert saver.delete_expired(0) == 0
+    assert saver.delete_expired(float("inf")) == 1
+    assert saver.get_tuple(config) is None
@@ -4,7 +4,16 @@ import pytest
 
 import json
 
-from brokeshire_agents.common.entity_linker import link_entity
+from rapidfuzz import fuzz, process, utils
+
+from brokeshire_agents.common.entity_linker import (
+    FuzzyChoices,
+    decide_fuzzy_match,
+    fuzzy_entity_match,
+    get_system_prompt,
+    link_entity,
+    log_weighted_average,
+)
 
 console = Console()
 
@@ -135,3 +144,121 @@ async def test_classify_intent(
 
     if is_confident:
         assert entity_match["entity"]["address"] == expected_token_address
+
+
+def reference_fuzzy_entity_match(named_entity, entity_list, keys, cutoff=0.7, limit=5):
+    """Scalar implementation the vectorized fuzzy_entity_match must agree with"""
+    key_scores = {}
+    for key in keys:
+        matches = process.extract(
+            named_entity,
+            {i: str(entity.get(key, "")) for i, entity in enumerate(entity_list)},
+            scorer=fuzz.WRatio,
+            processor=utils.default_process,
+            limit=None,
+        )
+        key_scores[key] = {
+            i: score if score > 0 else score + 1 for _, score, i in matches
+        }
+    avg_scores = {
+        i: log_weighted_average([key_scores[key].get(i, 0) for key in keys])
+        for i in range(len(entity_list))
+    }
+    return sorted(
+        [(i, score) for i, score in avg_scores.items() if score >= cutoff],
+        key=lambda x: x[1],
+        reverse=True,
+    )[:limit]
+
+
+@pytest.mark.parametrize(
+    "named_entity", ["usd", "usdc", "axelar", "doge coin", "eth", "", "zzzz"]
+)
+@pytest.mark.parametrize("network_name", ["Arbitrum", "BNB Chain"])
+@pytest.mark.parametrize("limit", [1, 5, 50])
+def test_fuzzy_entity_match_matches_reference(
+    named_entity: str, network_name: str, limit: int
+):
+    entity_list = supported_tokens[network_name]
+    keys = ["name", "symbol"]
+    choices = FuzzyChoices(entity_list, keys)
+
+    expected = reference_fuzzy_entity_match(
+        named_entity, entity_list, keys, limit=limit
+    )
+    matches = fuzzy_entity_match(
+        named_entity, entity_list, keys, limit=limit, choices=choices
+    )
+
+    assert [m["entity"] for m in matches] == [entity_list[i] for i, _ in expected]
+    assert [m["confidence_percentage"] for m in matches] == pytest.approx(
+        [score for _, score in expected]
+    )
+    assert fuzzy_entity_match(named_entity, entity_list, keys, limit=limit) == matches
+
+
+def test_fuzzy_entity_match_rejects_mismatched_choices():
+    entity_list = supported_tokens["Base"]
+    choices = FuzzyChoices(entity_list[:10], ["name"])
+
+    with pytest.raises(ValueError):
+        fuzzy_entity_match("usdc", entity_list, ["name"], choices=choices)
+
+
+def test_system_prompt_has_one_line_per_entity():
+    entity_list = supported_tokens["Optimism"]
+    prompt = get_system_prompt(
+        {
+            i: {"name": e["name"], "symbol": e["symbol"]}
+            for i, e in enumerate(entity_list)
+        }
+    )
+
+    lines = prompt.split("# Unique entities\n", 1)[1].splitlines()[1:]
+    assert len(lines) == len(entity_list)
+    assert (
+        lines[0]
+        == f"0: name={entity_list[0]['name']}; symbol={entity_list[0]['symbol']}"
+    )
+
+
+CHAINS = [
+    {"name": "Base", "chain_id": "8453"},
+    {"name": "Blast", "chain_id": "81457"},
+    {"name": "Arbitrum One", "chain_id": "42161"},
+]
+
+
+async def test_link_entity_skips_llm_on_exact_match(monkeypatch):
+    async def fail_llm_entity_match(*args, **kwargs):
+        raise AssertionError("The LLM should not be called")
+
+    monkeypatch.setattr(
+        "brokeshire_agents.common.entity_linker.llm_entity_match",
+        fail_llm_entity_match,
+    )
+
+    results = await link_entity("base", CHAINS, ["name", "chain_id"], ["name"])
+
+    assert results["decision"] == "exact_match"
+    assert results["llm_matches"] == [
+        {"entity": CHAINS[0], "confidence_percentage": 100.0}
+    ]
+
+
+def test_decide_fuzzy_match():
+    def match(name: str, confidence: float):
+        return {"entity": {"name": name}, "confidence_percentage": confidence}
+
+    decision, decisive_match = decide_fuzzy_match(
+        "arbitrum", [match("Arbitrum One", 95), match("Arbitrum Nova", 70)], ["name"]
+    )
+    assert decision == "clear_margin"
+    assert decisive_match == match("Arbitrum One", 95)
+    assert decide_fuzzy_match(
+        "arbitrum", [match("Arbitrum One", 95), match("Arbitrum Nova", 90)], ["name"]
+    ) == ("llm", None)
+    assert decide_fuzzy_match(
+        "usdc", [match("USDC", 100), match("usdc", 100)], ["name"]
+    ) == ("llm", None)
+    assert decide_fuzzy_match("usdc", [], ["name"]) == ("llm", None)
@@ -0,0 +1,66 @@
+import httpx
+import pytest
+
+from brokeshire_agents.common.http_client import (
+    RateLimitedTransport,
+    close_http_clients,
+    get_http_client,
+)
+from brokeshire_agents.common.rate_limiter import RateLimiter
+
+
+async def test_get_http_client_pools_by_origin():
+    gecko_client = get_http_client("https://api.geckoterminal.com/api/v2/search")
+    same_client = get_http_client("https://api.geckoterminal.com/api/v2/networks")
+    dex_client = get_http_client("https://api.dexscreener.com/latest/dex/tokens/x")
+
+    assert gecko_client is same_client
+    assert gecko_client is not dex_client
+
+    await close_http_clients()
+
+    assert gecko_client.is_closed
+    assert get_http_client("https://api.geckoterminal.com/api/v2") is not gecko_client
+
+    await close_http_clients()
+
+
+def test_get_http_client_rejects_relative_url():
+    with pytest.raises(ValueError):
+        get_http_client("/tokens/1")
+
+
+async def test_rate_limited_transport_retries_after_the_retry_after_delay():
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0.01"}),
+        httpx.Response(200, json={"data": []}),
+    ]
+    limiter = RateLimiter(rate=100, burst=5)
+    transport = RateLimitedTransport(
+        httpx.MockTransport(lambda _: responses.pop(0)), limiter
+    )
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get("https://api.geckoterminal.com/api/v2/search")
+
+    assert response.json() == {"data": []}
+    assert limiter.stats()["rate_limited"] == 1
+    assert limiter.rate == 55
+
+
+async def test_rate_limited_transport_gives_up_on_long_retry_after():
+    requests = 0
+
+    def handler(_: httpx.Request) -> httpx.Response:
+        nonlocal requests
+        requests += 1
+        return httpx.Response(429, headers={"Retry-After": "3600"})
+
+    limiter = RateLimiter(rate=100, burst=5)
+    transport = RateLimitedTransport(httpx.MockTransport(handler), limiter)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get("https://api.geckoterminal.com/api/v2/search")
+
+    assert response.status_code == 429
+    assert requests == 1
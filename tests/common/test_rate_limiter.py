@@ -0,0 +1,69 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+from brokeshire_agents.common.rate_limiter import (
+    RateLimiter,
+    get_rate_limiter,
+    parse_retry_after,
+)
+
+
+async def test_rate_limiter_allows_a_burst_then_keeps_to_its_rate():
+    limiter = RateLimiter(rate=50, burst=2)
+    order: list[int] = []
+
+    async def request(i: int):
+        await limiter.acquire()
+        order.append(i)
+
+    start = time.monotonic()
+    await asyncio.gather(*(request(i) for i in range(5)))
+
+    # 2 requests from the burst, then 3 more at 50 per second
+    assert time.monotonic() - start >= 3 / 50 * 0.9
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.stats() == {
+        "rate": 50,
+        "max_rate": 50,
+        "queue_depth": 0,
+        "acquired": 5,
+        "throttled": 3,
+        "rate_limited": 0,
+    }
+
+
+async def test_rate_limiter_backs_off_and_recovers_its_rate():
+    limiter = RateLimiter(rate=100, burst=5)
+
+    assert limiter.backoff(0.05) == 0.05
+    assert limiter.backoff() == 2
+    assert limiter.rate == 25
+    limiter.recover()
+    assert limiter.rate == 30
+    assert limiter.backoff() == 1
+
+    limiter = RateLimiter(rate=100, burst=5)
+    limiter.backoff(0.05)
+    start = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - start >= 0.05 * 0.9
+
+
+def test_parse_retry_after_reads_seconds_and_dates():
+    assert parse_retry_after("12") == 12
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    in_a_minute = formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= parse_retry_after(in_a_minute) <= 60
+
+
+def test_rate_limiters_are_shared_per_known_host():
+    limiter = get_rate_limiter("https://api.geckoterminal.com/api/v2/networks")
+
+    assert limiter is get_rate_limiter("https://api.geckoterminal.com/api/v2/search")
+    assert get_rate_limiter("https://example.com/api") is None
+    with pytest.raises(ValueError, match="must be positive"):
+        RateLimiter(rate=0, burst=1)
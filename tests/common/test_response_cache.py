@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from brokeshire_agents.common.response_cache import (
+    ResponseCache,
+    SqliteResponseStore,
+)
+from brokeshire_agents.token_tech_analysis.gecko_terminal_client import (
+    TokenResponseData,
+)
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Upstream:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.fail = False
+
+    async def fetch(self) -> TokenResponseData:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            msg = "upstream down"
+            raise ValueError(msg)
+        return TokenResponseData(id=f"pool_{self.calls}", type="pool")
+
+
+async def test_response_cache_serves_fresh_then_stale_while_revalidating():
+    timer = FakeTimer()
+    cache = ResponseCache(maxsize=10, timer=timer)
+    upstream = Upstream()
+
+    first = await cache.get_or_fetch("pools", upstream.fetch, ttl=60, stale_ttl=60)
+    assert await cache.get_or_fetch("pools", upstream.fetch, 60, 60) is first
+    assert upstream.calls == 1
+
+    timer.now += 90
+    assert await cache.get_or_fetch("pools", upstream.fetch, 60, 60) is first
+    await asyncio.sleep(0.01)
+
+    refreshed = await cache.get_or_fetch("pools", upstream.fetch, 60, 60)
+    assert refreshed.id == "pool_2"
+    assert upstream.calls == 2
+    assert cache.stats()["stale_hits"] == 1
+
+
+async def test_response_cache_keeps_stale_value_when_revalidation_fails():
+    timer = FakeTimer()
+    cache = ResponseCache(maxsize=10, timer=timer)
+    upstream = Upstream()
+    first = await cache.get_or_fetch("pools", upstream.fetch, ttl=60, stale_ttl=60)
+
+    upstream.fail = True
+    timer.now += 90
+    assert await cache.get_or_fetch("pools", upstream.fetch, 60, 60) is first
+    await asyncio.sleep(0.01)
+    assert cache.stats()["revalidation_errors"] == 1
+
+    timer.now += 60
+    with pytest.raises(ValueError, match="upstream down"):
+        await cache.get_or_fetch("pools", upstream.fetch, 60, 60)
+
+
+async def test_response_cache_reloads_parsed_models_from_disk(tmp_path):
+    timer = FakeTimer()
+    path = str(tmp_path / "responses.db")
+    upstream = Upstream()
+    cache = ResponseCache(10, SqliteResponseStore(path, timer), timer)
+    await cache.get_or_fetch("pools", upstream.fetch, ttl=60)
+
+    restarted = ResponseCache(10, SqliteResponseStore(path, timer), timer)
+    cached = await restarted.get_or_fetch("pools", upstream.fetch, ttl=60)
+
+    assert cached == TokenResponseData(id="pool_1", type="pool")
+    assert upstream.calls == 1
+    assert restarted.stats()["disk_hits"] == 1
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from brokeshire_agents.common.session_store import (
+    InMemorySessionStore,
+    SessionSnapshot,
+    SqliteSessionStore,
+    create_session_store,
+)
+
+
+def create_snapshot(session_id: str, version: int = 1, updated_at: float | None = None):
+    return SessionSnapshot(
+        session_id=session_id,
+        version=version,
+        updated_at=updated_at if updated_at is not None else time.time(),
+        route="convert_crypto_action",
+        store_transaction_info={"url": "https://example.com"},
+        user_chat_id="chat",
+        user_address="0x0000000000000000000000000000000000000001",
+        agent_team={
+            "thread_id": "thread",
+            "checkpoint_type": "msgpack",
+            "checkpoint": "AAAA",
+            "intent_suggestions": ["Swap tokens"],
+            "expression_suggestions": None,
+        },
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemorySessionStore()
+    return SqliteSessionStore(str(tmp_path / "sessions.db"))
+
+
+async def test_session_store_round_trip(store):
+    snapshot = create_snapshot("a")
+    await store.put(snapshot)
+    assert await store.get("a") == snapshot
+
+    newer_snapshot = create_snapshot("a", version=2)
+    await store.put(newer_snapshot)
+    assert await store.get("a") == newer_snapshot
+
+    await store.delete("a")
+    assert await store.get("a") is None
+
+
+async def test_session_store_deletes_expired_snapshots(store):
+    now = time.time()
+    await store.put(create_snapshot("old", updated_at=now - 100))
+    await store.put(create_snapshot("new", updated_at=now))
+
+    assert await store.delete_expired(now - 50) == 1
+    assert await store.get("old") is None
+    assert await store.get("new") is not None
+
+
+def test_create_session_store(tmp_path):
+    assert isinstance(create_session_store("memory://"), InMemorySessionStore)
+    assert isinstance(
+        create_session_store(f"sqlite:///{tmp_path / 'sessions.db'}"),
+        SqliteSessionStore,
+    )
+    with pytest.raises(ValueError):
+        create_session_store("redis://localhost")
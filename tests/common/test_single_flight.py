@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from brokeshire_agents.common.single_flight import (
+    SingleFlight,
+    single_flight,
+    single_flight_stats,
+)
+
+
+async def test_single_flight_coalesces_concurrent_calls_per_key():
+    group: SingleFlight[str, str] = SingleFlight()
+    calls: list[str] = []
+
+    async def fetch(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    results = await asyncio.gather(
+        *(group.do(key, lambda key=key: fetch(key)) for key in ["a", "a", "b", "a"])
+    )
+
+    assert results == ["A", "A", "B", "A"]
+    assert sorted(calls) == ["a", "b"]
+    assert group.stats() == {
+        "in_flight": 0,
+        "calls": 4,
+        "executions": 2,
+        "coalesced": 2,
+        "coalescing_ratio": 0.5,
+    }
+
+    # Finished calls aren't cached
+    assert await group.do("a", lambda: fetch("a")) == "A"
+    assert calls.count("a") == 2
+
+
+async def test_single_flight_shares_errors_and_survives_cancelled_callers():
+    group: SingleFlight[str, str] = SingleFlight()
+    started = asyncio.Event()
+
+    async def fail() -> str:
+        started.set()
+        await asyncio.sleep(0.01)
+        msg = "upstream down"
+        raise ValueError(msg)
+
+    cancelled = asyncio.create_task(group.do("key", fail))
+    waiting = asyncio.create_task(group.do("key", fail))
+    await started.wait()
+    cancelled.cancel()
+
+    with pytest.raises(ValueError, match="upstream down"):
+        await waiting
+    assert group.stats()["executions"] == 1
+
+
+async def test_single_flight_decorator_reports_stats_by_name():
+    calls = 0
+
+    @single_flight("test_lookup", key=lambda route, parameters: route)
+    async def lookup(route: str, parameters: dict[str, int]) -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return len(route)
+
+    results = await asyncio.gather(lookup("/a", {}), lookup("/a", {"page": 1}))
+
+    assert results == [2, 2]
+    assert calls == 1
+    assert single_flight_stats()["test_lookup"]["coalesced"] == 1
@@ -1,9 +1,17 @@
+import asyncio
 from pprint import pprint
 import pytest
 
 
+from brokeshire_agents.common import entity_linker, transaction
+from brokeshire_agents.common.alias_index import AliasCatalog
 from brokeshire_agents.common.entity_linker import link_entity
-from brokeshire_agents.common.transaction import link_chain, link_token
+from brokeshire_agents.common.transaction import (
+    ChainTokens,
+    TokenCatalog,
+    link_chain,
+    link_token,
+)
 
 
 @pytest.mark.parametrize(
@@ -115,3 +123,138 @@ async def test_link_token_by_address(
 
     assert is_confident
     assert entity_match["entity"]["name"] == expected_token_name
+
+
+TOKENS = [
+    {
+        "address": "0xaf88d065e77c8cc2239327c5edb3a432268e5831",
+        "name": "USD Coin",
+        "symbol": "USDC",
+    },
+    {
+        "address": "0xFF970A61A04b1cA14834A43f5dE4533eBDDB5CC8",
+        "name": "Bridged USDC",
+        "symbol": "USDC.e",
+    },
+    {
+        "address": "CNT1cbvCxBev8WTjmrhKxXFFfnXzBxoaZSNkhKwtpump",
+        "name": "Brokeshire",
+        "symbol": "BROKEAGI",
+    },
+]
+
+
+def test_chain_tokens_indexes():
+    chain_tokens = ChainTokens(TOKENS)
+
+    usdc = chain_tokens.get_by_address("0xAF88D065E77C8CC2239327C5EDB3A432268E5831")
+    assert usdc is TOKENS[0]
+    assert (
+        chain_tokens.get_by_address("0xff970a61a04b1ca14834a43f5de4533ebddb5cc8")
+        is TOKENS[1]
+    )
+    assert (
+        chain_tokens.get_by_address("CNT1cbvCxBev8WTjmrhKxXFFfnXzBxoaZSNkhKwtpump")
+        is TOKENS[2]
+    )
+    assert (
+        chain_tokens.get_by_address("cnt1cbvcxbev8wtjmrhkxxfffnxzbxoazsnkhkwtpump")
+        is None
+    )
+    assert chain_tokens.by_symbol["usdc"] == [TOKENS[0]]
+    assert chain_tokens.fuzzy_choices.values[3:] == ["usdc", "usdc e", "brokeagi"]
+
+
+async def test_token_catalog_shares_fetches():
+    fetched_chain_ids = []
+
+    async def fetch(chain_id: str):
+        fetched_chain_ids.append(chain_id)
+        await asyncio.sleep(0)
+        return TOKENS
+
+    catalog = TokenCatalog(fetch)
+    results = await asyncio.gather(*(catalog.get("42161") for _ in range(5)))
+    await catalog.get("42161")
+
+    assert fetched_chain_ids == ["42161"]
+    assert all(result is results[0] for result in results)
+    assert catalog.stats()["hits"] == 1
+
+
+async def test_token_catalog_serves_stale_tokens_on_error():
+    should_fail = False
+
+    async def fetch(chain_id: str):
+        if should_fail:
+            raise RuntimeError("unavailable")
+        return TOKENS
+
+    catalog = TokenCatalog(fetch, ttl=0)
+    chain_tokens = await catalog.get("8453")
+    should_fail = True
+
+    assert await catalog.get("8453") is chain_tokens
+    with pytest.raises(RuntimeError):
+        await catalog.get("10")
+
+
+async def test_link_chain_resolves_aliases_without_linking(monkeypatch):
+    async def fetch():
+        return [{"name": "Base", "chain_id": "8453"}]
+
+    async def fail_link_entity(*args, **kwargs):
+        raise AssertionError("Aliases should be resolved without the entity linker")
+
+    monkeypatch.setattr(
+        transaction,
+        "chain_aliases",
+        AliasCatalog(fetch, ["name", "chain_id"], "chain_id"),
+    )
+    monkeypatch.setattr(transaction, "link_entity", fail_link_entity)
+
+    results = await link_chain("8453")
+
+    assert results["decision"] == "alias_match"
+    assert results["llm_matches"][0]["entity"]["name"] == "Base"
+
+
+async def test_link_token_by_exact_symbol(monkeypatch):
+    vetted_usdc = {**TOKENS[0], "is_vetted_by_primary_data_source": True}
+    unvetted_usdc = {
+        **TOKENS[1],
+        "symbol": "USDC",
+        "is_vetted_by_primary_data_source": False,
+    }
+    pepes = [
+        {
+            "address": f"0x{i:040x}",
+            "name": f"Pepe {i}",
+            "symbol": "PEPE",
+            "is_vetted_by_primary_data_source": False,
+        }
+        for i in range(2)
+    ]
+
+    async def fetch(chain_id: str):
+        return [vetted_usdc, unvetted_usdc, *pepes]
+
+    llm_candidates = []
+
+    async def fake_llm_entity_match(named_entity, entities, keys, candidate_index):
+        llm_candidates.append(entities)
+        # The LLM's logprobs gave no valid index
+        return []
+
+    monkeypatch.setattr(transaction, "token_catalog", TokenCatalog(fetch))
+    monkeypatch.setattr(entity_linker, "llm_entity_match", fake_llm_entity_match)
+
+    results = await link_token(" usdc", "42161")
+    assert results["decision"] == "exact_match"
+    assert results["llm_matches"][0]["entity"] is vetted_usdc
+    assert llm_candidates == []
+
+    results = await link_token("PEPE", "42161")
+    assert llm_candidates == [pepes]
+    # Callers fall back on the fuzzy matches
+    assert [match["entity"] for match in results["fuzzy_matches"]] == pepes
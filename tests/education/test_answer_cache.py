@@ -0,0 +1,62 @@
+import pytest
+
+from brokeshire_agents.education.answer_cache import SemanticAnswerCache
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+TEAM_CHUNKS = ("team_1", "team_2")
+
+
+def test_answer_cache_reuses_answers_of_similar_questions_with_same_chunks():
+    cache = SemanticAnswerCache(maxsize=10, ttl=60, threshold=0.95)
+    cache.set([1.0, 0.0], TEAM_CHUNKS, "the team")
+
+    assert cache.get([2.0, 0.1], TEAM_CHUNKS) == "the team"
+    # Too different a question, or one that retrieved other chunks
+    assert cache.get([1.0, 1.0], TEAM_CHUNKS) is None
+    assert cache.get([1.0, 0.0], ("faq_1", "team_2")) is None
+
+    cache.bypass()
+    assert cache.stats() == {
+        "size": 1,
+        "maxsize": 10,
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": pytest.approx(1 / 3),
+        "bypasses": 1,
+        "evictions": 0,
+        "expirations": 0,
+    }
+
+
+def test_answer_cache_returns_the_most_similar_answer():
+    cache = SemanticAnswerCache(maxsize=10, ttl=60, threshold=0.9)
+    cache.set([1.0, 0.3], TEAM_CHUNKS, "close")
+    cache.set([1.0, 0.0], TEAM_CHUNKS, "closest")
+
+    assert cache.get([1.0, 0.05], TEAM_CHUNKS) == "closest"
+
+
+def test_answer_cache_expires_and_evicts_least_recently_used():
+    timer = FakeTimer()
+    cache = SemanticAnswerCache(maxsize=2, ttl=60, threshold=0.95, timer=timer)
+    cache.set([1.0, 0.0], ("a",), "a")
+    cache.set([1.0, 0.0], ("b",), "b")
+    assert cache.get([1.0, 0.0], ("a",)) == "a"
+
+    cache.set([1.0, 0.0], ("c",), "c")
+    assert cache.get([1.0, 0.0], ("b",)) is None
+    assert cache.get([1.0, 0.0], ("a",)) == "a"
+
+    timer.now += 61
+    assert cache.get([1.0, 0.0], ("c",)) is None
+    assert len(cache) == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,79 @@
+from brokeshire_agents.education.doc_memory import (
+    EmbeddingCache,
+    chunk_id,
+    sync_doc_memory,
+)
+from brokeshire_agents.education.vector_index import Match, Vector, VectorIndex
+
+
+class FakeIndex(VectorIndex):
+    def __init__(self) -> None:
+        self.vectors: dict[str, Vector] = {}
+        self.fail_listing = False
+
+    async def query(self, vector: list[float], top_k: int) -> list[Match]:
+        raise NotImplementedError
+
+    async def list_ids(self) -> set[str]:
+        if self.fail_listing:
+            msg = "listing not supported"
+            raise ValueError(msg)
+        return set(self.vectors)
+
+    async def upsert(self, vectors: list[Vector]) -> None:
+        self.vectors.update((vector["id"], vector) for vector in vectors)
+
+    async def delete(self, ids: list[str]) -> None:
+        for vector_id in ids:
+            del self.vectors[vector_id]
+
+    async def delete_all(self) -> None:
+        self.vectors.clear()
+
+
+class Embedder:
+    def __init__(self) -> None:
+        self.embedded: list[str] = []
+
+    async def __call__(self, chunks: list[str]) -> list[list[float]]:
+        self.embedded.extend(chunks)
+        return [[float(len(chunk)), 0.5] for chunk in chunks]
+
+
+DOCS = [("FAQ.md", "what is brokeshire"), ("Team.md", "who built it")]
+
+
+async def test_sync_doc_memory_only_embeds_and_upserts_changed_chunks(tmp_path):
+    index = FakeIndex()
+    embed = Embedder()
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"))
+
+    assert await sync_doc_memory(DOCS, index, embed, cache) == (2, 0)
+    assert embed.embedded == ["what is brokeshire", "who built it"]
+    assert index.vectors[chunk_id("who built it")]["metadata"] == {
+        "doc": "Team.md",
+        "chunk": "who built it",
+    }
+
+    # Unchanged docs are a no-op
+    assert await sync_doc_memory(DOCS, index, embed, cache) == (0, 0)
+    assert len(embed.embedded) == 2
+
+    changed = [DOCS[0], ("Team.md", "who runs it")]
+    assert await sync_doc_memory(changed, index, embed, cache) == (1, 1)
+    assert embed.embedded[2:] == ["who runs it"]
+    assert set(index.vectors) == {chunk_id(chunk) for _, chunk in changed}
+
+
+async def test_sync_doc_memory_rebuilds_from_cache_without_embedding(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    embed = Embedder()
+    await sync_doc_memory(DOCS, FakeIndex(), embed, EmbeddingCache(path))
+
+    index = FakeIndex()
+    index.fail_listing = True
+    index.vectors["stale"] = Vector(id="stale", values=[0.0, 0.0], metadata={})
+    assert await sync_doc_memory(DOCS, index, embed, EmbeddingCache(path)) == (2, 0)
+    assert len(embed.embedded) == 2
+    assert index.vectors[chunk_id("who built it")]["values"] == [12.0, 0.5]
+    assert "stale" not in index.vectors
@@ -1,6 +1,8 @@
 from pprint import pprint
 
 import pytest
+from brokeshire_agents.education import education as education_module
+from brokeshire_agents.education.answer_cache import SemanticAnswerCache
 from brokeshire_agents.education.education import education
 
 
@@ -18,3 +20,38 @@ async def test_education(user_request: str):
     response = await education(user_request)
 
     pprint(response)
+
+
+@pytest.mark.parametrize(
+    "completion, is_cached",
+    [
+        ("<response_planning>plan</response_planning><response>gm</response>", True),
+        ("<response_planning>plan</response_planning><response>gm", False),
+        ("<response_planning>plan</response_planning><response></response>", False),
+        ("<response_planning>plan</response_planning>gm", False),
+    ],
+)
+async def test_education_only_caches_complete_answers(
+    monkeypatch, completion: str, is_cached: bool
+):
+    class FakeIndex:
+        async def query(self, vector, top_k):
+            return [{"id": "chunk", "score": 1.0, "metadata": {"chunk": "docs"}}]
+
+    async def embed_query(user_request):
+        return [1.0, 0.0]
+
+    async def stream_openrouter_response(messages, models):
+        yield completion
+
+    answer_cache = SemanticAnswerCache(maxsize=10, ttl=60, threshold=0.95)
+    monkeypatch.setattr(education_module, "vector_index", FakeIndex())
+    monkeypatch.setattr(education_module, "embed_query", embed_query)
+    monkeypatch.setattr(
+        education_module, "stream_openrouter_response", stream_openrouter_response
+    )
+    monkeypatch.setattr(education_module, "answer_cache", answer_cache)
+
+    await education("who are you?")
+
+    assert len(answer_cache) == is_cached
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from brokeshire_agents.education.vector_index import (
+    LocalVectorIndex,
+    PineconeVectorIndex,
+    Vector,
+    create_vector_index,
+)
+
+
+def make_vectors(count: int, dimensions: int, seed: int = 0) -> list[Vector]:
+    rng = np.random.default_rng(seed)
+    return [
+        Vector(id=f"chunk_{i}", values=values.tolist(), metadata={"chunk": str(i)})
+        for i, values in enumerate(rng.normal(size=(count, dimensions)))
+    ]
+
+
+async def test_local_vector_index_returns_most_similar_first(tmp_path):
+    index = LocalVectorIndex(str(tmp_path), "docs")
+    vectors = make_vectors(50, 16)
+    await index.upsert(vectors)
+
+    query = np.random.default_rng(1).normal(size=16)
+    matches = await index.query(query.tolist(), top_k=3)
+
+    values = np.array([vector["values"] for vector in vectors])
+    similarities = (
+        values @ query / (np.linalg.norm(values, axis=1) * np.linalg.norm(query))
+    )
+    expected = np.argsort(-similarities)[:3]
+    assert [match["id"] for match in matches] == [f"chunk_{i}" for i in expected]
+    assert [match["score"] for match in matches] == pytest.approx(
+        similarities[expected], rel=1e-5
+    )
+    assert matches[0]["metadata"] == {"chunk": str(expected[0])}
+
+
+async def test_local_vector_index_persists_upserts_and_deletes(tmp_path):
+    index = LocalVectorIndex(str(tmp_path), "docs")
+    vectors = make_vectors(3, 4)
+    await index.upsert(vectors)
+    await index.upsert(
+        [Vector(id="chunk_0", values=vectors[2]["values"], metadata={"chunk": "new"})]
+    )
+    await index.delete(["chunk_2"])
+
+    reopened = LocalVectorIndex(str(tmp_path), "docs")
+    assert await reopened.list_ids() == {"chunk_0", "chunk_1"}
+    matches = await reopened.query(vectors[2]["values"], top_k=5)
+    assert len(matches) == 2
+    assert matches[0]["id"] == "chunk_0"
+    assert matches[0]["metadata"] == {"chunk": "new"}
+    assert matches[0]["score"] == pytest.approx(1.0)
+
+    await reopened.delete_all()
+    assert await reopened.query(vectors[0]["values"], top_k=3) == []
+    assert await LocalVectorIndex(str(tmp_path), "docs").list_ids() == set()
+
+
+def test_create_vector_index_from_url(tmp_path):
+    assert isinstance(
+        create_vector_index("pinecone://brokeshire", "docs"), PineconeVectorIndex
+    )
+    assert isinstance(
+        create_vector_index(f"local:///{tmp_path}", "docs"), LocalVectorIndex
+    )
+    with pytest.raises(ValueError, match="Unsupported vector index URL"):
+        create_vector_index("redis://localhost", "docs")
@@ -0,0 +1,47 @@
+"""Synthetic GeckoTerminal pools shared by the tests and benchmarks."""
+
+import random
+from datetime import UTC, datetime, timedelta
+
+from brokeshire_agents.token_tech_analysis.gecko_terminal_client import PoolData
+
+
+def make_pools(size: int, seed: int = 0) -> list[PoolData]:
+    rng = random.Random(seed)
+    now = datetime(2024, 12, 1, tzinfo=UTC)
+    transactions = {"buys": 1, "sells": 1, "buyers": 1, "sellers": 1}
+    token = {"data": {"id": "token", "type": "token"}}
+
+    def price_change() -> str:
+        return f"{rng.choice([0, rng.uniform(-100, 50), rng.uniform(-200, 2_000)]):.2f}"
+
+    return [
+        PoolData.model_validate(
+            {
+                "id": f"solana_pool_{i}",
+                "type": "pool",
+                "attributes": {
+                    "address": f"pool_{i}",
+                    "pool_created_at": (
+                        now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                    ).isoformat(),
+                    "volume_usd": {"h24": f"{rng.lognormvariate(10, 3):.2f}"},
+                    "reserve_in_usd": f"{rng.lognormvariate(11, 2):.4f}",
+                    "price_change_percentage": {
+                        "h1": price_change(),
+                        "h6": price_change(),
+                        "h24": price_change(),
+                    },
+                    "transactions": dict.fromkeys(
+                        ["m5", "m15", "m30", "h1", "h24"], transactions
+                    ),
+                },
+                "relationships": {
+                    "base_token": token,
+                    "quote_token": token,
+                    "dex": token,
+                },
+            }
+        )
+        for i in range(size)
+    ]
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from brokeshire_agents.token_tech_analysis import curate_tokens
+from brokeshire_agents.token_tech_analysis.dex_screener_client import (
+    DexScreenerOrdersResponse,
+    DexScreenerResponse,
+)
+from tests.pools import make_pools
+
+LOOKUP_SECONDS = 0.05
+
+
+def make_pool(network: str):
+    pool = make_pools(1)[0]
+    pool.relationships.base_token.data.id = f"{network}_token_address"
+    return pool
+
+
+@pytest.fixture
+def lookups(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, ...]]:
+    calls: list[tuple[str, ...]] = []
+
+    async def query_dex_screener_pairs(token_address):
+        calls.append(("pairs", token_address))
+        await asyncio.sleep(LOOKUP_SECONDS)
+        return DexScreenerResponse.model_validate({"schemaVersion": "1.0.0"})
+
+    async def query_dex_screener_orders(chain_id, token_address):
+        calls.append(("orders", chain_id, token_address))
+        await asyncio.sleep(LOOKUP_SECONDS)
+        return DexScreenerOrdersResponse(data=[])
+
+    async def query_birdeye_security(token_address):
+        calls.append(("birdeye", token_address))
+        await asyncio.sleep(LOOKUP_SECONDS)
+        msg = "Birdeye API error: rate limited"
+        raise ValueError(msg)
+
+    monkeypatch.setattr(
+        curate_tokens, "query_dex_screener_pairs", query_dex_screener_pairs
+    )
+    monkeypatch.setattr(
+        curate_tokens, "query_dex_screener_orders", query_dex_screener_orders
+    )
+    monkeypatch.setattr(curate_tokens, "query_birdeye_security", query_birdeye_security)
+    return calls
+
+
+async def test_build_token_metrics_runs_lookups_concurrently(lookups):
+    start = time.monotonic()
+    metrics = await curate_tokens.build_token_metrics(make_pool("solana"))
+
+    assert time.monotonic() - start < LOOKUP_SECONDS * 2
+    assert sorted(lookups) == [
+        ("birdeye", "token_address"),
+        ("orders", "solana", "token_address"),
+        ("pairs", "token_address"),
+    ]
+    # Birdeye failed, but GeckoTerminal and DexScreener data is still assembled
+    assert metrics.address == "token_address"
+    assert metrics.dex_screener_data
+    assert metrics.creator_address is None
+
+
+async def test_build_token_metrics_maps_networks_and_enforces_deadlines(
+    lookups, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(curate_tokens, "DEX_SCREENER_PAIRS_DEADLINE", 0.01)
+
+    metrics = await curate_tokens.build_token_metrics(make_pool("eth"))
+
+    assert ("orders", "ethereum", "token_address") in lookups
+    assert all(lookup[0] != "birdeye" for lookup in lookups)
+    assert not metrics.dex_screener_data
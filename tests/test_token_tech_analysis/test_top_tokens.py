@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from brokeshire_agents.token_tech_analysis.curate_tokens import get_top_tokens
+from tests.benchmarks.bench_top_tokens import scalar_get_top_tokens
+from tests.pools import make_pools
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_get_top_tokens_ranks_like_the_scalar_implementation(seed: int):
+    rng = random.Random(seed)
+    pools = make_pools(rng.randint(1, 300), seed)
+    # Duplicated pools tie, and must keep their input order
+    pools += rng.sample(pools, k=min(len(pools), 5))
+    limit = rng.choice([1, 3, 10, 50])
+
+    expected = scalar_get_top_tokens(pools, limit)
+    top_tokens = get_top_tokens(pools, limit)
+
+    assert [t.attributes.address for t in top_tokens] == [
+        pool.attributes.address for pool, _ in expected
+    ]
+    assert [t.score for t in top_tokens] == pytest.approx(
+        [score for _, score in expected], abs=1e-9
+    )
+
+
+def test_get_top_tokens_skips_pools_it_cannot_parse():
+    pools = make_pools(3)
+    pools[1].attributes.pool_created_at = "not a date"
+
+    top_tokens = get_top_tokens(pools)
+
+    assert {t.attributes.address for t in top_tokens} == {"pool_0", "pool_2"}
+    assert get_top_tokens([]) == []
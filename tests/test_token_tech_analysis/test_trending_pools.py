@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from brokeshire_agents.token_tech_analysis import curate_tokens
+from brokeshire_agents.token_tech_analysis.gecko_terminal_client import (
+    DEFAULT_TTL,
+    ROUTE_SUFFIX_TTLS,
+    GeckoTerminalResponse,
+    _gecko_terminal_ttl,
+)
+from tests.pools import make_pools
+
+
+async def test_fetch_trending_pools_fans_out_with_bounded_concurrency(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    in_flight = 0
+    max_in_flight = 0
+    queried: list[tuple[str, int]] = []
+
+    async def query_gecko_terminal(route, parameters=None):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+        page = parameters["page"]
+        queried.append((route, page))
+        if route == "/networks/eth/trending_pools" and page == 2:
+            msg = "Gecko Terminal API returned status code: 429"
+            raise Exception(msg)
+        pools = make_pools(2, seed=len(queried))
+        for i, pool in enumerate(pools):
+            # Every route lists the same token on its first pool
+            pool.relationships.base_token.data.id = (
+                "solana_shared" if i == 0 else f"{route}_{page}"
+            )
+        return GeckoTerminalResponse(data=pools)
+
+    monkeypatch.setattr(curate_tokens, "query_gecko_terminal", query_gecko_terminal)
+
+    pools = await curate_tokens.fetch_trending_pools(
+        networks=["solana", "eth"], pages=2, concurrency=2
+    )
+
+    assert len(queried) == 6
+    assert max_in_flight == 2
+    base_tokens = [pool.relationships.base_token.data.id for pool in pools]
+    assert len(base_tokens) == len(set(base_tokens)) == 1 + 5
+    shared_volumes = [
+        pool.attributes.volume_usd.h24
+        for pool in pools
+        if pool.relationships.base_token.data.id == "solana_shared"
+    ]
+    assert len(shared_volumes) == 1
+
+
+async def test_fetch_trending_pools_raises_when_every_page_fails(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def query_gecko_terminal(route, parameters=None):
+        msg = "Gecko Terminal API request timed out"
+        raise Exception(msg)
+
+    monkeypatch.setattr(curate_tokens, "query_gecko_terminal", query_gecko_terminal)
+
+    with pytest.raises(Exception, match="timed out"):
+        await curate_tokens.fetch_trending_pools(networks=[], pages=2)
+
+
+@pytest.mark.parametrize(
+    "route, ttl",
+    [
+        ("/networks/trending_pools", ROUTE_SUFFIX_TTLS["/trending_pools"]),
+        ("/networks/solana/trending_pools", ROUTE_SUFFIX_TTLS["/trending_pools"]),
+        ("/search/pools", DEFAULT_TTL),
+    ],
+)
+def test_trending_pools_routes_are_cached_longer(route: str, ttl: float):
+    assert _gecko_terminal_ttl(route, {"page": 1}) == ttl
@@ -0,0 +1,59 @@
+import pytest
+
+from brokeshire_agents.token_tech_analysis.token_metrics import TokenMetrics
+from brokeshire_agents.token_tech_analysis.trending_snapshot import (
+    TrendingData,
+    TrendingPrefetcher,
+)
+
+TOKEN = TokenMetrics(name="Bonk", symbol="BONK", address="bonk_address")
+
+
+class Builder:
+    def __init__(self) -> None:
+        self.fail = False
+
+    async def __call__(self) -> TrendingData:
+        if self.fail:
+            msg = "GeckoTerminal is down"
+            raise ValueError(msg)
+        return [TOKEN], []
+
+
+async def test_trending_prefetcher_versions_snapshots_and_keeps_them_on_failure():
+    builder = Builder()
+    prefetcher = TrendingPrefetcher(builder, interval=60, jitter=0)
+
+    first = await prefetcher.refresh()
+    assert first.version == 1
+    assert first.token_metrics == [TOKEN]
+    assert (await prefetcher.refresh()).version == 2
+
+    builder.fail = True
+    with pytest.raises(ValueError, match="GeckoTerminal is down"):
+        await prefetcher.refresh()
+
+    assert prefetcher.snapshot is not None
+    assert prefetcher.snapshot.version == 2
+    assert prefetcher.stats()["consecutive_failures"] == 1
+
+
+async def test_trending_prefetcher_backs_off_exponentially_with_jitter():
+    builder = Builder()
+    builder.fail = True
+    prefetcher = TrendingPrefetcher(
+        builder, interval=60, jitter=0.2, retry_delay=5, max_backoff=30
+    )
+
+    delays = []
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            await prefetcher.refresh()
+        delays.append(prefetcher.next_delay())
+
+    for delay, expected in zip(delays, [5, 10, 20, 30]):
+        assert expected * 0.8 <= delay <= expected * 1.2
+
+    builder.fail = False
+    await prefetcher.refresh()
+    assert 48 <= prefetcher.next_delay() <= 72